@@ -1,4 +1,5 @@
 import asyncio
+import re
 from logging.config import fileConfig
 
 from alembic import context
@@ -18,6 +19,13 @@ if config.config_file_name is not None:
 
 target_metadata = Base.metadata
 
+# Monthly partitions of messages are created and dropped by app.jobs.partitions, not by migrations
+PARTITION_NAME = re.compile(r"messages_(p\d{4}_\d{2}|default)$")
+
+
+def include_name(name, type_, parent_names) -> bool:
+    return not (type_ == "table" and PARTITION_NAME.match(name))
+
 
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode."""
@@ -27,6 +35,7 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        include_name=include_name,
     )
 
     with context.begin_transaction():
@@ -34,7 +43,9 @@ def run_migrations_offline() -> None:
 
 
 def do_run_migrations(connection: Connection) -> None:
-    context.configure(connection=connection, target_metadata=target_metadata)
+    context.configure(
+        connection=connection, target_metadata=target_metadata, include_name=include_name
+    )
 
     with context.begin_transaction():
         context.run_migrations()
@@ -0,0 +1,59 @@
+"""denormalize conversation listing fields
+
+Revision ID: 1d8f4c6b2e75
+Revises: e7a3b5c90d12
+Create Date: 2026-10-19 13:58:52.660381
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "1d8f4c6b2e75"
+down_revision: str | None = "e7a3b5c90d12"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "conversations",
+        sa.Column("message_count", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.add_column("conversations", sa.Column("last_message_preview", sa.String(200), nullable=True))
+
+    # Backfill from existing messages; updated_at becomes the last activity time
+    op.execute(
+        """
+        UPDATE conversations c
+        SET message_count = stats.message_count,
+            last_message_preview = left(last.content, 200),
+            updated_at = greatest(c.updated_at, stats.last_message_at)
+        FROM (
+            SELECT conversation_id, count(*) AS message_count, max(created_at) AS last_message_at
+            FROM messages
+            GROUP BY conversation_id
+        ) stats
+        JOIN LATERAL (
+            SELECT content
+            FROM messages m
+            WHERE m.conversation_id = stats.conversation_id
+            ORDER BY m.created_at DESC
+            LIMIT 1
+        ) last ON true
+        WHERE c.id = stats.conversation_id
+        """
+    )
+
+    op.create_index(
+        "ix_conversations_user_id_updated_at_id", "conversations", ["user_id", "updated_at", "id"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_conversations_user_id_updated_at_id", table_name="conversations")
+    op.drop_column("conversations", "last_message_preview")
+    op.drop_column("conversations", "message_count")
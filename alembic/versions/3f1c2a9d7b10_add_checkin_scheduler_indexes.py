@@ -0,0 +1,35 @@
+"""add check-in scheduler indexes, keep check-ins of deleted goals
+
+Revision ID: 3f1c2a9d7b10
+Revises:
+Create Date: 2026-10-19 09:12:44.318207
+
+"""
+from collections.abc import Sequence
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "3f1c2a9d7b10"
+down_revision: str | None = None
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_users_timezone_id", "users", ["timezone", "id"])
+    op.create_index("ix_goals_user_id_status", "goals", ["user_id", "status"])
+    op.create_index("ix_check_ins_user_id_responded", "check_ins", ["user_id", "responded"])
+    # The scheduler links check-ins to goals; deleting a goal keeps its check-ins
+    op.drop_constraint("check_ins_goal_id_fkey", "check_ins", type_="foreignkey")
+    op.create_foreign_key(
+        "check_ins_goal_id_fkey", "check_ins", "goals", ["goal_id"], ["id"], ondelete="SET NULL"
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint("check_ins_goal_id_fkey", "check_ins", type_="foreignkey")
+    op.create_foreign_key("check_ins_goal_id_fkey", "check_ins", "goals", ["goal_id"], ["id"])
+    op.drop_index("ix_check_ins_user_id_responded", table_name="check_ins")
+    op.drop_index("ix_goals_user_id_status", table_name="goals")
+    op.drop_index("ix_users_timezone_id", table_name="users")
@@ -0,0 +1,24 @@
+"""add daily_logs goal/date index
+
+Revision ID: 8b4e6f0a2c31
+Revises: 3f1c2a9d7b10
+Create Date: 2026-10-19 10:03:17.552914
+
+"""
+from collections.abc import Sequence
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "8b4e6f0a2c31"
+down_revision: str | None = "3f1c2a9d7b10"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_daily_logs_goal_id_log_date", "daily_logs", ["goal_id", "log_date"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_daily_logs_goal_id_log_date", table_name="daily_logs")
@@ -0,0 +1,47 @@
+"""add idempotency keys
+
+Revision ID: a6e1d3f59c27
+Revises: f4a9c2d81b36
+Create Date: 2026-10-19 16:48:13.552981
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "a6e1d3f59c27"
+down_revision: str | None = "f4a9c2d81b36"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "idempotency_keys",
+        sa.Column(
+            "user_id",
+            postgresql.UUID(as_uuid=False),
+            sa.ForeignKey("users.id"),
+            nullable=False,
+        ),
+        sa.Column("key", sa.String(length=255), nullable=False),
+        sa.Column("fingerprint", sa.String(length=64), nullable=False),
+        sa.Column("stream_id", sa.String(length=32), nullable=True),
+        sa.Column("response", postgresql.JSONB(), nullable=True),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=True,
+        ),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("user_id", "key"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("idempotency_keys")
@@ -0,0 +1,40 @@
+"""add messages full-text search vector
+
+Revision ID: b83e5f2a6d14
+Revises: a6e1d3f59c27
+Create Date: 2026-10-19 19:02:37.418265
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b83e5f2a6d14"
+down_revision: str | None = "a6e1d3f59c27"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    # Stored generated column: rewrites the table once, then Postgres keeps it in sync
+    op.add_column(
+        "messages",
+        sa.Column(
+            "search_vector",
+            postgresql.TSVECTOR(),
+            sa.Computed("to_tsvector('english'::regconfig, content)", persisted=True),
+            nullable=True,
+        ),
+    )
+    op.create_index(
+        "ix_messages_search_vector", "messages", ["search_vector"], postgresql_using="gin"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_messages_search_vector", table_name="messages")
+    op.drop_column("messages", "search_vector")
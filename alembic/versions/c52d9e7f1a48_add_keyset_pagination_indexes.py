@@ -0,0 +1,30 @@
+"""add keyset pagination indexes
+
+Revision ID: c52d9e7f1a48
+Revises: 8b4e6f0a2c31
+Create Date: 2026-10-19 11:26:40.871302
+
+"""
+from collections.abc import Sequence
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c52d9e7f1a48"
+down_revision: str | None = "8b4e6f0a2c31"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_goals_user_id_created_at_id", "goals", ["user_id", "created_at", "id"])
+    op.create_index(
+        "ix_progress_entries_goal_id_created_at_id",
+        "progress_entries",
+        ["goal_id", "created_at", "id"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_progress_entries_goal_id_created_at_id", table_name="progress_entries")
+    op.drop_index("ix_goals_user_id_created_at_id", table_name="goals")
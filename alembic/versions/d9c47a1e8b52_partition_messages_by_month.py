@@ -0,0 +1,120 @@
+"""partition messages by month of created_at
+
+Revision ID: d9c47a1e8b52
+Revises: b83e5f2a6d14
+Create Date: 2026-10-19 21:14:08.902517
+
+"""
+from collections.abc import Sequence
+from datetime import UTC, date, datetime
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "d9c47a1e8b52"
+down_revision: str | None = "b83e5f2a6d14"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+# Keep in step with app.services.partitions
+MONTHS_AHEAD = 3
+COLUMNS = "id, conversation_id, role, content, truncated, created_at"
+
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _message_columns() -> list[sa.Column]:
+    return [
+        sa.Column("id", postgresql.UUID(as_uuid=False), nullable=False),
+        sa.Column("conversation_id", postgresql.UUID(as_uuid=False), nullable=False),
+        sa.Column("role", sa.String(20), nullable=False),
+        sa.Column("content", sa.Text(), nullable=False),
+        sa.Column("truncated", sa.Boolean(), nullable=False, server_default="false"),
+        sa.Column(
+            "search_vector",
+            postgresql.TSVECTOR(),
+            sa.Computed("to_tsvector('english'::regconfig, content)", persisted=True),
+            nullable=True,
+        ),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.func.now(),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(
+            ["conversation_id"], ["conversations.id"], name="messages_conversation_id_fkey"
+        ),
+    ]
+
+
+def _create_indexes() -> None:
+    op.create_index(
+        "ix_messages_conversation_id_created_at", "messages", ["conversation_id", "created_at"]
+    )
+    op.create_index(
+        "ix_messages_search_vector", "messages", ["search_vector"], postgresql_using="gin"
+    )
+
+
+def _rename_old_table(name: str) -> None:
+    op.rename_table("messages", name)
+    op.execute(
+        f"ALTER TABLE {name} "
+        f"RENAME CONSTRAINT messages_conversation_id_fkey TO {name}_conversation_id_fkey"
+    )
+    op.execute(f"ALTER INDEX messages_pkey RENAME TO {name}_pkey")
+    op.execute(
+        "ALTER INDEX ix_messages_conversation_id_created_at "
+        f"RENAME TO ix_{name}_conversation_id_created_at"
+    )
+    op.execute(f"ALTER INDEX ix_messages_search_vector RENAME TO ix_{name}_search_vector")
+
+
+def upgrade() -> None:
+    # The primary key of a partitioned table has to include the partition key
+    _rename_old_table("messages_unpartitioned")
+    op.create_table(
+        "messages",
+        *_message_columns(),
+        sa.PrimaryKeyConstraint("id", "created_at"),
+        postgresql_partition_by="RANGE (created_at)",
+    )
+    _create_indexes()
+
+    # One partition per month from the oldest message, plus a default one so an insert
+    # never fails when the maintenance job hasn't created a month in time
+    oldest = (
+        op.get_bind()
+        .execute(sa.text("SELECT min(created_at) FROM messages_unpartitioned"))
+        .scalar()
+    )
+    today = datetime.now(UTC).date()
+    month = (oldest.astimezone(UTC).date() if oldest else today).replace(day=1)
+    last = _add_months(today.replace(day=1), MONTHS_AHEAD)
+    while month <= last:
+        end = _add_months(month, 1)
+        op.execute(
+            f"CREATE TABLE messages_p{month:%Y_%m} PARTITION OF messages "
+            f"FOR VALUES FROM ('{month.isoformat()} 00:00+00') TO ('{end.isoformat()} 00:00+00')"
+        )
+        month = end
+    op.execute("CREATE TABLE messages_default PARTITION OF messages DEFAULT")
+
+    op.execute(f"INSERT INTO messages ({COLUMNS}) SELECT {COLUMNS} FROM messages_unpartitioned")
+    op.drop_table("messages_unpartitioned")
+
+
+def downgrade() -> None:
+    # Messages already moved to archive files by the maintenance job are not restored
+    _rename_old_table("messages_partitioned")
+    op.create_table("messages", *_message_columns(), sa.PrimaryKeyConstraint("id"))
+    _create_indexes()
+    op.execute(f"INSERT INTO messages ({COLUMNS}) SELECT {COLUMNS} FROM messages_partitioned")
+    op.drop_table("messages_partitioned")
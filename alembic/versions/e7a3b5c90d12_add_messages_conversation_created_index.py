@@ -0,0 +1,26 @@
+"""add messages conversation/created_at index
+
+Revision ID: e7a3b5c90d12
+Revises: c52d9e7f1a48
+Create Date: 2026-10-19 12:41:08.204516
+
+"""
+from collections.abc import Sequence
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e7a3b5c90d12"
+down_revision: str | None = "c52d9e7f1a48"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_messages_conversation_id_created_at", "messages", ["conversation_id", "created_at"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_messages_conversation_id_created_at", table_name="messages")
@@ -0,0 +1,61 @@
+"""add token usage ledger and daily rollups
+
+Revision ID: f2b8d6c3a917
+Revises: d9c47a1e8b52
+Create Date: 2026-10-19 22:41:53.207116
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "f2b8d6c3a917"
+down_revision: str | None = "d9c47a1e8b52"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "token_usage",
+        sa.Column("id", sa.BigInteger(), sa.Identity(), nullable=False),
+        sa.Column("user_id", postgresql.UUID(as_uuid=False), nullable=False),
+        sa.Column("conversation_id", postgresql.UUID(as_uuid=False), nullable=True),
+        sa.Column("source", sa.String(20), nullable=False),
+        sa.Column("model", sa.String(255), nullable=False),
+        sa.Column("finish_reason", sa.String(32), nullable=True),
+        sa.Column("prompt_tokens", sa.Integer(), nullable=False),
+        sa.Column("completion_tokens", sa.Integer(), nullable=False),
+        sa.Column("cost", sa.Float(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_token_usage_user_id_created_at", "token_usage", ["user_id", "created_at"])
+    op.create_index("ix_token_usage_created_at", "token_usage", ["created_at"])
+
+    op.create_table(
+        "token_usage_daily",
+        sa.Column("user_id", postgresql.UUID(as_uuid=False), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("model", sa.String(255), nullable=False),
+        sa.Column("requests", sa.Integer(), nullable=False),
+        sa.Column("prompt_tokens", sa.BigInteger(), nullable=False),
+        sa.Column("completion_tokens", sa.BigInteger(), nullable=False),
+        sa.Column("cost", sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("user_id", "day", "model"),
+    )
+    op.create_index("ix_token_usage_daily_day_model", "token_usage_daily", ["day", "model"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_token_usage_daily_day_model", table_name="token_usage_daily")
+    op.drop_table("token_usage_daily")
+    op.drop_index("ix_token_usage_created_at", table_name="token_usage")
+    op.drop_index("ix_token_usage_user_id_created_at", table_name="token_usage")
+    op.drop_table("token_usage")
@@ -0,0 +1,29 @@
+"""add messages truncated flag
+
+Revision ID: f4a9c2d81b36
+Revises: 1d8f4c6b2e75
+Create Date: 2026-10-19 16:02:47.318204
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "f4a9c2d81b36"
+down_revision: str | None = "1d8f4c6b2e75"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "messages",
+        sa.Column("truncated", sa.Boolean(), server_default=sa.text("false"), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("messages", "truncated")
@@ -1,3 +1,3 @@
-from app.api.routes import auth_router, chat_router, goals_router
+from app.api.routes import admin_router, auth_router, chat_router, export_router, goals_router
 
-__all__ = ["auth_router", "chat_router", "goals_router"]
+__all__ = ["admin_router", "auth_router", "chat_router", "export_router", "goals_router"]
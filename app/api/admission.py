@@ -0,0 +1,45 @@
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.models import User
+from app.services import AdmissionRejected, chat_rate_limiter, llm_governor
+from app.services.admission import ADMISSION_REJECTED
+
+
+def _reject(exc: AdmissionRejected) -> HTTPException:
+    return HTTPException(status_code=exc.status_code, detail=exc.detail, headers=exc.headers)
+
+
+async def check_rate_limit(user: User) -> None:
+    """Take a token from the user's chat bucket, answering 429 with Retry-After once it is empty."""
+    if settings.chat_rate_limit_per_minute > 0:
+        retry_after = await chat_rate_limiter.hit(user.id)
+        if retry_after > 0:
+            ADMISSION_REJECTED.inc("rate_limited")
+            raise _reject(AdmissionRejected(429, "Too many messages, slow down", retry_after))
+
+
+class LLMSlot:
+    """
+    A slot held in the LLM governor, taken before any work is done for a request.
+
+    `release()` is idempotent so it can be called both on error paths and once
+    the LLM call has finished.
+    """
+
+    def __init__(self, acquired: float):
+        self._acquired: float | None = acquired
+
+    def release(self) -> None:
+        if self._acquired is not None:
+            llm_governor.release(self._acquired)
+            self._acquired = None
+
+
+async def acquire_llm_slot() -> LLMSlot:
+    """Wait for an LLM slot, answering 503 with Retry-After if the queue is full or too slow."""
+    try:
+        return LLMSlot(await llm_governor.acquire())
+    except AdmissionRejected as exc:
+        raise _reject(exc) from None
+
@@ -3,8 +3,10 @@ from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.metrics import timed
 from app.core.security import decode_access_token
-from app.db import get_db
+from app.db import async_session_maker, current_user_id, get_db, read_session
+from app.db.replica import is_replica
 from app.models import User
 
 security = HTTPBearer()
@@ -14,7 +16,11 @@ async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: AsyncSession = Depends(get_db),
 ) -> User:
-    token = credentials.credentials
+    return await user_from_token(credentials.credentials, db)
+
+
+def token_user_id(token: str) -> str:
+    """The user ID a bearer token was issued for, raising 401 if it is invalid."""
     payload = decode_access_token(token)
 
     if payload is None:
@@ -29,9 +35,16 @@ async def get_current_user(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid token payload",
         )
+    return user_id
+
 
-    result = await db.execute(select(User).where(User.id == user_id))
-    user = result.scalar_one_or_none()
+async def user_from_token(token: str, db: AsyncSession) -> User:
+    """Resolve a bearer token to its user, raising 401 if it is invalid."""
+    user_id = token_user_id(token)
+
+    with timed("auth_user"):
+        result = await db.execute(select(User).where(User.id == user_id))
+        user = result.scalar_one_or_none()
 
     if user is None:
         raise HTTPException(
@@ -39,4 +52,29 @@ async def get_current_user(
             detail="User not found",
         )
 
+    # Writes committed from here on count as this user's (read-your-writes routing)
+    current_user_id.set(user.id)
     return user
+
+
+async def get_read_db(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+) -> AsyncSession:
+    """Session for read-only routes: the replica if it is caught up and the user hasn't written."""
+    async with read_session(token_user_id(credentials.credentials)) as session:
+        yield session
+
+
+async def get_current_reader(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_read_db),
+) -> User:
+    """`get_current_user` for read-only routes, looked up through the read session."""
+    try:
+        return await user_from_token(credentials.credentials, db)
+    except HTTPException:
+        if not is_replica(db):
+            raise
+    # Signed up moments ago: the user row may not have reached the replica yet
+    async with async_session_maker() as primary:
+        return await user_from_token(credentials.credentials, primary)
@@ -0,0 +1,130 @@
+import base64
+import hashlib
+from collections.abc import Callable
+from datetime import datetime
+from typing import Any
+from uuid import UUID
+
+from fastapi import HTTPException, Request, Response, status
+from pydantic import BaseModel
+from sqlalchemy import and_, or_
+
+from app.core.serialization import FastJSONResponse
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(sort_value: datetime | float, row_id: str) -> str:
+    """Encode the (timestamp or score, id) of the last row on a page as an opaque cursor."""
+    value = sort_value.isoformat() if isinstance(sort_value, datetime) else repr(sort_value)
+    raw = f"{value}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(
+    cursor: str, parse: Callable[[str], Any] = datetime.fromisoformat
+) -> tuple[Any, str]:
+    """Decode a cursor produced by `encode_cursor`, reading the sort value with `parse`."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, row_id = base64.urlsafe_b64decode(padded).decode().split("|", 1)
+        return parse(sort_value), str(UUID(row_id))
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        ) from None
+
+
+def keyset_before(
+    sort_col, id_col, cursor: str | None, parse: Callable[[str], Any] = datetime.fromisoformat
+):
+    """
+    WHERE clause for the page after `cursor` in (sort_col DESC, id DESC) order.
+
+    `sort_col` may be any expression, e.g. a search rank (pass `parse=float`).
+    Returns None when there is no cursor (first page).
+    """
+    if cursor is None:
+        return None
+    sort_value, row_id = decode_cursor(cursor, parse)
+    return or_(
+        sort_col < sort_value,
+        and_(sort_col == sort_value, id_col < row_id),
+    )
+
+
+def weak_etag(*parts) -> str:
+    """Build a weak ETag from the values that change whenever the listing does."""
+    digest = hashlib.blake2b("|".join(str(p) for p in parts).encode(), digest_size=12).hexdigest()
+    return f'W/"{digest}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Weak comparison of `etag` against the request's If-None-Match header."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in header.split(","))
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+
+def finish_page(
+    response: Response,
+    rows: list,
+    limit: int,
+    etag: str,
+    sort_attr: str = "created_at",
+) -> list:
+    """
+    Trim a page fetched with `limit + 1` rows and set the ETag and next-cursor headers.
+
+    Rows must expose `id` and the timestamp named by `sort_attr`.
+    """
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, no-cache"
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(getattr(last, sort_attr), last.id)
+    return rows
+
+
+def response_columns(model, schema: type[BaseModel], *extra, **overrides) -> list:
+    """
+    `model`'s columns for each field of `schema`, in order, then `extra` (the sort column).
+
+    A field named in `overrides` is selected as the given expression instead.
+    """
+    columns = [overrides.get(name, getattr(model, name)) for name in schema.model_fields]
+    return columns + list(extra)
+
+
+def json_page(
+    response: Response,
+    rows: list,
+    limit: int,
+    etag: str,
+    schema: type[BaseModel],
+    sort_attr: str = "created_at",
+) -> Response:
+    """
+    `finish_page` for rows selected with `response_columns`, serialized straight to JSON.
+
+    Skips ORM hydration and response-model validation: each row tuple is
+    zipped with `schema`'s field names (dropping any trailing extra columns),
+    so the columns must already hold the types the schema would output.
+    """
+    rows = finish_page(response, rows, limit, etag, sort_attr)
+    fields = tuple(schema.model_fields)
+    # strict=False: rows may end with extra columns that aren't fields
+    body = [dict(zip(fields, row, strict=False)) for row in rows]
+    return FastJSONResponse(body, headers=response.headers)
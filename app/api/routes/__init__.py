@@ -1,5 +1,7 @@
+from app.api.routes.admin import router as admin_router
 from app.api.routes.auth import router as auth_router
 from app.api.routes.chat import router as chat_router
+from app.api.routes.export import router as export_router
 from app.api.routes.goals import router as goals_router
 
-__all__ = ["auth_router", "chat_router", "goals_router"]
+__all__ = ["admin_router", "auth_router", "chat_router", "export_router", "goals_router"]
@@ -0,0 +1,32 @@
+import secrets
+
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+
+from app.core.config import settings
+from app.db import query_profiler
+
+router = APIRouter(prefix="/admin", tags=["admin"], include_in_schema=False)
+
+
+async def require_admin(x_admin_token: str = Header(default="")) -> None:
+    if not settings.admin_token:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not secrets.compare_digest(x_admin_token, settings.admin_token):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid admin token")
+
+
+@router.get("/db/profile", dependencies=[Depends(require_admin)])
+async def get_db_profile(limit: int = 50):
+    """Hottest SQL statements with p50/p99 timings and suspected N+1 patterns."""
+    if not settings.db_profiling:
+        raise HTTPException(
+            status_code=409, detail="Set DB_PROFILING=true to enable query profiling"
+        )
+    return query_profiler.snapshot(limit=limit)
+
+
+@router.delete("/db/profile", dependencies=[Depends(require_admin)])
+async def reset_db_profile():
+    """Clear the collected statement statistics."""
+    query_profiler.reset()
+    return {"message": "Profile reset"}
@@ -2,13 +2,13 @@ from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi.responses import RedirectResponse
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
-import httpx
 
 from app.core.config import settings
-from app.core.oauth import oauth
+from app.core.http import get_http_client
+from app.core.oauth import get_oauth
 from app.core.security import create_access_token
 from app.db import get_db
-from app.models import User
+from app.models import User, UserEngagement
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
@@ -16,12 +16,12 @@ router = APIRouter(prefix="/auth", tags=["auth"])
 @router.get("/google/login")
 async def google_login(request: Request):
     redirect_uri = f"{settings.backend_url}/auth/google/callback"
-    return await oauth.google.authorize_redirect(request, redirect_uri)
+    return await get_oauth().google.authorize_redirect(request, redirect_uri)
 
 
 @router.get("/google/callback")
 async def google_callback(request: Request, db: AsyncSession = Depends(get_db)):
-    token = await oauth.google.authorize_access_token(request)
+    token = await get_oauth().google.authorize_access_token(request)
     user_info = token.get("userinfo")
 
     if not user_info:
@@ -40,6 +40,7 @@ async def google_callback(request: Request, db: AsyncSession = Depends(get_db)):
             picture=user_info.get("picture"),
             oauth_provider="google",
             oauth_id=user_info["sub"],
+            engagement=UserEngagement(),
         )
         db.add(user)
         await db.commit()
@@ -52,20 +53,19 @@ async def google_callback(request: Request, db: AsyncSession = Depends(get_db)):
 @router.get("/facebook/login")
 async def facebook_login(request: Request):
     redirect_uri = f"{settings.backend_url}/auth/facebook/callback"
-    return await oauth.facebook.authorize_redirect(request, redirect_uri)
+    return await get_oauth().facebook.authorize_redirect(request, redirect_uri)
 
 
 @router.get("/facebook/callback")
 async def facebook_callback(request: Request, db: AsyncSession = Depends(get_db)):
-    token = await oauth.facebook.authorize_access_token(request)
+    token = await get_oauth().facebook.authorize_access_token(request)
 
     # Get user info from Facebook Graph API
-    async with httpx.AsyncClient() as client:
-        resp = await client.get(
-            "https://graph.facebook.com/me",
-            params={"fields": "id,name,email,picture", "access_token": token["access_token"]},
-        )
-        user_info = resp.json()
+    resp = await get_http_client().get(
+        "https://graph.facebook.com/me",
+        params={"fields": "id,name,email,picture", "access_token": token["access_token"]},
+    )
+    user_info = resp.json()
 
     if "error" in user_info:
         raise HTTPException(status_code=400, detail="Failed to get user info from Facebook")
@@ -83,6 +83,7 @@ async def facebook_callback(request: Request, db: AsyncSession = Depends(get_db)
             picture=user_info.get("picture", {}).get("data", {}).get("url"),
             oauth_provider="facebook",
             oauth_id=user_info["id"],
+            engagement=UserEngagement(),
         )
         db.add(user)
         await db.commit()
@@ -1,16 +1,82 @@
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import StreamingResponse
-from sqlalchemy import select
+import asyncio
+import json
+import logging
+import re
+import time
+import uuid
+from collections import deque
+from collections.abc import AsyncIterator
+from datetime import UTC, datetime
+from uuid import uuid4
+
+from fastapi import (
+    APIRouter,
+    Depends,
+    Header,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    WebSocket,
+    WebSocketDisconnect,
+    status,
+)
+from sqlalchemy import DateTime, String, Text, bindparam, column, func, select
+from sqlalchemy.dialects.postgresql import (
+    ARRAY,
+    UUID,
+    to_tsvector,
+    ts_headline,
+    websearch_to_tsquery,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.deps import get_current_user
-from app.db import get_db
-from app.models import Conversation, Goal, Message, User
-from app.schemas import ChatRequest, ChatResponse, ConversationResponse
-from app.services import openrouter_service, qdrant_service
+from app.api.admission import LLMSlot, acquire_llm_slot, check_rate_limit
+from app.api.deps import get_current_reader, get_current_user, get_read_db, user_from_token
+from app.api.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    etag_matches,
+    json_page,
+    keyset_before,
+    not_modified,
+    response_columns,
+    weak_etag,
+)
+from app.api.sse import EventStreamResponse, coalesce
+from app.core.config import settings
+from app.core.metrics import timed
+from app.core.serialization import dumps
+from app.db import async_session_maker, get_db, read_session
+from app.models import Conversation, Goal, IdempotencyKey, Message, User
+from app.models.conversation import SEARCH_CONFIG
+from app.schemas import ChatRequest, ChatResponse, ConversationResponse, MessageSearchResult
+from app.services import (
+    HISTORY_WINDOW,
+    ChatStream,
+    ConversationState,
+    IdempotencyError,
+    conversation_cache,
+    idempotency_service,
+    message_archive,
+    openrouter_service,
+    parse_event_id,
+    qdrant_service,
+    record_checkin_response,
+    request_fingerprint,
+    stream_registry,
+    usage_ledger,
+)
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/chat", tags=["chat"])
 
+STREAM_ID_HEADER = "X-Stream-ID"
+# Lexemes as tsquery text quotes them: in single quotes, with ' and \ escaped
+QUOTED_LEXEME = re.compile(r"'((?:''|\\.|[^'\\])*)'")
+QUOTE_ESCAPE = re.compile(r"''|\\(.)")
+
 SYSTEM_PROMPT = """You are JetAide, a supportive AI assistant that helps people achieve their personal goals like quitting smoking, eating healthier, exercising more, or any other positive life change.
 
 Your role is to:
@@ -31,197 +97,865 @@ Relevant context from previous conversations:
 """
 
 
-async def build_system_prompt(user_id: str, query: str, db: AsyncSession) -> str:
-    """Build the system prompt with user's goals and relevant memories."""
-    # Get user's goals
-    result = await db.execute(
-        select(Goal).where(Goal.user_id == user_id, Goal.status == "active")
-    )
-    goals = result.scalars().all()
+async def load_goals_text(user_id: str, db: AsyncSession) -> str:
+    """The user's active goals, formatted for the system prompt (cached, see conversation_cache)."""
+    goals_text = conversation_cache.goals(user_id)
+    if goals_text is not None:
+        return goals_text
+    epoch = conversation_cache.goals_epoch
+    with timed("goals_query"):
+        result = await db.execute(
+            select(Goal).where(Goal.user_id == user_id, Goal.status == "active")
+        )
+        goals = result.scalars().all()
     goals_text = "\n".join([f"- {g.title} ({g.category}): {g.description or 'No description'}" for g in goals])
-    if not goals_text:
-        goals_text = "No active goals set yet."
+    goals_text = goals_text or "No active goals set yet."
+    conversation_cache.set_goals(user_id, goals_text, epoch)
+    return goals_text
 
-    # Get relevant memories
+
+async def load_memory_context(user_id: str, query: str) -> str:
+    """Memories relevant to `query`, formatted for the system prompt."""
     try:
         memories = await qdrant_service.search_memories(user_id, query, limit=3)
         context_text = "\n".join([f"- {m['content']}" for m in memories])
     except Exception:
         context_text = "No previous context available."
 
-    if not context_text:
-        context_text = "No previous context available."
+    return context_text or "No previous context available."
 
+
+async def build_system_prompt(user_id: str, query: str, db: AsyncSession) -> str:
+    """Build the system prompt with user's goals and relevant memories."""
+    goals_text = await load_goals_text(user_id, db)
+    context_text = await load_memory_context(user_id, query)
     return SYSTEM_PROMPT.format(goals=goals_text, context=context_text)
 
 
+def is_uuid(value) -> bool:
+    try:
+        uuid.UUID(value)
+    except (TypeError, ValueError, AttributeError):
+        return False
+    return True
+
+
+def default_title(message: str) -> str:
+    return message[:50] + ("..." if len(message) > 50 else "")
+
+
+async def load_history(db: AsyncSession, conversation_id: str) -> list[dict]:
+    """The conversation's last HISTORY_WINDOW messages, oldest first."""
+    with timed("history_query"):
+        result = await db.execute(
+            select(Message.role, Message.content)
+            .where(Message.conversation_id == conversation_id)
+            .order_by(Message.created_at.desc())
+            .limit(HISTORY_WINDOW)
+        )
+        rows = result.all()
+    return [{"role": role, "content": content} for role, content in reversed(rows)]
+
+
+async def get_conversation_state(
+    db: AsyncSession, user_id: str, conversation_id: str
+) -> ConversationState:
+    """The user's conversation from the cache, or loaded into it; 404 if it isn't theirs."""
+    state = conversation_cache.get(conversation_id, user_id)
+    if state is not None:
+        return state
+    with timed("conversation_query"):
+        result = await db.execute(
+            select(Conversation.title, Conversation.message_count).where(
+                Conversation.id == conversation_id,
+                Conversation.user_id == user_id,
+            )
+        )
+        conversation = result.one_or_none()
+    if conversation is None:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    history = await load_history(db, conversation_id)
+    state = ConversationState(
+        conversation_id, user_id, conversation.title, conversation.message_count, history
+    )
+    conversation_cache.put(state)
+    return state
+
+
+def new_conversation(db: AsyncSession, user_id: str) -> ConversationState:
+    """Add a new conversation to the session; it is cached once its first message commits."""
+    conversation = Conversation(id=str(uuid4()), user_id=user_id, message_count=0)
+    db.add(conversation)
+    return ConversationState(conversation.id, user_id, title=None, message_count=0)
+
+
+async def add_message(
+    db: AsyncSession,
+    state: ConversationState,
+    role: str,
+    content: str,
+    truncated: bool = False,
+    title: str | None = None,
+) -> tuple[int, str | None]:
+    """
+    Add a message to the session without loading the conversation row.
+
+    Returns the conversation's message_count and title as of this write, for
+    `conversation_cache.apply` once the caller has committed. Raises 404 if
+    the conversation was deleted meanwhile.
+    """
+    now = datetime.now(UTC)
+    result = await db.execute(
+        Conversation.record_message_update(state.id, state.user_id, content, now, title)
+    )
+    written = result.one_or_none()
+    if written is None:
+        conversation_cache.evict(state.id)
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    db.add(
+        Message(
+            conversation_id=state.id,
+            role=role,
+            content=content,
+            truncated=truncated,
+            created_at=now,
+        )
+    )
+    return written.message_count, written.title
+
+
+async def add_user_message(
+    db: AsyncSession, state: ConversationState, content: str
+) -> ConversationState:
+    """Store and commit a turn's user message; returns the state to build its context from."""
+    written = await add_message(db, state, "user", content)
+    await record_checkin_response(db, state.user_id)
+    await db.commit()
+    if conversation_cache.apply(state, "user", content, *written):
+        return state
+    # Messages were added elsewhere since the state was cached
+    return await get_conversation_state(db, state.user_id, state.id)
+
+
 @router.get("/conversations", response_model=list[ConversationResponse])
 async def list_conversations(
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db),
+    request: Request,
+    response: Response,
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    current_user: User = Depends(get_current_reader),
+    db: AsyncSession = Depends(get_read_db),
 ):
-    """List all conversations for the current user."""
+    """List conversations for the current user, most recently active first."""
     result = await db.execute(
-        select(Conversation)
+        select(func.count(), func.max(Conversation.updated_at)).where(
+            Conversation.user_id == current_user.id
+        )
+    )
+    count, last_updated = result.one()
+    etag = weak_etag(count, last_updated, cursor, limit)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    query = (
+        select(*response_columns(Conversation, ConversationResponse))
         .where(Conversation.user_id == current_user.id)
-        .order_by(Conversation.updated_at.desc())
+        .order_by(Conversation.updated_at.desc(), Conversation.id.desc())
+        .limit(limit + 1)
+    )
+    if (after := keyset_before(Conversation.updated_at, Conversation.id, cursor)) is not None:
+        query = query.where(after)
+
+    result = await db.execute(query)
+    return json_page(
+        response, list(result.all()), limit, etag, ConversationResponse, sort_attr="updated_at"
     )
-    return result.scalars().all()
+
+
+def query_lexemes(tree: str | None) -> list[str]:
+    """
+    The lexemes in `tree`, a querytree() of a tsquery. A message can only match
+    the query if it has one of them; none are returned for a query that has no
+    positive terms ("T") or only stop words.
+    """
+    if not tree or tree == "T":
+        return []
+    return [
+        QUOTE_ESCAPE.sub(lambda m: m[1] or "'", lexeme) for lexeme in QUOTED_LEXEME.findall(tree)
+    ]
+
+
+def archived_matches(rows: list[dict], tsquery):
+    """
+    The archived `rows` (see app.services.message_archive) that match `tsquery`, ranked
+    in Postgres exactly like live messages; columns as in `search_messages`.
+    """
+    array_types = {
+        "id": ARRAY(UUID(as_uuid=False)),
+        "conversation_id": ARRAY(UUID(as_uuid=False)),
+        "role": ARRAY(String),
+        "content": ARRAY(Text),
+        "created_at": ARRAY(DateTime(timezone=True)),
+    }
+    archived = (
+        func.unnest(
+            *(
+                bindparam(f"archived_{name}", [row[name] for row in rows], type_=type_)
+                for name, type_ in array_types.items()
+            )
+        )
+        .table_valued(*(column(name, type_.item_type) for name, type_ in array_types.items()))
+        .render_derived(name="archived")
+    )
+    search_vector = to_tsvector(SEARCH_CONFIG, archived.c.content).label("search_vector")
+    vectors = select(archived, search_vector).subquery()
+    return select(
+        vectors.c.id,
+        vectors.c.conversation_id,
+        vectors.c.role,
+        vectors.c.content,
+        func.ts_rank(vectors.c.search_vector, tsquery).label("rank"),
+        vectors.c.created_at,
+    ).where(vectors.c.search_vector.bool_op("@@")(tsquery))
+
+
+@router.get("/search", response_model=list[MessageSearchResult])
+async def search_messages(
+    request: Request,
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200),
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    current_user: User = Depends(get_current_reader),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    Full-text search over the current user's messages, best matches first.
+
+    `q` takes web-search syntax: words, "quoted phrases", `or` and `-excluded`.
+    Each result has a snippet with the matches wrapped in `<mark>` tags; the
+    rest of the snippet is raw message text, so escape it before rendering
+    it as HTML. Messages in archived months are searched too, unless `q` has
+    only `-excluded` words.
+    """
+    tsquery = websearch_to_tsquery(SEARCH_CONFIG, q)
+    # Any new message bumps its conversation's updated_at, so this also versions the results
+    result = await db.execute(
+        select(func.count(), func.max(Conversation.updated_at), func.querytree(tsquery)).where(
+            Conversation.user_id == current_user.id
+        )
+    )
+    count, last_updated, tree = result.one()
+    etag = weak_etag(count, last_updated, q, cursor, limit)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    found = (
+        select(
+            Message.id,
+            Message.conversation_id,
+            Message.role,
+            Message.content,
+            func.ts_rank(Message.search_vector, tsquery).label("rank"),
+            Message.created_at,
+        )
+        .join(Conversation, Conversation.id == Message.conversation_id)
+        .where(
+            Conversation.user_id == current_user.id, Message.search_vector.bool_op("@@")(tsquery)
+        )
+    )
+    archived = []
+    if lexemes := query_lexemes(tree):
+        with timed("search_archive_read"):
+            user_archive = message_archive.read_user_messages(db, current_user.id, lexemes=lexemes)
+            async for rows in user_archive:
+                archived.extend(rows)
+    if archived:
+        found = found.union_all(archived_matches(archived, tsquery))
+    found = found.subquery("found")
+
+    query = (
+        select(
+            found.c.id,
+            found.c.conversation_id,
+            Conversation.title.label("conversation_title"),
+            found.c.role,
+            ts_headline(
+                SEARCH_CONFIG,
+                found.c.content,
+                tsquery,
+                "StartSel=<mark>, StopSel=</mark>, MaxWords=35, MinWords=15, MaxFragments=2",
+            ).label("snippet"),
+            found.c.rank,
+            found.c.created_at,
+        )
+        .join(Conversation, Conversation.id == found.c.conversation_id)
+        .order_by(found.c.rank.desc(), found.c.id.desc())
+        .limit(limit + 1)
+    )
+    if (after := keyset_before(found.c.rank, found.c.id, cursor, parse=float)) is not None:
+        query = query.where(after)
+
+    with timed("search_query"):
+        result = await db.execute(query)
+        rows = list(result.all())
+    return json_page(response, rows, limit, etag, MessageSearchResult, sort_attr="rank")
+
+
+async def claim_idempotency_key(
+    key: str, user: User, path: str, request: ChatRequest, attach_stream: bool = False
+) -> IdempotencyKey | None:
+    """Claim an Idempotency-Key; returns the record of an earlier request already holding it."""
+    fingerprint = request_fingerprint(path, request.model_dump())
+    try:
+        return await idempotency_service.begin(
+            user.id, key, fingerprint, attach_stream=attach_stream
+        )
+    except IdempotencyError as exc:
+        raise HTTPException(status_code=exc.status_code, detail=exc.detail) from None
 
 
 @router.post("", response_model=ChatResponse)
 async def chat(
     request: ChatRequest,
+    idempotency_key: str | None = Header(None, max_length=255),
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    """Send a message and get a response."""
+    """
+    Send a message and get a response.
+
+    With an `Idempotency-Key` header, a retry of the same request returns the
+    first one's response (waiting for it while it runs) instead of storing the
+    message and generating again.
+    """
+    if idempotency_key:
+        record = await claim_idempotency_key(idempotency_key, current_user, "/chat", request)
+        if record is not None:
+            return ChatResponse(**record.response)
+
+    try:
+        await check_rate_limit(current_user)
+        slot = await acquire_llm_slot()
+        try:
+            return await _run_chat(request, current_user, db, slot, idempotency_key)
+        finally:
+            slot.release()
+    except BaseException:
+        if idempotency_key:
+            await idempotency_service.release(current_user.id, idempotency_key)
+        raise
+
+
+async def _run_chat(
+    request: ChatRequest,
+    current_user: User,
+    db: AsyncSession,
+    slot: LLMSlot,
+    idempotency_key: str | None,
+) -> ChatResponse:
     # Get or create conversation
     if request.conversation_id:
-        result = await db.execute(
-            select(Conversation).where(
-                Conversation.id == request.conversation_id,
-                Conversation.user_id == current_user.id,
-            )
-        )
-        conversation = result.scalar_one_or_none()
-        if not conversation:
-            raise HTTPException(status_code=404, detail="Conversation not found")
+        state = await get_conversation_state(db, current_user.id, request.conversation_id)
     else:
-        conversation = Conversation(user_id=current_user.id)
-        db.add(conversation)
-        await db.commit()
-        await db.refresh(conversation)
+        state = new_conversation(db, current_user.id)
 
     # Store user message
-    user_message = Message(
-        conversation_id=conversation.id,
-        role="user",
-        content=request.message,
-    )
-    db.add(user_message)
-    await db.commit()
+    state = await add_user_message(db, state, request.message)
 
     # Build messages for LLM
     system_prompt = await build_system_prompt(current_user.id, request.message, db)
-
-    # Get conversation history
-    result = await db.execute(
-        select(Message)
-        .where(Message.conversation_id == conversation.id)
-        .order_by(Message.created_at)
-    )
-    history = result.scalars().all()
-
-    messages = [{"role": "system", "content": system_prompt}]
-    for msg in history[-20:]:  # Last 20 messages for context
-        messages.append({"role": msg.role, "content": msg.content})
+    messages = [{"role": "system", "content": system_prompt}, *state.history]
 
     # Get response from LLM
-    response_text = await openrouter_service.chat(messages)
-
-    # Store assistant message
-    assistant_message = Message(
-        conversation_id=conversation.id,
-        role="assistant",
-        content=response_text,
+    completion = await openrouter_service.complete(messages)
+    slot.release()
+    response_text = completion.content
+    usage_ledger.record(current_user.id, "chat", completion, state.id)
+
+    # Store assistant message, titling the conversation if it's new
+    written = await add_message(
+        db, state, "assistant", response_text, title=default_title(request.message)
     )
-    db.add(assistant_message)
-
-    # Update conversation title if it's new
-    if not conversation.title and len(history) <= 2:
-        conversation.title = request.message[:50] + ("..." if len(request.message) > 50 else "")
-
     await db.commit()
+    conversation_cache.apply(state, "assistant", response_text, *written)
+
+    chat_response = ChatResponse(response=response_text, conversation_id=state.id)
+    if idempotency_key:
+        await idempotency_service.complete(
+            current_user.id, idempotency_key, chat_response.model_dump()
+        )
 
     # Store the exchange in vector memory for future context
     try:
         memory_content = f"User: {request.message}\nAssistant: {response_text}"
-        await qdrant_service.store_memory(current_user.id, memory_content)
+        with timed("memory_store"):
+            await qdrant_service.store_memory(current_user.id, memory_content)
     except Exception:
         pass  # Don't fail the request if memory storage fails
 
-    return ChatResponse(response=response_text, conversation_id=conversation.id)
+    return chat_response
+
+
+def merged_chunks(completion) -> AsyncIterator[str]:
+    """The completion's text, merged into fewer, larger chunks (see STREAM_FLUSH_MS)."""
+    return coalesce(completion, settings.stream_flush_ms / 1000, settings.stream_flush_max_chars)
+
+
+def delta_frame(content: str) -> str:
+    # JSON keeps newlines in the text from breaking the SSE framing
+    return dumps({"content": content})
+
+
+def finish_frame(finish_reason: str | None, usage: dict | None) -> str:
+    return dumps({"finish_reason": finish_reason, "usage": usage})
+
+
+def resume_chat_stream(last_event_id: str, user: User) -> EventStreamResponse:
+    """Replay the frames after `last_event_id`, then follow the rest of the same generation."""
+    parsed = parse_event_id(last_event_id)
+    stream = stream_registry.get(parsed[0], user.id) if parsed else None
+    if stream is None:
+        raise HTTPException(status_code=404, detail="Stream not found or expired")
+    if not stream.can_resume(parsed[1]):
+        raise HTTPException(status_code=410, detail="Missed frames are no longer available")
+    return EventStreamResponse(stream.follow(parsed[1]), headers={STREAM_ID_HEADER: stream.id})
+
+
+async def replay_chat_stream(
+    record: IdempotencyKey, user: User, request: ChatRequest
+) -> EventStreamResponse:
+    """Serve a duplicate /chat/stream request from the generation its Idempotency-Key points to."""
+    stream = stream_registry.get(record.stream_id, user.id)
+    if stream is not None and stream.can_resume(-1):
+        return EventStreamResponse(stream.follow(), headers={STREAM_ID_HEADER: stream.id})
+    if record.response is None:
+        # Generating on another worker: wait for its stored reply
+        record = await claim_idempotency_key(record.key, user, "/chat/stream", request)
+        if record is None:
+            raise HTTPException(status_code=409, detail="The original request failed, please retry")
+    response = record.response
+    frames = [delta_frame(response["response"])]
+    if not response.get("truncated"):
+        frames += [finish_frame(response.get("finish_reason"), response.get("usage")), "[DONE]"]
+    stream = ChatStream.replay(record.stream_id, user.id, frames)
+    return EventStreamResponse(stream.follow(), headers={STREAM_ID_HEADER: stream.id})
 
 
 @router.post("/stream")
 async def chat_stream(
     request: ChatRequest,
+    last_event_id: str | None = Header(None),
+    idempotency_key: str | None = Header(None, max_length=255),
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    """Send a message and stream the response."""
+    """
+    Send a message and stream the response.
+
+    Text arrives as `{"content": ...}` frames, merged over up to
+    STREAM_FLUSH_MS. A `{"finish_reason": ..., "usage": ...}` frame and
+    `[DONE]` end a complete reply; `{"error": "upstream_failed"}` ends a
+    failed one. Every frame carries an SSE `id`. A client that lost the connection repeats
+    the request with a `Last-Event-ID` header to receive the frames it missed
+    and the rest of the same generation, without re-sending the message.
+    With an `Idempotency-Key` header, a retry of the same request follows the
+    first request's generation from the start instead of starting another.
+    """
+    if last_event_id:
+        return resume_chat_stream(last_event_id, current_user)
+
+    if idempotency_key:
+        record = await claim_idempotency_key(
+            idempotency_key, current_user, "/chat/stream", request, attach_stream=True
+        )
+        if record is not None:
+            return await replay_chat_stream(record, current_user, request)
+
+    try:
+        await check_rate_limit(current_user)
+        # Admitted before any writes; the slot is held until the generation ends
+        slot = await acquire_llm_slot()
+        try:
+            return await _start_chat_stream(request, current_user, db, slot, idempotency_key)
+        except BaseException:
+            slot.release()
+            raise
+    except BaseException:
+        if idempotency_key:
+            await idempotency_service.release(current_user.id, idempotency_key)
+        raise
+
+
+async def _start_chat_stream(
+    request: ChatRequest,
+    current_user: User,
+    db: AsyncSession,
+    slot: LLMSlot,
+    idempotency_key: str | None,
+):
     # Get or create conversation
     if request.conversation_id:
-        result = await db.execute(
-            select(Conversation).where(
-                Conversation.id == request.conversation_id,
-                Conversation.user_id == current_user.id,
-            )
-        )
-        conversation = result.scalar_one_or_none()
-        if not conversation:
-            raise HTTPException(status_code=404, detail="Conversation not found")
+        state = await get_conversation_state(db, current_user.id, request.conversation_id)
     else:
-        conversation = Conversation(user_id=current_user.id)
-        db.add(conversation)
-        await db.commit()
-        await db.refresh(conversation)
+        state = new_conversation(db, current_user.id)
 
     # Store user message
-    user_message = Message(
-        conversation_id=conversation.id,
-        role="user",
-        content=request.message,
-    )
-    db.add(user_message)
-    await db.commit()
+    state = await add_user_message(db, state, request.message)
 
     # Build messages for LLM
     system_prompt = await build_system_prompt(current_user.id, request.message, db)
+    messages = [{"role": "system", "content": system_prompt}, *state.history]
 
-    # Get conversation history
-    result = await db.execute(
-        select(Message)
-        .where(Message.conversation_id == conversation.id)
-        .order_by(Message.created_at)
-    )
-    history = result.scalars().all()
-
-    messages = [{"role": "system", "content": system_prompt}]
-    for msg in history[-20:]:
-        messages.append({"role": msg.role, "content": msg.content})
-
-    async def generate():
+    # Runs as its own task with its own session, so a dropped connection can resume it.
+    # If the client stays away, the task is cancelled: the upstream stream is closed
+    # and whatever was generated so far is stored as a truncated reply.
+    async def generate(stream: ChatStream) -> None:
         full_response = []
-        async for chunk in openrouter_service.chat_stream(messages):
-            full_response.append(chunk)
-            yield f"data: {chunk}\n\n"
-
-        # Store assistant message after streaming completes
+        cancelled = False
+        completion = openrouter_service.chat_stream(messages)
+        try:
+            async for chunk in merged_chunks(completion):
+                full_response.append(chunk)
+                await stream.append(delta_frame(chunk))
+        except asyncio.CancelledError:
+            cancelled = True
+        except Exception:
+            if idempotency_key:
+                await idempotency_service.release(current_user.id, idempotency_key)
+            raise
+        finally:
+            slot.release()
+        usage_ledger.record(current_user.id, "stream", completion, state.id)
+
+        # Store assistant message after streaming completes (or is cut off)
         response_text = "".join(full_response)
-        assistant_message = Message(
-            conversation_id=conversation.id,
-            role="assistant",
-            content=response_text,
-        )
-        db.add(assistant_message)
-
-        if not conversation.title:
-            conversation.title = request.message[:50] + ("..." if len(request.message) > 50 else "")
+        if cancelled and not response_text:
+            if idempotency_key:
+                await idempotency_service.release(current_user.id, idempotency_key)
+            raise asyncio.CancelledError
+        async with async_session_maker() as session:
+            try:
+                written = await add_message(
+                    session,
+                    state,
+                    "assistant",
+                    response_text,
+                    truncated=cancelled,
+                    title=default_title(request.message),
+                )
+            except HTTPException:
+                pass  # Deleted while the reply was generated
+            else:
+                await session.commit()
+                conversation_cache.apply(state, "assistant", response_text, *written)
+        if idempotency_key:
+            await idempotency_service.complete(
+                current_user.id,
+                idempotency_key,
+                {
+                    "conversation_id": state.id,
+                    "response": response_text,
+                    "stream_id": stream.id,
+                    "truncated": cancelled,
+                    "finish_reason": completion.finish_reason,
+                    "usage": completion.usage,
+                },
+            )
+        if cancelled:
+            raise asyncio.CancelledError
 
-        await db.commit()
+        await stream.append(finish_frame(completion.finish_reason, completion.usage))
+        await stream.append("[DONE]")
+        await stream.finish()
 
         # Store in memory
         try:
             memory_content = f"User: {request.message}\nAssistant: {response_text}"
-            await qdrant_service.store_memory(current_user.id, memory_content)
+            with timed("memory_store"):
+                await qdrant_service.store_memory(current_user.id, memory_content)
         except Exception:
             pass
 
-        yield f"data: [DONE]\n\n"
+    stream = stream_registry.start(current_user.id, generate)
+    if idempotency_key:
+        await idempotency_service.attach_stream(current_user.id, idempotency_key, stream.id)
+    return EventStreamResponse(stream.follow(), headers={STREAM_ID_HEADER: stream.id})
+
+
+class ChatConnection:
+    """
+    State of one `/chat/ws` connection, kept between turns.
+
+    Holds the authenticated user, the open conversation with its recent-message
+    window and the user's goals text, so a turn only needs the memory search,
+    the LLM call and one write. The window is appended to as turns complete;
+    goals are re-read at most every `chat_ws_goals_ttl_seconds`.
+    """
+
+    def __init__(self, websocket: WebSocket, user: User):
+        self.websocket = websocket
+        self.user = user
+        self.conversation_id: str | None = None
+        self.is_new = True  # the conversation row is only written with the first turn
+        self.title: str | None = None
+        self.history: deque[dict] = deque(maxlen=HISTORY_WINDOW)
+        self.goals_text = ""
+        self.goals_loaded_at: float | None = None
+        self.turn: asyncio.Task | None = None
+        self.generating = False
+        self.closed = False
+        self._background: set[asyncio.Task] = set()
+
+    async def send(self, frame_type: str, **data) -> None:
+        if self.closed:
+            return
+        try:
+            await self.websocket.send_text(dumps({"type": frame_type, **data}))
+        except (WebSocketDisconnect, RuntimeError):
+            self.closed = True
+
+    async def send_error(self, exc: HTTPException) -> None:
+        frame = {"status": exc.status_code, "detail": exc.detail}
+        if exc.headers and "Retry-After" in exc.headers:
+            frame["retry_after"] = int(exc.headers["Retry-After"])
+        await self.send("error", **frame)
+
+    async def handle(self, raw: str) -> None:
+        """Dispatch one client frame; failures are reported as error frames."""
+        try:
+            frame = json.loads(raw)
+            frame_type = frame.get("type") if isinstance(frame, dict) else None
+            if frame_type == "message":
+                content = frame.get("content")
+                if not isinstance(content, str) or not content.strip():
+                    raise HTTPException(status_code=422, detail="Message content is required")
+                if self.busy:
+                    raise HTTPException(status_code=409, detail="A reply is still being generated")
+                self.turn = asyncio.create_task(self.run_turn(content))
+            elif frame_type == "cancel":
+                if self.generating:
+                    self.turn.cancel()
+            elif frame_type == "open":
+                if self.busy:
+                    raise HTTPException(status_code=409, detail="A reply is still being generated")
+                await self.open(frame.get("conversation_id"))
+            else:
+                raise HTTPException(status_code=400, detail="Unknown frame type")
+        except json.JSONDecodeError:
+            await self.send_error(HTTPException(status_code=400, detail="Frames must be JSON"))
+        except HTTPException as exc:
+            await self.send_error(exc)
+
+    @property
+    def busy(self) -> bool:
+        return self.turn is not None and not self.turn.done()
+
+    async def open(self, conversation_id: str | None) -> None:
+        """Switch to an existing conversation, loading its recent messages, or to a new one."""
+        self.history.clear()
+        self.conversation_id, self.is_new, self.title = None, True, None
+        if conversation_id:
+            if not is_uuid(conversation_id):
+                raise HTTPException(status_code=404, detail="Conversation not found")
+            async with read_session(self.user.id) as db:
+                result = await db.execute(
+                    select(Conversation.title).where(
+                        Conversation.id == conversation_id,
+                        Conversation.user_id == self.user.id,
+                    )
+                )
+                conversation = result.one_or_none()
+                if conversation is None:
+                    raise HTTPException(status_code=404, detail="Conversation not found")
+                self.history.extend(await load_history(db, conversation_id))
+            self.conversation_id, self.is_new = conversation_id, False
+            self.title = conversation.title
+        await self.send("opened", conversation_id=self.conversation_id)
+
+    async def load_goals(self) -> str:
+        now = time.monotonic()
+        ttl = settings.chat_ws_goals_ttl_seconds
+        if self.goals_loaded_at is None or now - self.goals_loaded_at > ttl:
+            async with read_session(self.user.id) as db:
+                self.goals_text = await load_goals_text(self.user.id, db)
+            self.goals_loaded_at = now
+        return self.goals_text
+
+    async def run_turn(self, content: str) -> None:
+        """
+        Answer one message: stream the reply as delta frames, then store both in one transaction.
+
+        A cancel (in-band or by disconnecting) while the reply is generated
+        closes the upstream stream and stores what was generated so far as a
+        truncated reply. Cancelled while still queued for an LLM slot, nothing
+        is stored.
+        """
+        sent_at = datetime.now(UTC)
+        self.generating = True
+        try:
+            await check_rate_limit(self.user)
+            slot = await acquire_llm_slot()
+        except HTTPException as exc:
+            self.generating = False
+            await self.send_error(exc)
+            return
+        except asyncio.CancelledError:
+            self.generating = False
+            await self.send("cancelled")
+            return
+
+        if self.conversation_id is None:
+            self.conversation_id = str(uuid4())
+        parts = []
+        cancelled = failed = False
+        completion = None
+        try:
+            goals_text = await self.load_goals()
+            context_text = await load_memory_context(self.user.id, content)
+            system_prompt = SYSTEM_PROMPT.format(goals=goals_text, context=context_text)
+            messages = [
+                {"role": "system", "content": system_prompt},
+                *self.history,
+                {"role": "user", "content": content},
+            ]
+            await self.send("start", conversation_id=self.conversation_id)
+            completion = openrouter_service.chat_stream(messages)
+            async for chunk in merged_chunks(completion):
+                parts.append(chunk)
+                await self.send("delta", content=chunk)
+        except asyncio.CancelledError:
+            cancelled = True
+        except Exception:
+            logger.exception("WebSocket chat turn failed")
+            failed = True
+        finally:
+            slot.release()
+            self.generating = False
+        if completion is not None and not failed:
+            usage_ledger.record(self.user.id, "ws", completion, self.conversation_id)
+
+        # A failed generation keeps the user's message, like POST /chat does
+        reply = "" if failed else "".join(parts)
+        try:
+            await self.store_turn(content, sent_at, reply, truncated=cancelled)
+        except HTTPException as exc:
+            await self.send_error(exc)
+            return
+        if failed:
+            await self.send_error(HTTPException(status_code=502, detail="The model request failed"))
+            return
+        await self.send(
+            "done",
+            conversation_id=self.conversation_id,
+            truncated=cancelled,
+            finish_reason=completion.finish_reason if completion else None,
+            usage=completion.usage if completion else None,
+        )
+
+        if reply and not cancelled:
+            task = asyncio.create_task(self.store_memory(content, reply))
+            self._background.add(task)
+            task.add_done_callback(self._background.discard)
+
+    async def store_turn(
+        self, content: str, sent_at: datetime, reply: str, truncated: bool
+    ) -> None:
+        messages = [("user", content, False, sent_at)]
+        if reply:
+            messages.append(("assistant", reply, truncated, datetime.now(UTC)))
+        async with async_session_maker() as db:
+            if self.is_new:
+                db.add(Conversation(id=self.conversation_id, user_id=self.user.id))
+            for role, message_text, is_truncated, at in messages:
+                result = await db.execute(
+                    Conversation.record_message_update(
+                        self.conversation_id,
+                        self.user.id,
+                        message_text,
+                        at,
+                        title=default_title(content),
+                    )
+                )
+                written = result.one_or_none()
+                if written is None:
+                    # Deleted from another client; later messages start a new conversation
+                    self.history.clear()
+                    self.conversation_id, self.is_new, self.title = None, True, None
+                    raise HTTPException(status_code=404, detail="Conversation not found")
+                db.add(
+                    Message(
+                        conversation_id=self.conversation_id,
+                        role=role,
+                        content=message_text,
+                        truncated=is_truncated,
+                        created_at=at,
+                    )
+                )
+            await record_checkin_response(db, self.user.id)
+            await db.commit()
+            self.title = written.title
+
+        self.is_new = False
+        self.history.append({"role": "user", "content": content})
+        if reply:
+            self.history.append({"role": "assistant", "content": reply})
+
+    async def store_memory(self, content: str, reply: str) -> None:
+        try:
+            with timed("memory_store"):
+                memory_content = f"User: {content}\nAssistant: {reply}"
+                await qdrant_service.store_memory(self.user.id, memory_content)
+        except Exception:
+            pass
+
+    async def close(self) -> None:
+        """The client is gone: cancel a reply still being generated and let the turn store it."""
+        self.closed = True
+        if self.turn is not None:
+            if self.generating:
+                self.turn.cancel()
+            await asyncio.gather(self.turn, return_exceptions=True)
+
+
+@router.websocket("/ws")
+async def chat_socket(
+    websocket: WebSocket, token: str | None = None, conversation_id: str | None = None
+):
+    """
+    Chat over one long-lived connection.
+
+    Authenticates once, from `?token=` or an `Authorization: Bearer` header,
+    and opens `conversation_id` (or a new conversation). Client frames are JSON:
+    `{"type": "message", "content": ...}`, `{"type": "cancel"}` and
+    `{"type": "open", "conversation_id": ...}`. The server answers with
+    `opened`, `start`, `delta` (`content`), `done` (`truncated`), `cancelled`
+    and `error` (`status`, `detail`, `retry_after`) frames.
+    """
+    if token is None:
+        scheme, _, credentials = websocket.headers.get("authorization", "").partition(" ")
+        token = credentials if scheme.lower() == "bearer" else ""
+    async with async_session_maker() as db:
+        try:
+            user = await user_from_token(token, db)
+        except HTTPException as exc:
+            await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=exc.detail)
+            return
 
-    return StreamingResponse(generate(), media_type="text/event-stream")
+    await websocket.accept()
+    connection = ChatConnection(websocket, user)
+    try:
+        try:
+            await connection.open(conversation_id)
+        except HTTPException as exc:
+            await connection.send_error(exc)
+            await connection.open(None)
+        while True:
+            await connection.handle(await websocket.receive_text())
+    except WebSocketDisconnect:
+        pass
+    finally:
+        await connection.close()
 
 
 @router.delete("/conversations/{conversation_id}")
@@ -243,4 +977,5 @@ async def delete_conversation(
 
     await db.delete(conversation)
     await db.commit()
+    conversation_cache.evict(conversation_id)
     return {"message": "Conversation deleted"}
@@ -0,0 +1,33 @@
+from datetime import datetime
+
+from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
+
+from app.api.deps import get_current_user
+from app.models import User
+from app.services.export import export_ndjson, gzip_stream
+
+router = APIRouter(prefix="/export", tags=["export"])
+
+
+@router.get("")
+async def export_data(
+    since: datetime | None = None,
+    compress: bool = False,
+    current_user: User = Depends(get_current_user),
+):
+    """Stream all of the current user's data as NDJSON, optionally gzip-compressed."""
+    stream = export_ndjson(current_user.id, since=since)
+    filename = f"jetaide-export-{current_user.id}.ndjson"
+
+    if compress:
+        return StreamingResponse(
+            gzip_stream(stream),
+            media_type="application/gzip",
+            headers={"Content-Disposition": f'attachment; filename="{filename}.gz"'},
+        )
+    return StreamingResponse(
+        stream,
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -1,23 +1,90 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import select
+from datetime import UTC, datetime
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import func, insert, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.deps import get_current_user
+from app.api.deps import get_current_reader, get_current_user, get_read_db
+from app.api.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    etag_matches,
+    json_page,
+    keyset_before,
+    not_modified,
+    response_columns,
+    weak_etag,
+)
 from app.db import get_db
-from app.models import Goal, ProgressEntry, User
-from app.schemas import GoalCreate, GoalResponse, GoalUpdate, ProgressCreate
+from app.models import DailyLog, Goal, ProgressEntry, User
+from app.schemas import (
+    BatchItemResult,
+    BatchResult,
+    DailyLogCreate,
+    GoalBatchCreate,
+    GoalCreate,
+    GoalResponse,
+    GoalStatsResponse,
+    GoalUpdate,
+    ProgressBatchCreate,
+    ProgressCreate,
+    ProgressResponse,
+)
+from app.services import apply_progress_entry, conversation_cache, goal_analytics_service
+from app.services.streaks import (
+    effective_streak,
+    effective_streak_column,
+    local_date,
+    repair_goal_aggregates,
+)
 
 router = APIRouter(prefix="/goals", tags=["goals"])
 
 
+def goal_response(goal: Goal, user: User) -> GoalResponse:
+    """`goal` as the API returns it, with its streak as of the user's local today."""
+    response = GoalResponse.model_validate(goal)
+    response.current_streak = effective_streak(goal, local_date(datetime.now(UTC), user.timezone))
+    return response
+
+
 @router.get("", response_model=list[GoalResponse])
 async def list_goals(
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db),
+    request: Request,
+    response: Response,
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    current_user: User = Depends(get_current_reader),
+    db: AsyncSession = Depends(get_read_db),
 ):
-    """List all goals for the current user."""
-    result = await db.execute(select(Goal).where(Goal.user_id == current_user.id))
-    return result.scalars().all()
+    """List goals for the current user, newest first, one page at a time."""
+    result = await db.execute(
+        select(func.count(), func.max(Goal.updated_at)).where(Goal.user_id == current_user.id)
+    )
+    count, last_updated = result.one()
+    # Streaks lapse at the user's midnight without the rows changing
+    today = local_date(datetime.now(UTC), current_user.timezone)
+    etag = weak_etag(count, last_updated, today, cursor, limit)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    query = (
+        select(
+            *response_columns(
+                Goal, GoalResponse, Goal.created_at,
+                current_streak=effective_streak_column(today),
+            )
+        )
+        .where(Goal.user_id == current_user.id)
+        .order_by(Goal.created_at.desc(), Goal.id.desc())
+        .limit(limit + 1)
+    )
+    if (after := keyset_before(Goal.created_at, Goal.id, cursor)) is not None:
+        query = query.where(after)
+
+    result = await db.execute(query)
+    return json_page(response, list(result.all()), limit, etag, GoalResponse)
 
 
 @router.post("", response_model=GoalResponse)
@@ -35,15 +102,129 @@ async def create_goal(
     )
     db.add(goal)
     await db.commit()
+    conversation_cache.invalidate_goals(current_user.id)
     await db.refresh(goal)
     return goal
 
 
+@router.post("/batch", response_model=BatchResult)
+async def create_goals_batch(
+    batch: GoalBatchCreate,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Create many goals in one multi-row INSERT (e.g. onboarding imports)."""
+    rows = [
+        {
+            "user_id": current_user.id,
+            "title": goal.title,
+            "description": goal.description,
+            "category": goal.category,
+        }
+        for goal in batch.goals
+    ]
+    table = Goal.__table__
+    result = await db.execute(
+        insert(table).returning(table.c.id, table.c.created_at, sort_by_parameter_order=True), rows
+    )
+    results = [
+        BatchItemResult(index=i, id=goal_id, created_at=created_at)
+        for i, (goal_id, created_at) in enumerate(result.all())
+    ]
+    await db.commit()
+    conversation_cache.invalidate_goals(current_user.id)
+    return BatchResult(created=len(results), failed=0, results=results)
+
+
+@router.post("/progress/batch", response_model=BatchResult)
+async def add_progress_batch(
+    batch: ProgressBatchCreate,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Add progress entries across many goals at once (e.g. offline sync).
+
+    Ownership of every referenced goal is checked in one query, entries go in
+    with one multi-row INSERT ... RETURNING, and everything commits together.
+    Entries for unknown goals are reported per item and skipped.
+    """
+
+    def as_uuid(value: str) -> str | None:
+        try:
+            return str(UUID(value))
+        except ValueError:
+            return None
+
+    goal_ids = [as_uuid(entry.goal_id) for entry in batch.entries]
+
+    # Lock the goals (in a stable order, against deadlocks) so streaks fold in one at a time
+    result = await db.execute(
+        select(Goal)
+        .where(Goal.id.in_({g for g in goal_ids if g}), Goal.user_id == current_user.id)
+        .order_by(Goal.id)
+        .with_for_update()
+    )
+    goals = {goal.id: goal for goal in result.scalars()}
+
+    now = datetime.now(UTC)
+    results: list[BatchItemResult] = [BatchItemResult(index=i) for i in range(len(batch.entries))]
+    accepted: list[int] = []
+    rows = []
+    for i, (entry, goal_id) in enumerate(zip(batch.entries, goal_ids, strict=True)):
+        if goal_id not in goals:
+            results[i].error = "Goal not found"
+            continue
+        accepted.append(i)
+        rows.append(
+            {
+                "goal_id": goal_id,
+                "note": entry.note,
+                "mood": entry.mood,
+                "created_at": entry.created_at or now,
+            }
+        )
+
+    if rows:
+        # Core insert: the ORM bulk path would split rows by which fields are None
+        table = ProgressEntry.__table__
+        result = await db.execute(
+            insert(table).returning(table.c.id, table.c.created_at, sort_by_parameter_order=True),
+            rows,
+        )
+        for i, (entry_id, created_at) in zip(accepted, result.all(), strict=True):
+            results[i].id = entry_id
+            results[i].created_at = created_at
+
+        # Fold entries into streaks oldest first; a goal that got entries older than
+        # its last one can't be folded incrementally and is recomputed instead
+        to_repair: set[str] = set()
+        for i in sorted(accepted, key=lambda i: results[i].created_at):
+            goal = goals[goal_ids[i]]
+            created_at = results[i].created_at
+            last = (goal.metrics or {}).get("last_entry_date")
+            day = local_date(created_at, current_user.timezone).isoformat()
+            if goal.id in to_repair or (last and day < last):
+                to_repair.add(goal.id)
+                continue
+            apply_progress_entry(goal, batch.entries[i].mood, current_user.timezone, now=created_at)
+        if to_repair:
+            await db.flush()
+            await repair_goal_aggregates(db, sorted(to_repair))
+
+    await db.commit()
+    return BatchResult(
+        created=len(accepted),
+        failed=len(batch.entries) - len(accepted),
+        results=results,
+    )
+
+
 @router.get("/{goal_id}", response_model=GoalResponse)
 async def get_goal(
     goal_id: str,
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_reader),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """Get a specific goal."""
     result = await db.execute(
@@ -52,7 +233,7 @@ async def get_goal(
     goal = result.scalar_one_or_none()
     if not goal:
         raise HTTPException(status_code=404, detail="Goal not found")
-    return goal
+    return goal_response(goal, current_user)
 
 
 @router.patch("/{goal_id}", response_model=GoalResponse)
@@ -75,8 +256,9 @@ async def update_goal(
         setattr(goal, key, value)
 
     await db.commit()
+    conversation_cache.invalidate_goals(current_user.id)
     await db.refresh(goal)
-    return goal
+    return goal_response(goal, current_user)
 
 
 @router.delete("/{goal_id}")
@@ -95,6 +277,7 @@ async def delete_goal(
 
     await db.delete(goal)
     await db.commit()
+    conversation_cache.invalidate_goals(current_user.id)
     return {"message": "Goal deleted"}
 
 
@@ -106,8 +289,9 @@ async def add_progress(
     db: AsyncSession = Depends(get_db),
 ):
     """Add a progress entry to a goal."""
+    # Lock the goal row so concurrent entries fold into the streak one at a time
     result = await db.execute(
-        select(Goal).where(Goal.id == goal_id, Goal.user_id == current_user.id)
+        select(Goal).where(Goal.id == goal_id, Goal.user_id == current_user.id).with_for_update()
     )
     goal = result.scalar_one_or_none()
     if not goal:
@@ -119,27 +303,91 @@ async def add_progress(
         mood=progress_data.mood,
     )
     db.add(progress)
+    apply_progress_entry(goal, progress_data.mood, current_user.timezone)
     await db.commit()
     await db.refresh(progress)
     return {"id": progress.id, "note": progress.note, "mood": progress.mood}
 
 
-@router.get("/{goal_id}/progress")
+@router.get("/{goal_id}/progress", response_model=list[ProgressResponse])
 async def list_progress(
     goal_id: str,
+    request: Request,
+    response: Response,
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    current_user: User = Depends(get_current_reader),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """List progress entries for a goal, newest first, one page at a time."""
+    # Ownership check and ETag inputs in one query: no row means not the user's goal
+    result = await db.execute(
+        select(func.count(ProgressEntry.id), func.max(ProgressEntry.created_at))
+        .select_from(Goal)
+        .outerjoin(ProgressEntry, ProgressEntry.goal_id == Goal.id)
+        .where(Goal.id == goal_id, Goal.user_id == current_user.id)
+        .group_by(Goal.id)
+    )
+    row = result.one_or_none()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Goal not found")
+
+    etag = weak_etag(*row, cursor, limit)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    query = (
+        select(*response_columns(ProgressEntry, ProgressResponse))
+        .join(Goal, Goal.id == ProgressEntry.goal_id)
+        .where(Goal.id == goal_id, Goal.user_id == current_user.id)
+        .order_by(ProgressEntry.created_at.desc(), ProgressEntry.id.desc())
+        .limit(limit + 1)
+    )
+    if (after := keyset_before(ProgressEntry.created_at, ProgressEntry.id, cursor)) is not None:
+        query = query.where(after)
+
+    result = await db.execute(query)
+    return json_page(response, list(result.all()), limit, etag, ProgressResponse)
+
+
+@router.post("/{goal_id}/logs")
+async def add_daily_log(
+    goal_id: str,
+    log_data: DailyLogCreate,
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    """List all progress entries for a goal."""
+    """Add a daily log to a goal."""
     result = await db.execute(
-        select(Goal).where(Goal.id == goal_id, Goal.user_id == current_user.id)
+        select(Goal.id).where(Goal.id == goal_id, Goal.user_id == current_user.id)
     )
-    goal = result.scalar_one_or_none()
-    if not goal:
+    if result.scalar_one_or_none() is None:
         raise HTTPException(status_code=404, detail="Goal not found")
 
-    result = await db.execute(
-        select(ProgressEntry).where(ProgressEntry.goal_id == goal_id).order_by(ProgressEntry.created_at.desc())
+    log = DailyLog(
+        goal_id=goal_id,
+        user_id=current_user.id,
+        **log_data.model_dump(exclude={"log_date"}),
+        log_date=log_data.log_date or local_date(datetime.now(UTC), current_user.timezone),
+    )
+    db.add(log)
+    await db.commit()
+    goal_analytics_service.invalidate(goal_id)
+    return {"id": log.id, "log_date": log.log_date}
+
+
+@router.get("/{goal_id}/stats", response_model=GoalStatsResponse)
+async def get_goal_stats(
+    goal_id: str,
+    days: int = Query(365, ge=1, le=3650),
+    window: int = Query(7, ge=1, le=90),
+    current_user: User = Depends(get_current_reader),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Get trend statistics computed from a goal's daily logs."""
+    stats = await goal_analytics_service.get_goal_stats(
+        db, goal_id, current_user.id, days=days, window=window
     )
-    entries = result.scalars().all()
-    return [{"id": e.id, "note": e.note, "mood": e.mood, "created_at": e.created_at} for e in entries]
+    if stats is None:
+        raise HTTPException(status_code=404, detail="Goal not found")
+    return stats
@@ -0,0 +1,92 @@
+import asyncio
+from collections.abc import AsyncIterable, AsyncIterator
+
+import anyio
+from starlette.responses import StreamingResponse
+
+_END = object()
+
+
+class EventStreamResponse(StreamingResponse):
+    """
+    text/event-stream response that stops iterating as soon as the client disconnects.
+
+    Starlette only notices a gone client on its next write under newer ASGI
+    servers; watching for `http.disconnect` instead closes the body iterator
+    right away, even while it is idle waiting for the next frame.
+    """
+
+    media_type = "text/event-stream"
+
+    async def __call__(self, scope, receive, send):
+        async with anyio.create_task_group() as task_group:
+
+            async def stream() -> None:
+                try:
+                    await self.stream_response(send)
+                except OSError:
+                    pass
+                task_group.cancel_scope.cancel()
+
+            task_group.start_soon(stream)
+            await self.listen_for_disconnect(receive)
+            task_group.cancel_scope.cancel()
+
+
+async def coalesce(
+    chunks: AsyncIterable[str], max_delay: float, max_size: int
+) -> AsyncIterator[str]:
+    """
+    Merge small text chunks so each frame carries more than one token.
+
+    A merged chunk is yielded once it reaches `max_size` characters or its
+    oldest part has waited `max_delay` seconds; the very first chunk goes out
+    at once so time to first token is unchanged. `chunks` is consumed by its
+    own task, so text already received is flushed on time even while the
+    upstream stalls.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def produce() -> None:
+        try:
+            async for chunk in chunks:
+                queue.put_nowait(chunk)
+        except Exception as exc:
+            queue.put_nowait(exc)
+        else:
+            queue.put_nowait(_END)
+
+    loop = asyncio.get_running_loop()
+    producer = asyncio.create_task(produce())
+    buffer: list[str] = []
+    size = 0
+    deadline = 0.0
+    first = True
+    try:
+        while True:
+            item = None
+            timeout = deadline - loop.time() if buffer else None
+            if timeout is None or timeout > 0:
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout)
+                except TimeoutError:
+                    pass
+            if isinstance(item, str):
+                if not buffer:
+                    deadline = loop.time() + (0 if first else max_delay)
+                    first = False
+                buffer.append(item)
+                size += len(item)
+                if size < max_size and loop.time() < deadline:
+                    continue
+            if buffer:
+                yield "".join(buffer)
+                buffer.clear()
+                size = 0
+            if item is _END:
+                return
+            if isinstance(item, Exception):
+                raise item
+    finally:
+        producer.cancel()
+        await asyncio.gather(producer, return_exceptions=True)
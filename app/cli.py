@@ -0,0 +1,236 @@
+"""
+Command line entry point: `jetaide serve` (or `python -m app.cli serve`).
+
+Runs the API under uvicorn in one or more worker processes. With several
+workers, a supervisor binds the listening socket once and forks the workers,
+which share it and accept connections from it. It restarts workers that die
+and, on SIGTERM or SIGINT, lets them drain before they exit.
+"""
+import argparse
+import gc
+import logging
+import os
+import signal
+import socket
+import time
+
+import uvicorn
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+APP = "app.main:app"
+LOOPS = ("auto", "asyncio", "uvloop")
+HTTP_PARSERS = ("auto", "h11", "httptools")
+# After the drain deadline, time left for the lifespan shutdown (usage flush, closing pools)
+SHUTDOWN_MARGIN = 10.0
+# A worker that dies sooner than this after starting is restarted after a pause
+MIN_WORKER_UPTIME = 5.0
+RESTART_DELAY = 1.0
+
+
+class Server(uvicorn.Server):
+    """uvicorn's server, with one drain deadline for open connections and for chat generations."""
+
+    async def shutdown(self, sockets: list[socket.socket] | None = None) -> None:
+        from app.services import stream_registry
+
+        stream_registry.drain_deadline = time.monotonic() + self.config.timeout_graceful_shutdown
+        await super().shutdown(sockets)
+
+
+class Supervisor:
+    """Forks `workers` processes serving `sock` and keeps that many running until told to stop."""
+
+    def __init__(self, config: uvicorn.Config, sock: socket.socket, workers: int):
+        self.config = config
+        self.sock = sock
+        self.workers = workers
+        self.children: dict[int, float] = {}  # pid -> started at
+        self.stop_signals = 0
+
+    def run(self) -> None:
+        signal.signal(signal.SIGTERM, self._on_signal)
+        signal.signal(signal.SIGINT, self._on_signal)
+        logger.info("Supervisor %d starting %d workers", os.getpid(), self.workers)
+        for _ in range(self.workers):
+            self._spawn()
+        while not self.stop_signals:
+            self._reap(restart=True)
+            time.sleep(0.2)
+        self._stop()
+
+    def _spawn(self) -> None:
+        pid = os.fork()
+        if pid:
+            self.children[pid] = time.monotonic()
+            return
+        # Worker: uvicorn installs its own SIGTERM/SIGINT handlers
+        code = 1
+        try:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            gc.enable()
+            server = Server(self.config)
+            server.run(sockets=[self.sock])
+            code = 0 if server.started else 3
+        except BaseException:
+            logger.exception("Worker %d failed", os.getpid())
+        finally:
+            os._exit(code)
+
+    def _on_signal(self, sig: int, frame) -> None:
+        self.stop_signals += 1
+        if self.stop_signals == 1:
+            logger.info("Draining workers (up to %.0f s)", self.config.timeout_graceful_shutdown)
+            self._signal_children(signal.SIGTERM)
+        elif sig == signal.SIGINT:
+            # A second Ctrl+C: workers skip the rest of the drain
+            self._signal_children(signal.SIGINT)
+
+    def _signal_children(self, sig: int) -> None:
+        for pid in list(self.children):
+            try:
+                os.kill(pid, sig)
+            except ProcessLookupError:
+                pass
+
+    def _reap(self, restart: bool) -> None:
+        while self.children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                self.children.clear()
+                return
+            if not pid:
+                return
+            started = self.children.pop(pid, None)
+            if started is None or not restart or self.stop_signals:
+                continue
+            code = os.waitstatus_to_exitcode(status)
+            logger.warning("Worker %d exited with status %d, restarting it", pid, code)
+            if time.monotonic() - started < MIN_WORKER_UPTIME:
+                time.sleep(RESTART_DELAY)
+            self._spawn()
+
+    def _stop(self) -> None:
+        deadline = time.monotonic() + self.config.timeout_graceful_shutdown + SHUTDOWN_MARGIN
+        while self.children and time.monotonic() < deadline:
+            self._reap(restart=False)
+            time.sleep(0.1)
+        for pid in self.children:
+            logger.warning("Worker %d did not exit in time, killing it", pid)
+        self._signal_children(signal.SIGKILL)
+        while self.children:
+            self._reap(restart=False)
+            time.sleep(0.05)
+        logger.info("Supervisor %d stopped", os.getpid())
+
+
+def default_workers() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def per_worker_state(workers: int) -> list[str]:
+    """What stops behaving as one service when `workers` processes each keep their own copy."""
+    if workers == 1:
+        return []
+    caveats = ["Last-Event-ID resumes only find streams started on the same worker"]
+    if not settings.rate_limit_redis_url:
+        caveats.append(
+            f"chat rate limits are per worker, so a user gets up to {workers}x theirs"
+            " (set RATE_LIMIT_REDIS_URL to share them)"
+        )
+    if settings.database_replica_url:
+        caveats.append("read-your-writes only covers writes made through the same worker")
+    return caveats
+
+
+def serve(args: argparse.Namespace) -> None:
+    workers = args.workers or default_workers()
+    for caveat in per_worker_state(workers):
+        logger.warning("With %d workers, %s", workers, caveat)
+    config = uvicorn.Config(
+        APP,
+        host=args.host,
+        port=args.port,
+        loop=args.loop,
+        http=args.http,
+        backlog=args.backlog,
+        timeout_keep_alive=args.keep_alive,
+        timeout_graceful_shutdown=args.drain,
+        access_log=args.access_log,
+        log_level=args.log_level,
+    )
+    if workers == 1:
+        Server(config).run()
+        return
+
+    sock = config.bind_socket()
+    if args.preload:
+        # Workers inherit the imported app; freezing keeps the GC from touching (copying) its pages
+        config.load()
+        gc.disable()
+        gc.freeze()
+    Supervisor(config, sock, workers).run()
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="jetaide", description="JetAide API server.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = commands.add_parser(
+        "serve", help="Run the API under uvicorn with a graceful drain"
+    )
+    serve_parser.add_argument("--host", default=settings.serve_host)
+    serve_parser.add_argument("--port", type=int, default=settings.serve_port)
+    serve_parser.add_argument(
+        "--workers",
+        type=int,
+        default=settings.serve_workers,
+        help="Worker processes; 0 = one per CPU",
+    )
+    serve_parser.add_argument(
+        "--loop", choices=LOOPS, default=settings.serve_loop, help="Event loop"
+    )
+    serve_parser.add_argument(
+        "--http", choices=HTTP_PARSERS, default=settings.serve_http, help="HTTP parser"
+    )
+    serve_parser.add_argument(
+        "--preload",
+        action=argparse.BooleanOptionalAction,
+        default=settings.serve_preload,
+        help="Import the app before forking workers, sharing its memory copy-on-write",
+    )
+    serve_parser.add_argument("--backlog", type=int, default=settings.serve_backlog)
+    serve_parser.add_argument(
+        "--keep-alive",
+        type=float,
+        default=settings.serve_keep_alive_seconds,
+        help="Idle keep-alive seconds",
+    )
+    serve_parser.add_argument(
+        "--drain",
+        type=float,
+        default=settings.shutdown_drain_seconds,
+        help="Seconds in-flight requests and streams get to finish on shutdown",
+    )
+    serve_parser.add_argument("--access-log", action="store_true", help="Log every request")
+    serve_parser.add_argument(
+        "--log-level", choices=("debug", "info", "warning", "error"), default="info"
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=args.log_level.upper(), format="%(asctime)s %(levelname)s [%(name)s] %(message)s"
+    )
+    if args.command == "serve":
+        serve(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+import time
+from bisect import bisect_left
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Upper bounds in seconds, from fast DB lookups up to long LLM generations
+DEFAULT_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0
+)
+
+# Stage timings of the current request, read by MetricsMiddleware for Server-Timing
+_request_timings: ContextVar[list[tuple[str, float]] | None] = ContextVar(
+    "request_timings", default=None
+)
+
+
+def _labels(names: tuple[str, ...], values: tuple[str, ...]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{v}"' for n, v in zip(names, values, strict=True))
+    return "{" + pairs + "}"
+
+
+class Histogram:
+    """Cumulative-bucket histogram rendered in the Prometheus text format."""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self.buckets = buckets
+        # label values -> [per-bucket counts (+Inf last), sum]
+        self._series: dict[tuple[str, ...], list] = {}
+        REGISTRY.append(self)
+
+    def observe(self, value: float, *label_values: str) -> None:
+        series = self._series.get(label_values)
+        if series is None:
+            series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for label_values, (counts, total) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts, strict=True):
+                cumulative += count
+                labels = _labels((*self.label_names, "le"), (*label_values, str(bound)))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _labels(self.label_names, label_values)
+            lines.append(f"{self.name}_sum{labels} {total}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Counter:
+    """Monotonic counter rendered in the Prometheus text format."""
+
+    def __init__(self, name: str, documentation: str, label_names: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self._values: dict[tuple[str, ...], float] = {}
+        REGISTRY.append(self)
+
+    def inc(self, *label_values: str, amount: float = 1.0) -> None:
+        self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for label_values, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_labels(self.label_names, label_values)} {value}")
+        return lines
+
+
+class Gauge:
+    """Point-in-time value read from a callback when metrics are rendered."""
+
+    def __init__(self, name: str, documentation: str, read):
+        self.name = name
+        self.documentation = documentation
+        self.read = read
+        REGISTRY.append(self)
+
+    def render(self) -> list[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} gauge",
+            f"{self.name} {self.read()}",
+        ]
+
+
+REGISTRY: list[Histogram | Counter | Gauge] = []
+
+STAGE_DURATION = Histogram(
+    "jetaide_stage_duration_seconds",
+    "Duration of hot-path stages (auth, queries, embedding, vector search, LLM).",
+    ("stage",),
+)
+REQUEST_DURATION = Histogram(
+    "jetaide_http_request_duration_seconds",
+    "Duration of HTTP requests until the response starts.",
+    ("method", "route", "status"),
+)
+
+
+def record_stage(stage: str, seconds: float) -> None:
+    """Record a stage duration in the histogram and in the current request's timings."""
+    STAGE_DURATION.observe(seconds, stage)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings.append((stage, seconds))
+
+
+@contextmanager
+def timed(stage: str) -> Iterator[None]:
+    """Time the enclosed block as `stage`."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - start)
+
+
+def render_metrics() -> str:
+    lines: list[str] = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def server_timing(timings: list[tuple[str, float]], total: float) -> str:
+    """Format stage timings as a Server-Timing header value (durations in ms)."""
+    merged: dict[str, float] = {}
+    for stage, seconds in timings:
+        merged[stage] = merged.get(stage, 0.0) + seconds
+    parts = [f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in merged.items()]
+    parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording request durations and adding Server-Timing headers.
+
+    Streaming (text/event-stream) responses get no Server-Timing header since most
+    of their stages finish after the headers are sent; their stages still reach
+    the histograms.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings: list[tuple[str, float]] = []
+        token = _request_timings.set(timings)
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                elapsed = time.perf_counter() - start
+                route = scope.get("route")
+                REQUEST_DURATION.observe(
+                    elapsed,
+                    scope["method"],
+                    route.path if route is not None else "unmatched",
+                    str(message["status"]),
+                )
+                headers = message.get("headers", [])
+                streaming = any(
+                    k == b"content-type" and v.startswith(b"text/event-stream") for k, v in headers
+                )
+                if not streaming:
+                    timing = server_timing(timings, elapsed).encode()
+                    message["headers"] = [*headers, (b"server-timing", timing)]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_timings.reset(token)
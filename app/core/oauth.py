@@ -1,24 +1,32 @@
-from authlib.integrations.starlette_client import OAuth
+from functools import cache
 
 from app.core.config import settings
 
-oauth = OAuth()
 
-# Google OAuth
-oauth.register(
-    name="google",
-    client_id=settings.google_client_id,
-    client_secret=settings.google_client_secret,
-    server_metadata_url="https://accounts.google.com/.well-known/openid-configuration",
-    client_kwargs={"scope": "openid email profile"},
-)
+@cache
+def get_oauth():
+    """OAuth registry, built on first use so authlib stays out of the import path."""
+    from authlib.integrations.starlette_client import OAuth
 
-# Facebook OAuth
-oauth.register(
-    name="facebook",
-    client_id=settings.facebook_client_id,
-    client_secret=settings.facebook_client_secret,
-    authorize_url="https://www.facebook.com/v18.0/dialog/oauth",
-    access_token_url="https://graph.facebook.com/v18.0/oauth/access_token",
-    client_kwargs={"scope": "email public_profile"},
-)
+    oauth = OAuth()
+
+    # Google OAuth
+    oauth.register(
+        name="google",
+        client_id=settings.google_client_id,
+        client_secret=settings.google_client_secret,
+        server_metadata_url="https://accounts.google.com/.well-known/openid-configuration",
+        client_kwargs={"scope": "openid email profile"},
+    )
+
+    # Facebook OAuth
+    oauth.register(
+        name="facebook",
+        client_id=settings.facebook_client_id,
+        client_secret=settings.facebook_client_secret,
+        authorize_url="https://www.facebook.com/v18.0/dialog/oauth",
+        access_token_url="https://graph.facebook.com/v18.0/oauth/access_token",
+        client_kwargs={"scope": "email public_profile"},
+    )
+
+    return oauth
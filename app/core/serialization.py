@@ -0,0 +1,62 @@
+"""
+JSON encoding for hot paths: orjson when installed (the `speedups` extra), else the stdlib.
+
+Both backends produce compact output; orjson is several times faster at
+decoding upstream stream chunks and encoding response frames. Datetimes are
+written the way Pydantic writes them (ISO 8601, "Z" for UTC), so rows
+serialized here match what a response model would have produced.
+"""
+
+import json
+from datetime import UTC, date, datetime
+
+from starlette.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+if orjson is not None:
+
+    def loads(data: str | bytes):
+        return orjson.loads(data)
+
+    def dumps_bytes(obj) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_UTC_Z)
+
+    def dumps(obj) -> str:
+        return dumps_bytes(obj).decode()
+
+else:
+
+    def _default(obj):
+        if isinstance(obj, datetime):
+            text = obj.isoformat()
+            return text[:-6] + "Z" if obj.tzinfo is UTC else text
+        if isinstance(obj, date):
+            return obj.isoformat()
+        raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+    def loads(data: str | bytes):
+        return json.loads(data)
+
+    def dumps(obj) -> str:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=_default)
+
+    def dumps_bytes(obj) -> bytes:
+        return dumps(obj).encode()
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response for content that is already plain data (dicts, lists, row values).
+
+    Routes with a response model don't need it: FastAPI already serializes
+    those to bytes through Pydantic, and only while the app keeps its default
+    response class, so this is used per response rather than app-wide.
+    """
+
+    def render(self, content) -> bytes:
+        return dumps_bytes(content)
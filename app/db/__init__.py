@@ -1,3 +1,15 @@
-from app.db.database import Base, async_session_maker, engine, get_db
+from app.db.database import Base, async_session_maker, engine, get_db, query_profiler, warm_pool
+from app.db.replica import current_user_id, read_session, replica_engine, replica_router
 
-__all__ = ["Base", "engine", "async_session_maker", "get_db"]
+__all__ = [
+    "Base",
+    "engine",
+    "async_session_maker",
+    "get_db",
+    "query_profiler",
+    "warm_pool",
+    "current_user_id",
+    "read_session",
+    "replica_engine",
+    "replica_router",
+]
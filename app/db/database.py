@@ -1,11 +1,42 @@
+import asyncio
+
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase
 
 from app.core.config import settings
+from app.db.profiling import QueryProfiler
 
-engine = create_async_engine(settings.database_url, echo=False)
+engine = create_async_engine(
+    settings.database_url,
+    echo=False,
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
+)
 async_session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
+query_profiler = QueryProfiler(
+    slow_ms=settings.db_slow_query_ms,
+    n_plus_one_threshold=settings.db_n_plus_one_threshold,
+)
+if settings.db_profiling:
+    query_profiler.install(engine)
+
+
+async def warm_pool() -> None:
+    """Open `db_pool_size` connections at once, so they sit in the pool before traffic arrives."""
+    results = await asyncio.gather(
+        *(engine.connect() for _ in range(settings.db_pool_size)), return_exceptions=True
+    )
+    connections = [c for c in results if not isinstance(c, BaseException)]
+    try:
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        await connections[0].execute(text("SELECT 1"))
+    finally:
+        await asyncio.gather(*(c.close() for c in connections))
+
 
 class Base(DeclarativeBase):
     pass
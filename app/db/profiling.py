@@ -0,0 +1,215 @@
+import logging
+import re
+import time
+from collections import deque
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+logger = logging.getLogger(__name__)
+
+# "IN ($1, $2, $3)" from expanding parameters collapses to one shape
+_PARAM_LIST = re.compile(r"\((?:\s*(?:\$\d+|%\(\w+\)s|\?)\s*,)+\s*(?:\$\d+|%\(\w+\)s|\?)\s*\)")
+_PARAM = re.compile(r"\$\d+|%\(\w+\)s")
+_WHITESPACE = re.compile(r"\s+")
+
+# Per-request statement counts, set by QueryProfilingMiddleware
+_request_counts: ContextVar[dict[str, int] | None] = ContextVar(
+    "request_query_counts", default=None
+)
+
+
+def normalize_statement(statement: str) -> str:
+    """Collapse whitespace, bind placeholders and expanded IN lists so equal queries match."""
+    statement = _WHITESPACE.sub(" ", statement).strip()
+    statement = _PARAM_LIST.sub("(?, ...)", statement)
+    return _PARAM.sub("?", statement)
+
+
+def parameter_shape(parameters) -> str:
+    """Describe bound parameters by type (and length for sequences) without their values."""
+    if isinstance(parameters, dict):
+        parameters = list(parameters.values())
+    if not isinstance(parameters, (list, tuple)):
+        return type(parameters).__name__
+    shapes = []
+    for value in parameters:
+        if isinstance(value, (list, tuple)):
+            shapes.append(f"{type(value).__name__}[{len(value)}]")
+        else:
+            shapes.append(type(value).__name__)
+    return "(" + ", ".join(shapes) + ")"
+
+
+@dataclass
+class StatementStats:
+    count: int = 0
+    total: float = 0.0
+    samples: deque = field(default_factory=lambda: deque(maxlen=512))
+
+
+@dataclass
+class QueryCount:
+    """Statements executed while a `count_queries()` block was active."""
+
+    statements: dict[str, int] = field(default_factory=dict)
+
+    @property
+    def total(self) -> int:
+        return sum(self.statements.values())
+
+    def record(self, statement: str) -> None:
+        self.statements[statement] = self.statements.get(statement, 0) + 1
+
+
+class QueryProfiler:
+    """Aggregates SQL statement timings from engine cursor events."""
+
+    MAX_STATEMENTS = 2000
+    MAX_N_PLUS_ONE = 500
+
+    def __init__(self, slow_ms: float = 250.0, n_plus_one_threshold: int = 10):
+        self.slow_ms = slow_ms
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self._stats: dict[str, StatementStats] = {}
+        self._normalized: dict[str, str] = {}
+        self._counters: list[QueryCount] = []
+        # (route, statement) -> [requests affected, worst repeat count]
+        self._n_plus_one: dict[tuple[str, str], list[int]] = {}
+        self._installed: set[int] = set()
+
+    def install(self, engine: AsyncEngine) -> None:
+        """Attach the cursor event listeners to an engine (idempotent)."""
+        sync_engine = engine.sync_engine
+        if id(sync_engine) in self._installed:
+            return
+        event.listen(sync_engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", self._after_cursor_execute)
+        self._installed.add(id(sync_engine))
+
+    def _normalize(self, statement: str) -> str:
+        normalized = self._normalized.get(statement)
+        if normalized is None:
+            normalized = normalize_statement(statement)
+            if len(self._normalized) < self.MAX_STATEMENTS * 4:
+                self._normalized[statement] = normalized
+        return normalized
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start_time"].pop()
+        normalized = self._normalize(statement)
+
+        stats = self._stats.get(normalized)
+        if stats is None and len(self._stats) < self.MAX_STATEMENTS:
+            stats = self._stats[normalized] = StatementStats()
+        # Past MAX_STATEMENTS new shapes go untimed, but are still logged and counted below
+        if stats is not None:
+            stats.count += 1
+            stats.total += elapsed
+            stats.samples.append(elapsed)
+
+        if elapsed * 1000 >= self.slow_ms:
+            logger.warning(
+                "Slow query (%.1f ms)%s params=%s: %s",
+                elapsed * 1000,
+                " executemany" if executemany else "",
+                parameter_shape(parameters[0] if executemany and parameters else parameters),
+                normalized,
+            )
+
+        request_counts = _request_counts.get()
+        if request_counts is not None:
+            request_counts[normalized] = request_counts.get(normalized, 0) + 1
+        for counter in self._counters:
+            counter.record(normalized)
+
+    def check_request(self, route: str, counts: dict[str, int]) -> None:
+        """Flag statements repeated at least `n_plus_one_threshold` times in one request."""
+        for statement, count in counts.items():
+            if count < self.n_plus_one_threshold:
+                continue
+            logger.warning("Possible N+1 on %s: %d x %s", route, count, statement)
+            key = (route, statement)
+            entry = self._n_plus_one.get(key)
+            if entry is None:
+                if len(self._n_plus_one) >= self.MAX_N_PLUS_ONE:
+                    continue
+                entry = self._n_plus_one[key] = [0, 0]
+            entry[0] += 1
+            entry[1] = max(entry[1], count)
+
+    def snapshot(self, limit: int = 50) -> dict:
+        """Hottest statements by total time, plus suspected N+1 patterns."""
+        statements = []
+        hottest = sorted(self._stats.items(), key=lambda item: item[1].total, reverse=True)
+        for statement, stats in hottest[:limit]:
+            samples = sorted(stats.samples)
+            statements.append(
+                {
+                    "statement": statement,
+                    "count": stats.count,
+                    "total_ms": round(stats.total * 1000, 2),
+                    "mean_ms": round(stats.total / stats.count * 1000, 3),
+                    "p50_ms": round(samples[len(samples) // 2] * 1000, 3),
+                    "p99_ms": round(
+                        samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1000, 3
+                    ),
+                }
+            )
+        n_plus_one = [
+            {"route": route, "statement": statement, "requests": requests, "max_repeats": repeats}
+            for (route, statement), (requests, repeats) in sorted(
+                self._n_plus_one.items(), key=lambda item: item[1][0], reverse=True
+            )
+        ]
+        return {
+            "slow_query_ms": self.slow_ms,
+            "n_plus_one_threshold": self.n_plus_one_threshold,
+            "statements": statements,
+            "n_plus_one": n_plus_one,
+        }
+
+    def reset(self) -> None:
+        self._stats.clear()
+        self._n_plus_one.clear()
+
+    @contextmanager
+    def count_queries(self) -> Iterator[QueryCount]:
+        """Count every statement executed while the block is active (e.g. in tests)."""
+        counter = QueryCount()
+        self._counters.append(counter)
+        try:
+            yield counter
+        finally:
+            self._counters.remove(counter)
+
+
+class QueryProfilingMiddleware:
+    """ASGI middleware tracking statements per request to detect N+1 patterns."""
+
+    def __init__(self, app, profiler: QueryProfiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        counts: dict[str, int] = {}
+        token = _request_counts.set(counts)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _request_counts.reset(token)
+            route = scope.get("route")
+            self.profiler.check_request(
+                f"{scope['method']} {route.path if route is not None else scope['path']}", counts
+            )
@@ -0,0 +1,20 @@
+"""
+Pytest fixtures for asserting SQL query counts.
+
+Enable in a conftest.py with ``pytest_plugins = ["app.db.pytest_plugin"]``::
+
+    async def test_list_goals_is_three_queries(client, query_counter):
+        with query_counter() as queries:
+            await client.get("/goals", headers=auth_headers)
+        assert queries.total == 3  # auth lookup, ETag validator, page
+"""
+import pytest
+
+from app.db import engine, query_profiler
+
+
+@pytest.fixture
+def query_counter():
+    """Context manager factory counting statements executed inside its block."""
+    query_profiler.install(engine)
+    return query_profiler.count_queries
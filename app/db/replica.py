@@ -0,0 +1,204 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.metrics import Counter, Gauge
+from app.db.database import async_session_maker, query_profiler
+
+logger = logging.getLogger(__name__)
+
+# The user a request (or a task it started) acts for; set when its token is checked
+current_user_id: ContextVar[str | None] = ContextVar("current_user_id", default=None)
+
+READ_SESSIONS = Counter(
+    "jetaide_db_read_sessions_total",
+    "Read-only sessions by where they were routed.",
+    ("target",),
+)
+
+# Seconds the replica is behind the primary. A replica that has replayed everything
+# it received counts as caught up, since replay timestamps stop moving on an idle
+# primary, but only while its WAL receiver is streaming and has heard from the primary
+# within wal_receiver_timeout (idle primaries send keepalives well inside it).
+# Otherwise the lag is the age of the last replayed transaction, NULL (unknown) if none.
+LAG_QUERY = text(
+    """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() AND EXISTS (
+            SELECT 1 FROM pg_stat_wal_receiver
+            WHERE status = 'streaming'
+                AND last_msg_receipt_time
+                    > now() - current_setting('wal_receiver_timeout')::interval
+        ) THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+    """
+)
+
+replica_engine: AsyncEngine | None = None
+replica_session_maker: async_sessionmaker | None = None
+if settings.database_replica_url:
+    replica_engine = create_async_engine(
+        settings.database_replica_url,
+        echo=False,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+    )
+    replica_session_maker = async_sessionmaker(
+        replica_engine, class_=AsyncSession, expire_on_commit=False
+    )
+    if settings.db_profiling:
+        query_profiler.install(replica_engine)
+
+
+class ReplicaRouter:
+    """
+    Decides for each read-only session whether the replica may serve it.
+
+    The replica is used while its replication lag is at most `max_lag`
+    seconds, and not for `sticky_for` seconds after the user's own last write,
+    so users always read their own changes. Lag is sampled every
+    `check_interval` seconds by a task started with `start()`; until a recent
+    sample exists, or while the replica is unreachable, reads go to the
+    primary. Writes are tracked per process for up to `max_users` users.
+    """
+
+    def __init__(
+        self,
+        engine: AsyncEngine | None,
+        max_lag: float,
+        check_interval: float,
+        sticky_for: float,
+        max_users: int = 100_000,
+    ):
+        self.engine = engine
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.sticky_for = sticky_for
+        self.max_users = max_users
+        self.lag: float | None = None
+        self._measured_at = float("-inf")
+        self._monitor: asyncio.Task | None = None
+        self._writes: OrderedDict[str, float] = OrderedDict()
+
+    def note_write(self, user_id: str) -> None:
+        self._writes[user_id] = time.monotonic()
+        self._writes.move_to_end(user_id)
+        while len(self._writes) > self.max_users:
+            self._writes.popitem(last=False)
+
+    def recently_wrote(self, user_id: str) -> bool:
+        wrote_at = self._writes.get(user_id)
+        return wrote_at is not None and time.monotonic() - wrote_at < self.sticky_for
+
+    def target(self, user_id: str | None) -> str:
+        """Where a read for `user_id` should go: "replica", or the reason it goes to the primary."""
+        if self.engine is None:
+            return "primary"
+        if user_id is not None and self.recently_wrote(user_id):
+            return "primary_sticky"
+        stale = time.monotonic() - self._measured_at > 3 * self.check_interval
+        if self.lag is None or self.lag > self.max_lag or stale:
+            return "primary_lagging"
+        return "replica"
+
+    def start(self) -> None:
+        if self.engine is not None and self._monitor is None:
+            self._monitor = asyncio.create_task(self._watch())
+
+    async def stop(self) -> None:
+        if self._monitor is not None:
+            self._monitor.cancel()
+            await asyncio.gather(self._monitor, return_exceptions=True)
+            self._monitor = None
+
+    async def _watch(self) -> None:
+        while True:
+            await self.measure_lag()
+            await asyncio.sleep(self.check_interval)
+
+    async def measure_lag(self) -> float | None:
+        try:
+            async with asyncio.timeout(self.check_interval):
+                async with self.engine.connect() as connection:
+                    lag = await connection.scalar(LAG_QUERY)
+            self.lag = None if lag is None else float(lag)
+        except Exception as exc:
+            if self.lag is not None:
+                logger.warning("Replica lag check failed, reading from the primary: %s", exc)
+            self.lag = None
+        self._measured_at = time.monotonic()
+        return self.lag
+
+
+replica_router = ReplicaRouter(
+    replica_engine,
+    max_lag=settings.replica_max_lag_seconds,
+    check_interval=settings.replica_lag_check_seconds,
+    sticky_for=settings.read_your_writes_seconds,
+)
+
+Gauge(
+    "jetaide_db_replica_lag_seconds",
+    "Last measured replication lag of the read replica (NaN when unknown).",
+    lambda: replica_router.lag if replica_router.lag is not None else float("nan"),
+)
+
+
+@asynccontextmanager
+async def read_session(user_id: str | None) -> AsyncIterator[AsyncSession]:
+    """
+    A session for read-only work on behalf of `user_id`.
+
+    On the replica when it may serve the user, else on the primary.
+    """
+    target = replica_router.target(user_id)
+    READ_SESSIONS.inc(target)
+    session_maker = replica_session_maker if target == "replica" else async_session_maker
+    async with session_maker() as session:
+        yield session
+
+
+def is_replica(session: AsyncSession) -> bool:
+    return replica_engine is not None and session.bind is replica_engine
+
+
+def _flag_write(session: Session) -> None:
+    session.info["wrote"] = True
+
+
+def _on_execute(state) -> None:
+    if state.is_insert or state.is_update or state.is_delete:
+        _flag_write(state.session)
+
+
+def _on_commit(session: Session) -> None:
+    if session.info.pop("wrote", False) and (user_id := current_user_id.get()) is not None:
+        replica_router.note_write(user_id)
+
+
+def _on_rollback(session: Session) -> None:
+    session.info.pop("wrote", None)
+
+
+if replica_engine is not None:
+    # Any committed write on a user's behalf makes their reads stick to the primary for a while
+    event.listen(Session, "after_flush", lambda session, flush_context: _flag_write(session))
+    event.listen(Session, "do_orm_execute", _on_execute)
+    event.listen(Session, "after_commit", _on_commit)
+    event.listen(Session, "after_rollback", _on_rollback)
@@ -0,0 +1,24 @@
+"""Run the proactive check-in scheduler: python -m app.jobs.checkins"""
+import asyncio
+import logging
+
+from app.services import checkin_scheduler, usage_ledger
+
+
+async def run() -> None:
+    usage_ledger.start()
+    try:
+        await checkin_scheduler.run_forever()
+    finally:
+        await usage_ledger.stop()
+
+
+def main() -> None:
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s %(levelname)s [%(name)s] %(message)s"
+    )
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""Export data as NDJSON: python -m app.jobs.export [--user ID] [--since ISO] [--gzip] [-o FILE]"""
+import argparse
+import asyncio
+import sys
+from datetime import datetime
+
+from app.services.export import export_ndjson, gzip_stream
+
+
+async def run(user_id: str | None, since: datetime | None, compress: bool, output: str) -> None:
+    stream = export_ndjson(user_id, since=since)
+    out = sys.stdout.buffer if output == "-" else open(output, "wb")
+    try:
+        if compress:
+            async for data in gzip_stream(stream):
+                out.write(data)
+        else:
+            async for chunk in stream:
+                out.write(chunk.encode())
+    finally:
+        if out is not sys.stdout.buffer:
+            out.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Export users, goals, progress and conversations as NDJSON."
+    )
+    parser.add_argument("--user", help="Only export this user's data (default: all users)")
+    parser.add_argument(
+        "--since",
+        type=datetime.fromisoformat,
+        help="Only rows changed after this time (from a previous cursor record; naive is UTC)",
+    )
+    parser.add_argument("--gzip", action="store_true", help="Gzip-compress the output")
+    parser.add_argument("-o", "--output", default="-", help="Output file (default: stdout)")
+    args = parser.parse_args()
+    asyncio.run(run(args.user, args.since, args.gzip, args.output))
+
+
+if __name__ == "__main__":
+    main()
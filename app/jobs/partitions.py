@@ -0,0 +1,59 @@
+"""Create and archive message partitions: python -m app.jobs.partitions [--no-archive]"""
+import argparse
+import asyncio
+import logging
+from datetime import UTC, datetime
+
+from app.core.config import settings
+from app.db.database import async_session_maker
+from app.services.partitions import (
+    add_months,
+    archive_partition,
+    create_partitions,
+    list_partitions,
+)
+
+logger = logging.getLogger(__name__)
+
+
+async def run(archive: bool = True) -> int:
+    """Returns the number of partitions that could not be archived; the next run retries them."""
+    async with async_session_maker() as db:
+        created = await create_partitions(db, settings.messages_partitions_ahead)
+        partitions = await list_partitions(db)
+    for name in created:
+        logger.info("Created partition %s", name)
+
+    if not archive or settings.messages_archive_after_months <= 0:
+        return 0
+    this_month = datetime.now(UTC).date().replace(day=1)
+    cutoff = add_months(this_month, -settings.messages_archive_after_months)
+    failed = 0
+    for partition in partitions:
+        if partition.month >= cutoff:
+            break
+        try:
+            rows = await archive_partition(async_session_maker, partition)
+        except Exception:
+            logger.exception("Archiving %s failed", partition.name)
+            failed += 1
+        else:
+            logger.info("Archived %d messages from %s", rows, partition.name)
+    return failed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Maintain the monthly partitions of the messages table."
+    )
+    parser.add_argument("--no-archive", action="store_true", help="Only create upcoming partitions")
+    args = parser.parse_args()
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s %(levelname)s [%(name)s] %(message)s"
+    )
+    failed = asyncio.run(run(archive=not args.no_archive))
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
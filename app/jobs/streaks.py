@@ -0,0 +1,28 @@
+"""Recompute goal streaks and metrics: python -m app.jobs.streaks [goal_id ...]"""
+import asyncio
+import logging
+import sys
+
+from app.db.database import async_session_maker
+from app.services.streaks import repair_goal_aggregates
+
+logger = logging.getLogger(__name__)
+
+
+async def run(goal_ids: list[str] | None = None) -> int:
+    async with async_session_maker() as db:
+        changed = await repair_goal_aggregates(db, goal_ids)
+        await db.commit()
+    return changed
+
+
+def main() -> None:
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s %(levelname)s [%(name)s] %(message)s"
+    )
+    changed = asyncio.run(run(sys.argv[1:] or None))
+    logger.info("Repaired aggregates on %d goals", changed)
+
+
+if __name__ == "__main__":
+    main()
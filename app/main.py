@@ -2,17 +2,34 @@ from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 from starlette.middleware.sessions import SessionMiddleware
 
-from app.api import auth_router, chat_router, goals_router
+from app.api import admin_router, auth_router, chat_router, export_router, goals_router
 from app.core.config import settings
+from app.core.http import close_http_client
+from app.core.metrics import MetricsMiddleware, render_metrics
+from app.db import engine, query_profiler, replica_engine, replica_router
+from app.db.profiling import QueryProfilingMiddleware
+from app.services import qdrant_service, readiness, stream_registry, usage_ledger
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup
+    # Startup: warm the DB pool, model catalog, Qdrant and upstream connections
+    await readiness.prime()
+    replica_router.start()
+    usage_ledger.start()
     yield
-    # Shutdown
+    # Shutdown: let running generations persist their replies (and usage) first
+    await stream_registry.shutdown()
+    await usage_ledger.stop()
+    await replica_router.stop()
+    await close_http_client()
+    qdrant_service.close()
+    await engine.dispose()
+    if replica_engine is not None:
+        await replica_engine.dispose()
 
 
 app = FastAPI(
@@ -29,13 +46,19 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor", "Server-Timing", "X-Stream-ID"],
 )
 app.add_middleware(SessionMiddleware, secret_key=settings.secret_key)
+app.add_middleware(MetricsMiddleware)
+if settings.db_profiling:
+    app.add_middleware(QueryProfilingMiddleware, profiler=query_profiler)
 
 # Routers
 app.include_router(auth_router)
 app.include_router(chat_router)
 app.include_router(goals_router)
+app.include_router(export_router)
+app.include_router(admin_router)
 
 
 @app.get("/")
@@ -46,3 +69,21 @@ async def root():
 @app.get("/health")
 async def health():
     return {"status": "healthy"}
+
+
+@app.get("/ready")
+async def ready():
+    """Readiness: 200 once startup priming has passed, 503 (retrying failed checks) until then."""
+    is_ready = readiness.ready or await readiness.prime()
+    return JSONResponse(
+        {
+            "status": "ready" if is_ready else "not ready",
+            "checks": {name: error or "ok" for name, error in readiness.results.items()},
+        },
+        status_code=200 if is_ready else 503,
+    )
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
@@ -1,5 +1,21 @@
 from app.models.conversation import Conversation, Message
+from app.models.daily_log import DailyLog
+from app.models.engagement import CheckIn, UserEngagement
 from app.models.goal import Goal, ProgressEntry
+from app.models.idempotency import IdempotencyKey
+from app.models.usage import TokenUsage, TokenUsageDaily
 from app.models.user import User
 
-__all__ = ["User", "Goal", "ProgressEntry", "Conversation", "Message"]
+__all__ = [
+    "User",
+    "Goal",
+    "ProgressEntry",
+    "DailyLog",
+    "Conversation",
+    "Message",
+    "CheckIn",
+    "UserEngagement",
+    "IdempotencyKey",
+    "TokenUsage",
+    "TokenUsageDaily",
+]
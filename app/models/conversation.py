@@ -1,20 +1,47 @@
 from datetime import datetime
 from uuid import uuid4
 
-from sqlalchemy import DateTime, ForeignKey, String, Text, func
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import (
+    Boolean,
+    Computed,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+    Update,
+    func,
+    update,
+)
+from sqlalchemy.dialects.postgresql import TSVECTOR, UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.database import Base
 
+PREVIEW_LENGTH = 200
+
+# Text search configuration of Message.search_vector; queries must use the same one
+SEARCH_CONFIG = "english"
+
 
 class Conversation(Base):
     __tablename__ = "conversations"
+    __table_args__ = (
+        Index("ix_conversations_user_id_updated_at_id", "user_id", "updated_at", "id"),
+    )
 
     id: Mapped[str] = mapped_column(UUID(as_uuid=False), primary_key=True, default=lambda: str(uuid4()))
     user_id: Mapped[str] = mapped_column(UUID(as_uuid=False), ForeignKey("users.id"), nullable=False)
 
     title: Mapped[str | None] = mapped_column(String(255), nullable=True)
+
+    # Denormalized on every new message (see Conversation.record_message_update)
+    message_count: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
+    last_message_preview: Mapped[str | None] = mapped_column(String(PREVIEW_LENGTH), nullable=True)
+
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
     updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
@@ -22,17 +49,72 @@ class Conversation(Base):
     user: Mapped["User"] = relationship("User", back_populates="conversations")
     messages: Mapped[list["Message"]] = relationship("Message", back_populates="conversation", cascade="all, delete-orphan")
 
+    @classmethod
+    def record_message_update(
+        cls,
+        conversation_id: str,
+        user_id: str,
+        content: str,
+        at: datetime,
+        title: str | None = None,
+    ) -> Update:
+        """
+        Bump the denormalized listing fields for a new message, in SQL so no count is lost.
+
+        Sets the title too unless it already has one. Returns the new
+        message_count and title; no row if the user has no such conversation.
+        The caller adds the Message itself, with `created_at=at`, and commits.
+        """
+        values = {
+            "message_count": cls.message_count + 1,
+            "last_message_preview": content[:PREVIEW_LENGTH],
+            "updated_at": at,
+        }
+        if title:
+            values["title"] = func.coalesce(cls.title, title)
+        return (
+            update(cls)
+            .where(cls.id == conversation_id, cls.user_id == user_id)
+            .values(values)
+            .returning(cls.message_count, cls.title)
+            .execution_options(synchronize_session=False)
+        )
+
 
 class Message(Base):
+    """
+    A chat message. The table is range-partitioned by month of `created_at`
+    (see app.services.partitions); months past the retention window are moved
+    to archive files and read back by export and search.
+    """
+
     __tablename__ = "messages"
+    __table_args__ = (
+        Index("ix_messages_conversation_id_created_at", "conversation_id", "created_at"),
+        Index("ix_messages_search_vector", "search_vector", postgresql_using="gin"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
 
     id: Mapped[str] = mapped_column(UUID(as_uuid=False), primary_key=True, default=lambda: str(uuid4()))
     conversation_id: Mapped[str] = mapped_column(UUID(as_uuid=False), ForeignKey("conversations.id"), nullable=False)
 
     role: Mapped[str] = mapped_column(String(20), nullable=False)  # user, assistant
     content: Mapped[str] = mapped_column(Text, nullable=False)
+    # Partial reply kept after the client disconnected mid-generation
+    truncated: Mapped[bool] = mapped_column(
+        Boolean, nullable=False, default=False, server_default="false"
+    )
+    # Maintained by Postgres from content; only read by search queries
+    search_vector: Mapped[str | None] = mapped_column(
+        TSVECTOR,
+        Computed(f"to_tsvector('{SEARCH_CONFIG}'::regconfig, content)", persisted=True),
+        deferred=True,
+    )
 
-    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    # Part of the primary key because it is the partition key
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), primary_key=True, server_default=func.now()
+    )
 
     # Relationships
     conversation: Mapped["Conversation"] = relationship("Conversation", back_populates="messages")
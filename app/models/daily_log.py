@@ -0,0 +1,44 @@
+from datetime import date, datetime
+from typing import TYPE_CHECKING
+from uuid import uuid4
+
+from sqlalchemy import Boolean, Date, DateTime, Float, ForeignKey, Index, String, Text, func
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from app.db.database import Base
+
+if TYPE_CHECKING:
+    from app.models.goal import Goal
+
+
+class DailyLog(Base):
+    __tablename__ = "daily_logs"
+    __table_args__ = (Index("ix_daily_logs_goal_id_log_date", "goal_id", "log_date"),)
+
+    id: Mapped[str] = mapped_column(
+        UUID(as_uuid=False), primary_key=True, default=lambda: str(uuid4())
+    )
+    goal_id: Mapped[str] = mapped_column(
+        UUID(as_uuid=False), ForeignKey("goals.id"), nullable=False
+    )
+    user_id: Mapped[str] = mapped_column(
+        UUID(as_uuid=False), ForeignKey("users.id"), nullable=False
+    )
+
+    log_date: Mapped[date] = mapped_column(Date, nullable=False)
+    weight: Mapped[float | None] = mapped_column(Float, nullable=True)
+    meals_rating: Mapped[str | None] = mapped_column(String(50), nullable=True)
+    hunger_awareness: Mapped[str | None] = mapped_column(String(50), nullable=True)
+    emotional_eating: Mapped[bool | None] = mapped_column(Boolean, nullable=True)
+    emotion_if_eating: Mapped[str | None] = mapped_column(String(100), nullable=True)
+    # great, good, okay, struggling
+    mood: Mapped[str | None] = mapped_column(String(50), nullable=True)
+    energy: Mapped[str | None] = mapped_column(String(50), nullable=True)  # high, medium, low
+    notes: Mapped[str | None] = mapped_column(Text, nullable=True)
+    data: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+    # Relationships
+    goal: Mapped["Goal"] = relationship("Goal", back_populates="daily_logs")
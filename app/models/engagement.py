@@ -0,0 +1,71 @@
+from datetime import datetime
+from typing import TYPE_CHECKING
+from uuid import uuid4
+
+from sqlalchemy import Boolean, DateTime, ForeignKey, Index, Integer, String, Text, func
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from app.db.database import Base
+
+if TYPE_CHECKING:
+    from app.models.user import User
+
+
+class CheckIn(Base):
+    __tablename__ = "check_ins"
+    __table_args__ = (Index("ix_check_ins_user_id_responded", "user_id", "responded"),)
+
+    id: Mapped[str] = mapped_column(
+        UUID(as_uuid=False), primary_key=True, default=lambda: str(uuid4())
+    )
+    user_id: Mapped[str] = mapped_column(
+        UUID(as_uuid=False), ForeignKey("users.id"), nullable=False
+    )
+    goal_id: Mapped[str | None] = mapped_column(
+        UUID(as_uuid=False), ForeignKey("goals.id", ondelete="SET NULL"), nullable=True
+    )
+
+    message_sent: Mapped[str] = mapped_column(Text, nullable=False)
+    # morning, afternoon, evening
+    check_in_type: Mapped[str] = mapped_column(String(50), nullable=False)
+
+    sent_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    responded: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+    responded_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+
+class UserEngagement(Base):
+    __tablename__ = "user_engagement"
+
+    id: Mapped[str] = mapped_column(
+        UUID(as_uuid=False), primary_key=True, default=lambda: str(uuid4())
+    )
+    user_id: Mapped[str] = mapped_column(
+        UUID(as_uuid=False), ForeignKey("users.id"), unique=True, nullable=False
+    )
+
+    unanswered_checkins: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    total_checkins_sent: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    total_responses: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    last_checkin_sent: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    last_user_message: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+
+    paused: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+    paused_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    # Local hours (0-23) the user likes to be contacted at; NULL means the default hours
+    preferred_check_in_times: Mapped[list[int] | None] = mapped_column(JSONB, nullable=True)
+    night_start_hour: Mapped[int] = mapped_column(Integer, nullable=False, default=22)
+    night_end_hour: Mapped[int] = mapped_column(Integer, nullable=False, default=8)
+
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
+
+    # Relationships
+    user: Mapped["User"] = relationship("User", back_populates="engagement")
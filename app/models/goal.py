@@ -1,15 +1,24 @@
-from datetime import datetime
+from datetime import date, datetime
+from typing import TYPE_CHECKING
 from uuid import uuid4
 
-from sqlalchemy import DateTime, ForeignKey, String, Text, func
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Date, DateTime, ForeignKey, Index, Integer, String, Text, func
+from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.database import Base
 
+if TYPE_CHECKING:
+    from app.models.daily_log import DailyLog
+    from app.models.user import User
+
 
 class Goal(Base):
     __tablename__ = "goals"
+    __table_args__ = (
+        Index("ix_goals_user_id_status", "user_id", "status"),
+        Index("ix_goals_user_id_created_at_id", "user_id", "created_at", "id"),
+    )
 
     id: Mapped[str] = mapped_column(UUID(as_uuid=False), primary_key=True, default=lambda: str(uuid4()))
     user_id: Mapped[str] = mapped_column(UUID(as_uuid=False), ForeignKey("users.id"), nullable=False)
@@ -18,6 +27,16 @@ class Goal(Base):
     description: Mapped[str | None] = mapped_column(Text, nullable=True)
     category: Mapped[str] = mapped_column(String(100), nullable=False)  # smoking, diet, exercise, etc.
     status: Mapped[str] = mapped_column(String(50), default="active")  # active, paused, completed, abandoned
+    start_date: Mapped[date | None] = mapped_column(Date, nullable=True)
+    target_date: Mapped[date | None] = mapped_column(Date, nullable=True)
+    settings: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
+
+    # Aggregates maintained on each progress entry (see app.services.streaks)
+    # total_entries, last_entry_date, mood_counts
+    metrics: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
+    milestones_achieved: Mapped[list | None] = mapped_column(JSONB, nullable=True)
+    current_streak: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    best_streak: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
 
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
     updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -25,10 +44,16 @@ class Goal(Base):
     # Relationships
     user: Mapped["User"] = relationship("User", back_populates="goals")
     progress_entries: Mapped[list["ProgressEntry"]] = relationship("ProgressEntry", back_populates="goal", cascade="all, delete-orphan")
+    daily_logs: Mapped[list["DailyLog"]] = relationship(
+        "DailyLog", back_populates="goal", cascade="all, delete-orphan"
+    )
 
 
 class ProgressEntry(Base):
     __tablename__ = "progress_entries"
+    __table_args__ = (
+        Index("ix_progress_entries_goal_id_created_at_id", "goal_id", "created_at", "id"),
+    )
 
     id: Mapped[str] = mapped_column(UUID(as_uuid=False), primary_key=True, default=lambda: str(uuid4()))
     goal_id: Mapped[str] = mapped_column(UUID(as_uuid=False), ForeignKey("goals.id"), nullable=False)
@@ -0,0 +1,27 @@
+from datetime import datetime
+
+from sqlalchemy import DateTime, ForeignKey, String, func
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.database import Base
+
+
+class IdempotencyKey(Base):
+    """Outcome of a chat request sent with an `Idempotency-Key` header."""
+
+    __tablename__ = "idempotency_keys"
+
+    user_id: Mapped[str] = mapped_column(
+        UUID(as_uuid=False), ForeignKey("users.id"), primary_key=True
+    )
+    key: Mapped[str] = mapped_column(String(255), primary_key=True)
+
+    fingerprint: Mapped[str] = mapped_column(String(64), nullable=False)  # sha256 of the request
+    # The /chat/stream generation, to follow it from a retry
+    stream_id: Mapped[str | None] = mapped_column(String(32), nullable=True)
+    # None while the request is in progress
+    response: Mapped[dict | None] = mapped_column(JSONB(none_as_null=True), nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
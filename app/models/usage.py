@@ -0,0 +1,62 @@
+from datetime import date, datetime
+
+from sqlalchemy import (
+    BigInteger,
+    Date,
+    DateTime,
+    Float,
+    ForeignKey,
+    Identity,
+    Index,
+    Integer,
+    String,
+)
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.database import Base
+
+
+class TokenUsage(Base):
+    """Tokens and cost of one LLM call, written in batches by app.services.usage."""
+
+    __tablename__ = "token_usage"
+    __table_args__ = (
+        Index("ix_token_usage_user_id_created_at", "user_id", "created_at"),
+        Index("ix_token_usage_created_at", "created_at"),
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, Identity(), primary_key=True)
+    user_id: Mapped[str] = mapped_column(
+        UUID(as_uuid=False), ForeignKey("users.id"), nullable=False
+    )
+    # Not a foreign key: usage outlives deleted conversations
+    conversation_id: Mapped[str | None] = mapped_column(UUID(as_uuid=False), nullable=True)
+
+    source: Mapped[str] = mapped_column(String(20), nullable=False)  # chat, stream, ws, checkin
+    model: Mapped[str] = mapped_column(String(255), nullable=False)
+    finish_reason: Mapped[str | None] = mapped_column(String(32), nullable=True)
+    prompt_tokens: Mapped[int] = mapped_column(Integer, nullable=False)
+    completion_tokens: Mapped[int] = mapped_column(Integer, nullable=False)
+    # USD; None when no price was known
+    cost: Mapped[float | None] = mapped_column(Float, nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+
+class TokenUsageDaily(Base):
+    """Per user, model and UTC day totals of token_usage, kept up to date by the same writes."""
+
+    __tablename__ = "token_usage_daily"
+    __table_args__ = (Index("ix_token_usage_daily_day_model", "day", "model"),)
+
+    user_id: Mapped[str] = mapped_column(
+        UUID(as_uuid=False), ForeignKey("users.id"), primary_key=True
+    )
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    model: Mapped[str] = mapped_column(String(255), primary_key=True)
+
+    requests: Mapped[int] = mapped_column(Integer, nullable=False)
+    prompt_tokens: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    completion_tokens: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    cost: Mapped[float] = mapped_column(Float, nullable=False)  # priced calls only
@@ -1,20 +1,32 @@
 from datetime import datetime
+from typing import TYPE_CHECKING
 from uuid import uuid4
 
-from sqlalchemy import DateTime, String, func
+from sqlalchemy import DateTime, Index, Integer, String, func
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.database import Base
 
+if TYPE_CHECKING:
+    from app.models.conversation import Conversation
+    from app.models.engagement import UserEngagement
+    from app.models.goal import Goal
+
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (Index("ix_users_timezone_id", "timezone", "id"),)
 
     id: Mapped[str] = mapped_column(UUID(as_uuid=False), primary_key=True, default=lambda: str(uuid4()))
     email: Mapped[str] = mapped_column(String(255), unique=True, index=True, nullable=False)
     name: Mapped[str | None] = mapped_column(String(255), nullable=True)
     picture: Mapped[str | None] = mapped_column(String(500), nullable=True)
+    first_name: Mapped[str | None] = mapped_column(String(100), nullable=True)
+    last_name: Mapped[str | None] = mapped_column(String(100), nullable=True)
+    locale: Mapped[str | None] = mapped_column(String(10), nullable=True)
+    timezone: Mapped[int | None] = mapped_column(Integer, nullable=True)  # UTC offset in hours
+    gender: Mapped[str | None] = mapped_column(String(20), nullable=True)
 
     # OAuth provider info
     oauth_provider: Mapped[str] = mapped_column(String(50), nullable=False)  # google, facebook
@@ -26,3 +38,6 @@ class User(Base):
     # Relationships
     goals: Mapped[list["Goal"]] = relationship("Goal", back_populates="user", cascade="all, delete-orphan")
     conversations: Mapped[list["Conversation"]] = relationship("Conversation", back_populates="user", cascade="all, delete-orphan")
+    engagement: Mapped["UserEngagement | None"] = relationship(
+        "UserEngagement", back_populates="user", uselist=False, cascade="all, delete-orphan"
+    )
@@ -1,4 +1,9 @@
-from pydantic import BaseModel
+from datetime import date, datetime
+
+from pydantic import BaseModel, Field
+
+# Upper bound on items in one batch request
+MAX_BATCH_ITEMS = 1000
 
 
 class GoalCreate(BaseModel):
@@ -19,6 +24,10 @@ class GoalResponse(BaseModel):
     description: str | None
     category: str
     status: str
+    current_streak: int = 0
+    best_streak: int = 0
+    metrics: dict | None = None
+    milestones_achieved: list | None = None
 
     class Config:
         from_attributes = True
@@ -29,6 +38,81 @@ class ProgressCreate(BaseModel):
     mood: str | None = None
 
 
+class ProgressResponse(BaseModel):
+    id: str
+    note: str | None
+    mood: str | None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class GoalBatchCreate(BaseModel):
+    goals: list[GoalCreate] = Field(min_length=1, max_length=MAX_BATCH_ITEMS)
+
+
+class ProgressBatchItem(BaseModel):
+    goal_id: str
+    note: str | None = None
+    mood: str | None = None
+    created_at: datetime | None = None  # when recorded offline; defaults to now
+
+
+class ProgressBatchCreate(BaseModel):
+    entries: list[ProgressBatchItem] = Field(min_length=1, max_length=MAX_BATCH_ITEMS)
+
+
+class BatchItemResult(BaseModel):
+    index: int
+    id: str | None = None
+    created_at: datetime | None = None
+    error: str | None = None
+
+
+class BatchResult(BaseModel):
+    created: int
+    failed: int
+    results: list[BatchItemResult]
+
+
+class DailyLogCreate(BaseModel):
+    log_date: date | None = None
+    weight: float | None = None
+    meals_rating: str | None = None
+    hunger_awareness: str | None = None
+    emotional_eating: bool | None = None
+    emotion_if_eating: str | None = None
+    mood: str | None = None
+    energy: str | None = None
+    notes: str | None = None
+    data: dict | None = None
+
+
+class RollingPoint(BaseModel):
+    date: date
+    value: float
+
+
+class WeeklyDelta(BaseModel):
+    week_start: date
+    avg_weight: float
+    delta: float | None
+
+
+class GoalStatsResponse(BaseModel):
+    goal_id: str
+    days_logged: int
+    first_log_date: date | None
+    last_log_date: date | None
+    weight_rolling_avg: list[RollingPoint]
+    weekly: list[WeeklyDelta]
+    mood_distribution: dict[str, int]
+    energy_distribution: dict[str, int]
+    emotional_eating_rate: float | None
+    emotional_eating_rate_30d: float | None
+
+
 class MessageCreate(BaseModel):
     content: str
 
@@ -36,11 +120,24 @@ class MessageCreate(BaseModel):
 class ConversationResponse(BaseModel):
     id: str
     title: str | None
+    message_count: int = 0
+    last_message_preview: str | None = None
+    updated_at: datetime | None = None
 
     class Config:
         from_attributes = True
 
 
+class MessageSearchResult(BaseModel):
+    id: str
+    conversation_id: str
+    conversation_title: str | None
+    role: str
+    snippet: str  # matches wrapped in <mark></mark>; the rest is raw message text
+    rank: float
+    created_at: datetime
+
+
 class ChatRequest(BaseModel):
     message: str
     conversation_id: str | None = None
@@ -1,4 +1,36 @@
+from app.services.admission import AdmissionRejected, chat_rate_limiter, llm_governor
+from app.services.analytics import goal_analytics_service
+from app.services.checkins import checkin_scheduler, record_checkin_response
+from app.services.conversation_cache import HISTORY_WINDOW, ConversationState, conversation_cache
+from app.services.idempotency import IdempotencyError, idempotency_service, request_fingerprint
+from app.services.message_archive import message_archive
 from app.services.openrouter import openrouter_service
 from app.services.qdrant import qdrant_service
+from app.services.readiness import readiness
+from app.services.streaks import apply_progress_entry
+from app.services.streams import ChatStream, parse_event_id, stream_registry
+from app.services.usage import usage_ledger
 
-__all__ = ["openrouter_service", "qdrant_service"]
+__all__ = [
+    "AdmissionRejected",
+    "ChatStream",
+    "ConversationState",
+    "HISTORY_WINDOW",
+    "IdempotencyError",
+    "apply_progress_entry",
+    "chat_rate_limiter",
+    "checkin_scheduler",
+    "conversation_cache",
+    "goal_analytics_service",
+    "idempotency_service",
+    "llm_governor",
+    "message_archive",
+    "openrouter_service",
+    "parse_event_id",
+    "qdrant_service",
+    "readiness",
+    "record_checkin_response",
+    "request_fingerprint",
+    "stream_registry",
+    "usage_ledger",
+]
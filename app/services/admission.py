@@ -0,0 +1,190 @@
+import asyncio
+import math
+import time
+from collections import OrderedDict
+
+from app.core.config import settings
+from app.core.metrics import Counter, Gauge, Histogram
+
+LLM_QUEUE_TIME = Histogram(
+    "jetaide_llm_queue_seconds",
+    "Time requests waited for an LLM concurrency slot.",
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+ADMISSION_REJECTED = Counter(
+    "jetaide_admission_rejected_total",
+    "Requests rejected by admission control.",
+    ("reason",),
+)
+
+
+class AdmissionRejected(Exception):
+    """A request was refused before doing any work; retry after `retry_after` seconds."""
+
+    def __init__(self, status_code: int, detail: str, retry_after: float):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+    @property
+    def headers(self) -> dict[str, str]:
+        return {"Retry-After": str(max(1, math.ceil(self.retry_after)))}
+
+
+class TokenBucketLimiter:
+    """
+    Per-key token buckets held in process memory.
+
+    Each key refills at `rate` tokens per second up to `burst`. Idle buckets are
+    evicted least-recently-used once `max_keys` is reached; an evicted bucket
+    would have refilled to full anyway once idle for `burst / rate` seconds.
+    """
+
+    def __init__(self, rate: float, burst: int, max_keys: int = 100_000):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        # key -> (tokens, last refill time)
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    async def hit(self, key: str, cost: float = 1.0) -> float:
+        """Take `cost` tokens; returns 0 if allowed, else seconds until enough have refilled."""
+        now = time.monotonic()
+        tokens, last = self._buckets.pop(key, (float(self.burst), now))
+        tokens = min(float(self.burst), tokens + (now - last) * self.rate)
+
+        retry_after = 0.0
+        if tokens >= cost:
+            tokens -= cost
+        else:
+            retry_after = (cost - tokens) / self.rate
+
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return retry_after
+
+
+class RedisTokenBucketLimiter:
+    """
+    Token buckets shared by all workers through Redis.
+
+    The refill-and-take step runs as one Lua script so concurrent workers never
+    double-spend a bucket. Requires the optional `redis` package.
+    """
+
+    SCRIPT = """
+    local rate = tonumber(ARGV[1])
+    local burst = tonumber(ARGV[2])
+    local cost = tonumber(ARGV[3])
+    local t = redis.call('TIME')
+    local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+    local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or burst
+    local ts = tonumber(state[2]) or now
+    tokens = math.min(burst, tokens + (now - ts) * rate)
+    local retry_after = 0
+    if tokens >= cost then
+        tokens = tokens - cost
+    else
+        retry_after = (cost - tokens) / rate
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+    redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+    return tostring(retry_after)
+    """
+
+    def __init__(self, url: str, rate: float, burst: int, prefix: str = "jetaide:ratelimit:"):
+        import redis.asyncio as redis
+
+        self.rate = rate
+        self.burst = burst
+        self.prefix = prefix
+        self._client = redis.from_url(url)
+        self._script = self._client.register_script(self.SCRIPT)
+
+    async def hit(self, key: str, cost: float = 1.0) -> float:
+        result = await self._script(keys=[self.prefix + key], args=[self.rate, self.burst, cost])
+        return float(result)
+
+
+class LLMGovernor:
+    """
+    Global cap on concurrent LLM calls with a bounded wait queue.
+
+    Requests beyond `max_concurrency` wait for a slot; once `max_queue` requests
+    are already waiting, or a wait exceeds `queue_timeout` seconds, the request
+    is rejected straight away instead of piling up behind a saturated upstream.
+    """
+
+    def __init__(self, max_concurrency: int, max_queue: int, queue_timeout: float):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.in_flight = 0
+        self.waiting = 0
+        # Moving average of how long a slot is held, for Retry-After estimates
+        self._hold_avg = 1.0
+
+    def _retry_after(self) -> float:
+        return self._hold_avg * (self.waiting + 1) / self.max_concurrency
+
+    def _at_capacity(self) -> AdmissionRejected:
+        return AdmissionRejected(503, "Assistant is at capacity, please retry", self._retry_after())
+
+    async def acquire(self) -> float:
+        """Wait for a slot; returns the acquisition time to pass back to `release()`."""
+        if self._semaphore.locked():
+            if self.waiting >= self.max_queue:
+                ADMISSION_REJECTED.inc("llm_queue_full")
+                raise self._at_capacity()
+
+        start = time.perf_counter()
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+        except TimeoutError:
+            ADMISSION_REJECTED.inc("llm_queue_timeout")
+            raise self._at_capacity() from None
+        finally:
+            self.waiting -= 1
+
+        acquired = time.perf_counter()
+        LLM_QUEUE_TIME.observe(acquired - start)
+        self.in_flight += 1
+        return acquired
+
+    def release(self, acquired: float) -> None:
+        self.in_flight -= 1
+        self._hold_avg += 0.1 * (time.perf_counter() - acquired - self._hold_avg)
+        self._semaphore.release()
+
+
+def create_chat_rate_limiter() -> TokenBucketLimiter | RedisTokenBucketLimiter:
+    rate = settings.chat_rate_limit_per_minute / 60
+    if settings.rate_limit_redis_url:
+        return RedisTokenBucketLimiter(
+            settings.rate_limit_redis_url, rate, settings.chat_rate_limit_burst
+        )
+    return TokenBucketLimiter(rate, settings.chat_rate_limit_burst)
+
+
+chat_rate_limiter = create_chat_rate_limiter()
+llm_governor = LLMGovernor(
+    max_concurrency=settings.llm_max_concurrency,
+    max_queue=settings.llm_max_queue,
+    queue_timeout=settings.llm_queue_timeout_seconds,
+)
+
+Gauge(
+    "jetaide_llm_in_flight",
+    "LLM calls currently holding a concurrency slot.",
+    lambda: llm_governor.in_flight,
+)
+Gauge(
+    "jetaide_llm_waiting",
+    "Requests waiting for an LLM concurrency slot.",
+    lambda: llm_governor.waiting,
+)
@@ -0,0 +1,214 @@
+import time
+from collections import OrderedDict
+from datetime import date, timedelta
+
+import numpy as np
+from sqlalchemy import and_, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import DailyLog, Goal
+
+
+def _distribution(values: np.ndarray) -> dict[str, int]:
+    """Count occurrences of each non-null label."""
+    known = values[np.not_equal(values, None)].astype(str)
+    labels, counts = np.unique(known, return_counts=True)
+    return {str(label): int(count) for label, count in zip(labels, counts, strict=True)}
+
+
+def _rate(flags: np.ndarray) -> float | None:
+    """Fraction of True among the non-null booleans, or None if nothing was recorded."""
+    known = flags[np.not_equal(flags, None)].astype(bool)
+    return round(float(known.mean()), 4) if known.size else None
+
+
+def compute_goal_stats(
+    dates: list[date],
+    weights: list[float | None],
+    moods: list[str | None],
+    energies: list[str | None],
+    emotional_eating: list[bool | None],
+    window: int = 7,
+    today: date | None = None,
+) -> dict:
+    """
+    Compute trend statistics from column arrays of daily logs.
+
+    All arrays must be aligned; their order does not matter since every series is
+    rebuilt on a dense calendar-day grid. Several logs on the same day are averaged.
+
+    Args:
+        dates: log_date of each row
+        weights: weight of each row (None when not logged)
+        moods: mood label of each row
+        energies: energy label of each row
+        emotional_eating: emotional_eating flag of each row
+        window: Rolling average window in calendar days
+        today: Reference day for the recent emotional-eating rate
+
+    Returns:
+        Dict matching GoalStatsResponse (without goal_id)
+    """
+    today = today or date.today()
+    if not dates:
+        return {
+            "days_logged": 0,
+            "first_log_date": None,
+            "last_log_date": None,
+            "weight_rolling_avg": [],
+            "weekly": [],
+            "mood_distribution": {},
+            "energy_distribution": {},
+            "emotional_eating_rate": None,
+            "emotional_eating_rate_30d": None,
+        }
+
+    days = np.array(dates, dtype="datetime64[D]")
+    first = days.min()
+    offsets = (days - first).astype(np.int64)
+    n_days = int(offsets.max()) + 1
+
+    # Per-day weight means on a dense grid
+    w = np.array(weights, dtype=np.float64)
+    has_weight = ~np.isnan(w)
+    day_sums = np.bincount(offsets[has_weight], weights=w[has_weight], minlength=n_days)
+    day_counts = np.bincount(offsets[has_weight], minlength=n_days)
+
+    # Rolling mean over the trailing `window` calendar days via prefix sums
+    sum_prefix = np.concatenate(([0.0], np.cumsum(day_sums)))
+    count_prefix = np.concatenate(([0], np.cumsum(day_counts)))
+    idx = np.arange(n_days)
+    lo = np.maximum(0, idx + 1 - window)
+    window_counts = count_prefix[idx + 1] - count_prefix[lo]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rolling = (sum_prefix[idx + 1] - sum_prefix[lo]) / window_counts
+
+    logged_days = np.flatnonzero(day_counts)
+    rolling_dates = (first + logged_days).astype(object)
+    weight_rolling_avg = [
+        {"date": d, "value": round(float(v), 2)}
+        for d, v in zip(rolling_dates, rolling[logged_days], strict=True)
+    ]
+
+    # Weekly means (weeks start on Monday) and week-over-week deltas
+    monday = first - ((first.astype(np.int64) + 3) % 7)  # 1970-01-01 was a Thursday
+    weeks = ((days - monday).astype(np.int64)) // 7
+    n_weeks = int(weeks.max()) + 1
+    week_sums = np.bincount(weeks[has_weight], weights=w[has_weight], minlength=n_weeks)
+    week_counts = np.bincount(weeks[has_weight], minlength=n_weeks)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        week_means = week_sums / week_counts
+    week_deltas = np.concatenate(([np.nan], np.diff(week_means)))
+    logged_weeks = np.flatnonzero(week_counts)
+    week_starts = (monday + logged_weeks * 7).astype(object)
+    weekly = [
+        {
+            "week_start": start,
+            "avg_weight": round(float(mean), 2),
+            "delta": None if np.isnan(delta) else round(float(delta), 2),
+        }
+        for start, mean, delta in zip(
+            week_starts, week_means[logged_weeks], week_deltas[logged_weeks], strict=True
+        )
+    ]
+
+    eating = np.array(emotional_eating, dtype=object)
+    recent = days >= np.datetime64(today - timedelta(days=29), "D")
+
+    return {
+        "days_logged": int(np.count_nonzero(np.bincount(offsets, minlength=n_days))),
+        "first_log_date": first.astype(object),
+        "last_log_date": days.max().astype(object),
+        "weight_rolling_avg": weight_rolling_avg,
+        "weekly": weekly,
+        "mood_distribution": _distribution(np.array(moods, dtype=object)),
+        "energy_distribution": _distribution(np.array(energies, dtype=object)),
+        "emotional_eating_rate": _rate(eating),
+        "emotional_eating_rate_30d": _rate(eating[recent]),
+    }
+
+
+class GoalAnalyticsService:
+    """Trend analytics over a goal's daily logs, cached per goal."""
+
+    CACHE_TTL_SECONDS = 300
+    MAX_CACHED_GOALS = 2048
+
+    def __init__(self):
+        # goal_id -> {(days, window): (expires_at, user_id, stats)}, in LRU order
+        self._cache: OrderedDict[str, dict[tuple[int, int], tuple[float, str, dict]]] = (
+            OrderedDict()
+        )
+
+    def invalidate(self, goal_id: str) -> None:
+        """Drop every cached result for a goal, e.g. after a new log is written."""
+        self._cache.pop(goal_id, None)
+
+    async def get_goal_stats(
+        self,
+        db: AsyncSession,
+        goal_id: str,
+        user_id: str,
+        days: int = 365,
+        window: int = 7,
+    ) -> dict | None:
+        """
+        Get trend statistics for a goal owned by the user.
+
+        Args:
+            db: Database session
+            goal_id: The goal's ID
+            user_id: The requesting user's ID
+            days: How many days of history to include
+            window: Rolling average window in days
+
+        Returns:
+            Stats dict, or None if the goal does not exist or is not the user's
+        """
+        key = (days, window)
+        entries = self._cache.get(goal_id)
+        if entries and key in entries:
+            expires_at, owner_id, stats = entries[key]
+            if owner_id == user_id and expires_at > time.monotonic():
+                self._cache.move_to_end(goal_id)
+                return stats
+
+        # One row of aligned column arrays; ownership is checked by the same query
+        since = date.today() - timedelta(days=days - 1)
+        has_log = DailyLog.id.is_not(None)
+        result = await db.execute(
+            select(
+                func.array_agg(DailyLog.log_date).filter(has_log),
+                func.array_agg(DailyLog.weight).filter(has_log),
+                func.array_agg(DailyLog.mood).filter(has_log),
+                func.array_agg(DailyLog.energy).filter(has_log),
+                func.array_agg(DailyLog.emotional_eating).filter(has_log),
+            )
+            .select_from(Goal)
+            .outerjoin(DailyLog, and_(DailyLog.goal_id == Goal.id, DailyLog.log_date >= since))
+            .where(Goal.id == goal_id, Goal.user_id == user_id)
+            .group_by(Goal.id)
+        )
+        row = result.one_or_none()
+        if row is None:
+            return None
+
+        dates, weights, moods, energies, emotional_eating = (col or [] for col in row)
+        stats = {
+            "goal_id": goal_id,
+            **compute_goal_stats(dates, weights, moods, energies, emotional_eating, window=window),
+        }
+
+        self._cache.setdefault(goal_id, {})[key] = (
+            time.monotonic() + self.CACHE_TTL_SECONDS,
+            user_id,
+            stats,
+        )
+        self._cache.move_to_end(goal_id)
+        while len(self._cache) > self.MAX_CACHED_GOALS:
+            self._cache.popitem(last=False)
+
+        return stats
+
+
+goal_analytics_service = GoalAnalyticsService()
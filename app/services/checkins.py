@@ -0,0 +1,306 @@
+import asyncio
+import logging
+import time
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy import and_, case, exists, func, insert, literal, not_, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.database import async_session_maker
+from app.models import CheckIn, Goal, User, UserEngagement
+from app.services.openrouter import openrouter_service
+from app.services.usage import usage_ledger
+
+logger = logging.getLogger(__name__)
+
+# Whole-hour UTC offsets stored in users.timezone; None is scanned as UTC
+TIMEZONE_OFFSETS: list[int | None] = [None, *range(-12, 15)]
+
+# How many batches may be composing at once, so DB reads overlap with LLM calls
+MAX_INFLIGHT_BATCHES = 4
+
+CHECKIN_PROMPT = """You are JetAide, a supportive AI assistant that helps people achieve \
+their personal goals.
+
+Write a short {check_in_type} check-in message (1-2 sentences) for {name}.
+{goal_line}
+Be warm and encouraging, ask one open question, and never be judgmental.
+Reply with the message text only."""
+
+
+@dataclass
+class DueUser:
+    user_id: str
+    name: str | None
+    local_hour: int
+    goal_id: str | None = None
+    goal_title: str | None = None
+    goal_category: str | None = None
+
+
+def check_in_type_for_hour(hour: int) -> str:
+    """Map a local hour to the kind of check-in sent at that time of day."""
+    if hour < 12:
+        return "morning"
+    if hour < 17:
+        return "afternoon"
+    return "evening"
+
+
+async def record_checkin_response(db: AsyncSession, user_id: str) -> None:
+    """
+    Mark a user's outstanding check-ins as answered and reset their engagement counters.
+
+    Runs two set-wise UPDATEs in the caller's transaction; the caller commits.
+    """
+    now = func.now()
+    await db.execute(
+        update(UserEngagement)
+        .where(UserEngagement.user_id == user_id)
+        .values(
+            total_responses=UserEngagement.total_responses
+            + case((UserEngagement.unanswered_checkins > 0, 1), else_=0),
+            unanswered_checkins=0,
+            last_user_message=now,
+            paused=False,
+            paused_at=None,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    await db.execute(
+        update(CheckIn)
+        .where(CheckIn.user_id == user_id, CheckIn.responded.is_(False))
+        .values(responded=True, responded_at=now)
+        .execution_options(synchronize_session=False)
+    )
+
+
+class CheckInScheduler:
+    """Proactively sends check-in messages to users who are due for one."""
+
+    def __init__(self):
+        self.interval = settings.checkin_interval_seconds
+        self.batch_size = settings.checkin_batch_size
+        self.min_gap = timedelta(hours=settings.checkin_min_gap_hours)
+        self.max_unanswered = settings.checkin_max_unanswered
+        self.default_hours = settings.checkin_default_hours
+        self._semaphore = asyncio.Semaphore(settings.checkin_concurrency)
+
+    async def ensure_engagement_rows(self) -> int:
+        """Create missing user_engagement rows for all users in one INSERT ... SELECT."""
+        table = UserEngagement.__table__
+        missing = select(
+            func.gen_random_uuid(),
+            User.id,
+            literal(0),
+            literal(0),
+            literal(0),
+            literal(False),
+            literal(22),
+            literal(8),
+        ).where(~exists().where(UserEngagement.user_id == User.id))
+
+        async with async_session_maker() as db:
+            result = await db.execute(
+                insert(table).from_select(
+                    [
+                        table.c.id,
+                        table.c.user_id,
+                        table.c.unanswered_checkins,
+                        table.c.total_checkins_sent,
+                        table.c.total_responses,
+                        table.c.paused,
+                        table.c.night_start_hour,
+                        table.c.night_end_hour,
+                    ],
+                    missing,
+                )
+            )
+            await db.commit()
+            return result.rowcount
+
+    def _due_filter(self, local_hour: int, cutoff: datetime):
+        """Build the per-user WHERE clause for a timezone whose local hour is known."""
+        hour = literal(local_hour)
+        start = UserEngagement.night_start_hour
+        end = UserEngagement.night_end_hour
+        in_quiet_hours = case(
+            (start <= end, and_(hour >= start, hour < end)),
+            else_=or_(hour >= start, hour < end),
+        )
+
+        preferred = UserEngagement.preferred_check_in_times.contains([local_hour])
+        if local_hour in self.default_hours:
+            preferred = or_(preferred, UserEngagement.preferred_check_in_times.is_(None))
+
+        return and_(
+            UserEngagement.paused.is_(False),
+            or_(
+                UserEngagement.last_checkin_sent.is_(None),
+                UserEngagement.last_checkin_sent < cutoff,
+            ),
+            not_(in_quiet_hours),
+            preferred,
+        )
+
+    async def _due_batches(self, now: datetime) -> AsyncIterator[list[DueUser]]:
+        """
+        Yield due users in batches, walking the (timezone, id) index with a keyset cursor.
+
+        Each batch is read in its own short session so no connection is held while
+        messages are being generated.
+        """
+        cutoff = now - self.min_gap
+
+        for offset in TIMEZONE_OFFSETS:
+            local_hour = (now.hour + (offset or 0)) % 24
+            tz_filter = User.timezone.is_(None) if offset is None else User.timezone == offset
+            due_filter = self._due_filter(local_hour, cutoff)
+            after: str | None = None
+
+            while True:
+                query = (
+                    select(User.id, func.coalesce(User.first_name, User.name))
+                    .join(UserEngagement, UserEngagement.user_id == User.id)
+                    .where(tz_filter, due_filter)
+                    .order_by(User.id)
+                    .limit(self.batch_size)
+                )
+                if after is not None:
+                    query = query.where(User.id > after)
+
+                async with async_session_maker() as db:
+                    rows = (await db.execute(query)).all()
+                    if not rows:
+                        break
+
+                    batch = {row[0]: DueUser(row[0], row[1], local_hour) for row in rows}
+                    goals = await db.execute(
+                        select(Goal.user_id, Goal.id, Goal.title, Goal.category)
+                        .where(Goal.user_id.in_(list(batch)), Goal.status == "active")
+                        .order_by(Goal.user_id, Goal.updated_at.desc())
+                    )
+
+                for user_id, goal_id, title, category in goals:
+                    due = batch[user_id]
+                    if due.goal_id is None:
+                        due.goal_id, due.goal_title, due.goal_category = goal_id, title, category
+
+                yield list(batch.values())
+
+                if len(rows) < self.batch_size:
+                    break
+                after = rows[-1][0]
+
+    async def _compose(self, due: DueUser) -> str | None:
+        """Generate a single check-in message, bounded by the shared semaphore."""
+        if due.goal_title:
+            goal_line = f"They are working on: {due.goal_title} ({due.goal_category})."
+        else:
+            goal_line = "They haven't set a goal yet; gently invite them to set one."
+
+        prompt = CHECKIN_PROMPT.format(
+            check_in_type=check_in_type_for_hour(due.local_hour),
+            name=due.name or "the user",
+            goal_line=goal_line,
+        )
+
+        async with self._semaphore:
+            try:
+                completion = await openrouter_service.complete(
+                    [{"role": "user", "content": prompt}],
+                    temperature=0.8,
+                    max_tokens=120,
+                )
+            except Exception:
+                logger.warning("Check-in generation failed for user %s", due.user_id, exc_info=True)
+                return None
+
+        usage_ledger.record(due.user_id, "checkin", completion)
+        return completion.content.strip() or None
+
+    async def _process_batch(self, batch: list[DueUser], now: datetime) -> int:
+        """Compose messages for a batch concurrently and persist them in one transaction."""
+        messages = await asyncio.gather(*(self._compose(due) for due in batch))
+
+        rows = [
+            {
+                "user_id": due.user_id,
+                "goal_id": due.goal_id,
+                "message_sent": message,
+                "check_in_type": check_in_type_for_hour(due.local_hour),
+                "sent_at": now,
+                "responded": False,
+            }
+            for due, message in zip(batch, messages, strict=True)
+            if message
+        ]
+        if not rows:
+            return 0
+
+        unanswered = UserEngagement.unanswered_checkins + 1
+        async with async_session_maker() as db:
+            await db.execute(insert(CheckIn), rows)
+            await db.execute(
+                update(UserEngagement)
+                .where(UserEngagement.user_id.in_([row["user_id"] for row in rows]))
+                .values(
+                    unanswered_checkins=unanswered,
+                    total_checkins_sent=UserEngagement.total_checkins_sent + 1,
+                    last_checkin_sent=now,
+                    paused=unanswered >= self.max_unanswered,
+                    paused_at=case(
+                        (unanswered >= self.max_unanswered, now),
+                        else_=UserEngagement.paused_at,
+                    ),
+                )
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+
+        return len(rows)
+
+    async def tick(self, now: datetime | None = None) -> int:
+        """
+        Run one scheduling pass.
+
+        Returns:
+            Number of check-ins sent
+        """
+        now = now or datetime.now(UTC)
+        sent = 0
+        pending: set[asyncio.Task[int]] = set()
+
+        async for batch in self._due_batches(now):
+            pending.add(asyncio.create_task(self._process_batch(batch, now)))
+            if len(pending) >= MAX_INFLIGHT_BATCHES:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                sent += sum(task.result() for task in done)
+
+        if pending:
+            done, _ = await asyncio.wait(pending)
+            sent += sum(task.result() for task in done)
+
+        return sent
+
+    async def run_forever(self):
+        """Backfill engagement rows, then tick every `checkin_interval_seconds`."""
+        created = await self.ensure_engagement_rows()
+        if created:
+            logger.info("Created %d missing user_engagement rows", created)
+
+        while True:
+            started = time.monotonic()
+            try:
+                sent = await self.tick()
+                elapsed = time.monotonic() - started
+                logger.info("Check-in tick sent %d messages in %.1fs", sent, elapsed)
+            except Exception:
+                logger.exception("Check-in tick failed")
+            await asyncio.sleep(max(0.0, self.interval - (time.monotonic() - started)))
+
+
+checkin_scheduler = CheckInScheduler()
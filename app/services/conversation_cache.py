@@ -0,0 +1,200 @@
+"""
+In-process cache of recent conversation state for POST /chat and /chat/stream.
+
+A turn needs the conversation's owner and title, its last HISTORY_WINDOW
+messages and the user's active goals. Cached here, a warm turn reads nothing
+from Postgres before calling the LLM; its writes go through an UPDATE ...
+RETURNING message_count (see Conversation.record_message_update) whose result
+tells whether anything else wrote to the conversation since it was cached.
+
+The cache is per process and bounded by both entry count and an estimate of
+the bytes it holds; least recently used entries are evicted first.
+"""
+import time
+from collections import OrderedDict, deque
+from collections.abc import Iterable
+
+from app.core.config import settings
+from app.core.metrics import Counter, Gauge
+
+HISTORY_WINDOW = 20  # messages sent to the LLM as conversation context
+# Rough per-entry cost of the objects around the text (state, deque, dicts, keys)
+ENTRY_OVERHEAD = 1024
+MESSAGE_OVERHEAD = 160
+
+CACHE_LOOKUPS = Counter(
+    "jetaide_conversation_cache_total",
+    "Conversation state cache lookups: hit, miss, or stale (written elsewhere since cached).",
+    ("result",),
+)
+
+
+class ConversationState:
+    """What a chat turn needs of a conversation, without its older messages."""
+
+    __slots__ = ("id", "user_id", "title", "message_count", "history", "size")
+
+    def __init__(
+        self,
+        id: str,
+        user_id: str,
+        title: str | None,
+        message_count: int,
+        history: Iterable[dict] = (),
+    ):
+        self.id = id
+        self.user_id = user_id
+        self.title = title
+        self.message_count = message_count
+        self.history: deque[dict] = deque(history, maxlen=HISTORY_WINDOW)
+        self.size = 0
+
+    def measure(self) -> int:
+        self.size = (
+            ENTRY_OVERHEAD
+            + len(self.title or "")
+            + sum(MESSAGE_OVERHEAD + len(m["content"]) for m in self.history)
+        )
+        return self.size
+
+
+class ConversationCache:
+    """
+    LRU of ConversationState by conversation id, plus the goals text of each user.
+
+    Conversation entries are updated in place as turns commit (`apply`) and
+    dropped on delete (`evict`). Goals entries are dropped by the goals routes
+    (`invalidate_goals`) and otherwise expire after `goals_ttl` seconds, which
+    bounds how long another worker's change goes unseen.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, goals_ttl: float):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.goals_ttl = goals_ttl
+        self.bytes = 0
+        self._conversations: OrderedDict[str, ConversationState] = OrderedDict()
+        # user id -> (goals text, loaded at)
+        self._goals: OrderedDict[str, tuple[str, float]] = OrderedDict()
+        # Bumped by invalidate_goals, so a load that raced with a change isn't cached
+        self.goals_epoch = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.max_bytes > 0
+
+    def __len__(self) -> int:
+        return len(self._conversations) + len(self._goals)
+
+    def get(self, conversation_id: str, user_id: str) -> ConversationState | None:
+        """The cached state, if the conversation is cached and belongs to `user_id`."""
+        state = self._conversations.get(conversation_id)
+        if state is None or state.user_id != user_id:
+            CACHE_LOOKUPS.inc("miss")
+            return None
+        CACHE_LOOKUPS.inc("hit")
+        self._conversations.move_to_end(conversation_id)
+        return state
+
+    def put(self, state: ConversationState) -> None:
+        if not self.enabled:
+            return
+        self.evict(state.id)
+        if state.measure() > self.max_bytes:
+            return  # would push out everything else
+        self._conversations[state.id] = state
+        self.bytes += state.size
+        self._trim()
+
+    def apply(
+        self,
+        state: ConversationState,
+        role: str,
+        content: str,
+        message_count: int,
+        title: str | None,
+    ) -> bool:
+        """
+        Add a committed message to `state` and (re)cache it.
+
+        `message_count` and `title` are the conversation's after the write. If
+        the count skipped ahead, other writers added messages this state
+        doesn't have: it is evicted instead, and False returned.
+        """
+        if message_count != state.message_count + 1:
+            CACHE_LOOKUPS.inc("stale")
+            self.evict(state.id)
+            return False
+        state.history.append({"role": role, "content": content})
+        state.message_count = message_count
+        state.title = title
+        self.put(state)
+        return True
+
+    def evict(self, conversation_id: str) -> None:
+        state = self._conversations.pop(conversation_id, None)
+        if state is not None:
+            self.bytes -= state.size
+
+    def goals(self, user_id: str) -> str | None:
+        entry = self._goals.get(user_id)
+        if entry is None:
+            return None
+        text, loaded_at = entry
+        if time.monotonic() - loaded_at > self.goals_ttl:
+            self._drop_goals(user_id)
+            return None
+        self._goals.move_to_end(user_id)
+        return text
+
+    def set_goals(self, user_id: str, text: str, epoch: int) -> None:
+        """Cache goals text loaded at `goals_epoch` == `epoch`; skipped if goals changed since."""
+        if not self.enabled or self.goals_epoch != epoch:
+            return
+        self._drop_goals(user_id)
+        self._goals[user_id] = (text, time.monotonic())
+        self.bytes += ENTRY_OVERHEAD + len(text)
+        self._trim()
+
+    def invalidate_goals(self, user_id: str) -> None:
+        """Call after changing the user's goals."""
+        self.goals_epoch += 1
+        self._drop_goals(user_id)
+
+    def clear(self) -> None:
+        self._conversations.clear()
+        self._goals.clear()
+        self.bytes = 0
+
+    def _drop_goals(self, user_id: str) -> None:
+        entry = self._goals.pop(user_id, None)
+        if entry is not None:
+            self.bytes -= ENTRY_OVERHEAD + len(entry[0])
+
+    def _trim(self) -> None:
+        while self._conversations and (
+            len(self._conversations) > self.max_entries or self.bytes > self.max_bytes
+        ):
+            _, state = self._conversations.popitem(last=False)
+            self.bytes -= state.size
+        while self._goals and (len(self._goals) > self.max_entries or self.bytes > self.max_bytes):
+            _, (text, _) = self._goals.popitem(last=False)
+            self.bytes -= ENTRY_OVERHEAD + len(text)
+
+
+conversation_cache = ConversationCache(
+    max_entries=settings.conversation_cache_max_entries,
+    max_bytes=settings.conversation_cache_max_mb * 1024 * 1024,
+    goals_ttl=settings.conversation_cache_goals_ttl_seconds,
+)
+
+Gauge(
+    "jetaide_conversation_cache_bytes",
+    "Estimated memory held by the conversation state cache.",
+    lambda: conversation_cache.bytes,
+)
+Gauge(
+    "jetaide_conversation_cache_entries",
+    "Conversations and goal lists in the conversation state cache.",
+    lambda: len(conversation_cache),
+)
@@ -0,0 +1,163 @@
+import json
+import zlib
+from collections.abc import AsyncIterator
+from datetime import UTC, date, datetime, timedelta
+
+from sqlalchemy import case, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.replica import read_session
+from app.models import Conversation, Goal, Message, ProgressEntry, User
+from app.services.message_archive import message_archive
+
+EXPORT_PARTITION_SIZE = 1000
+
+# Rows are stamped when they are written (by the app, or with their transaction's
+# start time), which can be before they commit: a row stamped just before the snapshot
+# and committed after it is not in this export. The cursor therefore points this far
+# before the snapshot, and the next delta reads that window again. A delta can repeat
+# rows (import them by id); it misses a row only if the row committed more than this
+# after it was stamped. The longest gap in the app is a chat turn, whose messages can be
+# stamped before the reply is generated and are committed after it.
+DELTA_OVERLAP = timedelta(minutes=15)
+
+# The snapshot's point in time. On a replica, now() can run ahead of the replayed data,
+# so the last replayed commit is used instead.
+SNAPSHOT_TIME = case(
+    (
+        func.pg_is_in_recovery(),
+        func.least(func.now(), func.coalesce(func.pg_last_xact_replay_timestamp(), func.now())),
+    ),
+    else_=func.now(),
+)
+
+
+def _default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def _line(record_type: str, row: dict) -> str:
+    return json.dumps({"type": record_type, **row}, default=_default, separators=(",", ":")) + "\n"
+
+
+def _export_queries(user_id: str | None, since: datetime | None):
+    """The (record type, query) pairs of an export, in dependency order."""
+    users = select(
+        User.id, User.email, User.name, User.first_name, User.last_name, User.picture,
+        User.locale, User.timezone, User.oauth_provider, User.created_at, User.updated_at,
+    )
+    goals = select(
+        Goal.id, Goal.user_id, Goal.title, Goal.description, Goal.category, Goal.status,
+        Goal.start_date, Goal.target_date, Goal.settings, Goal.metrics, Goal.milestones_achieved,
+        Goal.current_streak, Goal.best_streak, Goal.created_at, Goal.updated_at,
+    )
+    progress = select(
+        ProgressEntry.id, ProgressEntry.goal_id, ProgressEntry.note, ProgressEntry.mood,
+        ProgressEntry.created_at,
+    ).join(Goal, Goal.id == ProgressEntry.goal_id)
+    conversations = select(
+        Conversation.id, Conversation.user_id, Conversation.title,
+        Conversation.created_at, Conversation.updated_at,
+    )
+    messages = select(
+        Message.id, Message.conversation_id, Message.role, Message.content, Message.truncated,
+        Message.created_at,
+    ).join(Conversation, Conversation.id == Message.conversation_id)
+
+    if user_id is not None:
+        users = users.where(User.id == user_id)
+        goals = goals.where(Goal.user_id == user_id)
+        progress = progress.where(Goal.user_id == user_id)
+        conversations = conversations.where(Conversation.user_id == user_id)
+        messages = messages.where(Conversation.user_id == user_id)
+
+    if since is not None:
+        users = users.where(User.updated_at > since)
+        goals = goals.where(Goal.updated_at > since)
+        progress = progress.where(ProgressEntry.created_at > since)
+        conversations = conversations.where(Conversation.updated_at > since)
+        messages = messages.where(Message.created_at > since)
+
+    return [
+        ("user", users.order_by(User.id)),
+        ("goal", goals.order_by(Goal.id)),
+        ("progress_entry", progress.order_by(ProgressEntry.id)),
+        ("conversation", conversations.order_by(Conversation.id)),
+        ("message", messages.order_by(Message.conversation_id, Message.created_at)),
+    ]
+
+
+async def _archived_messages(
+    db: AsyncSession, user_id: str | None, since: datetime | None
+) -> AsyncIterator[list[dict]]:
+    """Messages moved to archive files, skipping those of conversations deleted since."""
+    if user_id is not None:
+        async for rows in message_archive.read_user_messages(db, user_id, since):
+            yield rows
+        return
+    for archive in message_archive.archives():
+        async for rows in message_archive.read(archive, since=since):
+            result = await db.execute(
+                select(Conversation.id).where(
+                    Conversation.id.in_({row["conversation_id"] for row in rows})
+                )
+            )
+            live = set(result.scalars())
+            yield [row for row in rows if row["conversation_id"] in live]
+
+
+async def export_ndjson(
+    user_id: str | None = None,
+    since: datetime | None = None,
+    partition_size: int = EXPORT_PARTITION_SIZE,
+) -> AsyncIterator[str]:
+    """
+    Stream users, goals, progress entries, conversations and messages as NDJSON.
+
+    Every table is read through a server-side cursor in fixed-size partitions, so
+    memory stays flat however much history a user has. All reads share one
+    REPEATABLE READ snapshot; the last line is a cursor record whose `since`
+    value can be passed to the next call for a delta export (see
+    DELTA_OVERLAP). Deltas hold rows created or updated since; rows deleted
+    since are not reported, so only a full export drops them. Messages in
+    archived months are read back from their archive files after the ones
+    still in Postgres.
+
+    Args:
+        user_id: Only export this user's data; None exports every user
+        since: Only export rows created or updated after this time; naive
+            values are taken as UTC
+        partition_size: Rows fetched per round-trip
+
+    Yields:
+        Chunks of NDJSON text, one partition at a time
+    """
+    if since is not None and since.tzinfo is None:
+        since = since.replace(tzinfo=UTC)
+    async with read_session(user_id) as db:
+        await db.connection(
+            execution_options={"isolation_level": "REPEATABLE READ", "postgresql_readonly": True}
+        )
+        snapshot_at = (await db.execute(select(SNAPSHOT_TIME))).scalar_one()
+
+        for record_type, query in _export_queries(user_id, since):
+            result = await db.stream(query.execution_options(yield_per=partition_size))
+            async for partition in result.mappings().partitions():
+                yield "".join(_line(record_type, dict(row)) for row in partition)
+
+        async for rows in _archived_messages(db, user_id, since):
+            if rows:
+                yield "".join(_line("message", row) for row in rows)
+
+        yield _line("cursor", {"since": snapshot_at - DELTA_OVERLAP})
+
+
+async def gzip_stream(chunks: AsyncIterator[str]) -> AsyncIterator[bytes]:
+    """Gzip-compress a text stream incrementally."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 writes a gzip container
+    async for chunk in chunks:
+        if data := compressor.compress(chunk.encode()):
+            yield data
+    yield compressor.flush()
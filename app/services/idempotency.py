@@ -0,0 +1,177 @@
+import asyncio
+import hashlib
+import json
+import time
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy import delete, update
+from sqlalchemy.dialects.postgresql import insert
+
+from app.core.config import settings
+from app.db import async_session_maker
+from app.models import IdempotencyKey
+
+
+class IdempotencyError(Exception):
+    """A request's Idempotency-Key can't be honoured (reused for another request, or still busy)."""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def request_fingerprint(path: str, body: dict) -> str:
+    """Hash of what makes two requests "the same" for a key."""
+    raw = json.dumps({"path": path, "body": body}, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class IdempotencyService:
+    """
+    Claims, waits on and completes Idempotency-Key records for chat requests.
+
+    The first request with a key claims it and runs; a retry with the same key
+    gets the stored response, or waits for the original while it is still
+    running. Rows are written in their own short transactions so the claim is
+    visible to other workers straight away. A failed request releases its key
+    so it can be retried.
+    """
+
+    POLL_INTERVAL = 0.25
+
+    def __init__(self, ttl: timedelta, lock_timeout: timedelta, wait_timeout: float):
+        self.ttl = ttl
+        self.lock_timeout = lock_timeout
+        self.wait_timeout = wait_timeout
+        # (user_id, key) -> set once the request running here completes or fails
+        self._settled: dict[tuple[str, str], asyncio.Event] = {}
+
+    async def claim(self, user_id: str, key: str, fingerprint: str) -> bool:
+        """Claim `key` for a new request; False if another request already holds it."""
+        now = datetime.now(UTC)
+        async with async_session_maker() as db:
+            await db.execute(
+                delete(IdempotencyKey).where(
+                    IdempotencyKey.user_id == user_id, IdempotencyKey.expires_at < now
+                )
+            )
+            values = {
+                "fingerprint": fingerprint,
+                "stream_id": None,
+                "response": None,
+                "created_at": now,
+                "expires_at": now + self.ttl,
+            }
+            stmt = insert(IdempotencyKey).values(user_id=user_id, key=key, **values)
+            # An in-progress claim left behind by a crashed worker can be taken over
+            abandoned = IdempotencyKey.response.is_(None) & (
+                IdempotencyKey.created_at < now - self.lock_timeout
+            )
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[IdempotencyKey.user_id, IdempotencyKey.key],
+                set_=values,
+                where=abandoned,
+            ).returning(IdempotencyKey.key)
+            claimed = (await db.execute(stmt)).scalar_one_or_none() is not None
+            await db.commit()
+
+        if claimed:
+            self._settled[(user_id, key)] = asyncio.Event()
+        return claimed
+
+    async def get(self, user_id: str, key: str) -> IdempotencyKey | None:
+        async with async_session_maker() as db:
+            return await db.get(IdempotencyKey, (user_id, key))
+
+    async def begin(
+        self, user_id: str, key: str, fingerprint: str, attach_stream: bool = False
+    ) -> IdempotencyKey | None:
+        """
+        Claim `key`, or return the record of the request that already holds it.
+
+        Returns None when the caller claimed the key and should run the request.
+        Otherwise waits for the original request to finish and returns its
+        record; with `attach_stream`, an in-progress record is returned as soon
+        as its stream ID is known so the caller can follow the same generation.
+        If the original fails meanwhile, its key is claimed again.
+        """
+        deadline = time.monotonic() + self.wait_timeout
+        while True:
+            if await self.claim(user_id, key, fingerprint):
+                return None
+            record = await self.get(user_id, key)
+            if record is None:
+                continue  # released between the claim attempt and the read
+            if record.fingerprint != fingerprint:
+                raise IdempotencyError(
+                    422, "Idempotency-Key was already used for a different request"
+                )
+            if record.response is not None or (attach_stream and record.stream_id):
+                return record
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise IdempotencyError(
+                    409, "A request with this Idempotency-Key is still in progress"
+                )
+            settled = self._settled.get((user_id, key))
+            if settled is not None:
+                # Running in this process: wake up as soon as it settles
+                try:
+                    await asyncio.wait_for(settled.wait(), remaining)
+                except TimeoutError:
+                    pass
+            else:
+                await asyncio.sleep(min(self.POLL_INTERVAL, remaining))
+
+    async def attach_stream(self, user_id: str, key: str, stream_id: str) -> None:
+        """Record the generation serving a claimed /chat/stream key, for duplicates to follow."""
+        async with async_session_maker() as db:
+            await db.execute(
+                update(IdempotencyKey)
+                .where(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key)
+                .values(stream_id=stream_id)
+            )
+            await db.commit()
+        self._wake(user_id, key, settled=False)
+
+    async def complete(self, user_id: str, key: str, response: dict) -> None:
+        async with async_session_maker() as db:
+            await db.execute(
+                update(IdempotencyKey)
+                .where(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key)
+                .values(response=response)
+            )
+            await db.commit()
+        self._wake(user_id, key)
+
+    async def release(self, user_id: str, key: str) -> None:
+        """Forget a claim whose request failed, so a retry runs it again."""
+        async with async_session_maker() as db:
+            await db.execute(
+                delete(IdempotencyKey).where(
+                    IdempotencyKey.user_id == user_id,
+                    IdempotencyKey.key == key,
+                    IdempotencyKey.response.is_(None),
+                )
+            )
+            await db.commit()
+        self._wake(user_id, key)
+
+    def _wake(self, user_id: str, key: str, settled: bool = True) -> None:
+        event = self._settled.get((user_id, key))
+        if event is None:
+            return
+        event.set()
+        if settled:
+            del self._settled[(user_id, key)]
+        else:
+            self._settled[(user_id, key)] = asyncio.Event()
+
+
+idempotency_service = IdempotencyService(
+    ttl=timedelta(hours=settings.idempotency_ttl_hours),
+    lock_timeout=timedelta(seconds=settings.idempotency_lock_timeout_seconds),
+    wait_timeout=settings.idempotency_wait_seconds,
+)
@@ -0,0 +1,294 @@
+"""
+Archive files for months of messages moved out of Postgres.
+
+An archive holds one monthly partition as a zip file. Rows are sorted by
+(conversation_id, created_at) and split into groups of `GROUP_ROWS`; every
+column of a group is a separately compressed JSON array, so a reader only
+decompresses the groups that hold the conversations it wants, and only the
+columns it needs. `manifest.json` records the month and the first and last
+conversation ID of each group.
+
+Each group also has a lexeme index: the text search lexemes of its messages,
+each with the positions of the rows containing it, hashed into
+`LEXEME_SHARDS` files. A search reads the shards of its query's lexemes and
+then only the rows holding one of them. Format 1 archives predate the index.
+
+Files are written under a `.partial` name and renamed once the partition is
+gone from Postgres, so a message is never read from both places.
+"""
+import asyncio
+import os
+import zipfile
+import zlib
+from bisect import bisect_left
+from collections.abc import AsyncIterator, Collection, Sequence
+from dataclasses import dataclass
+from datetime import datetime
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.serialization import dumps_bytes, loads
+from app.models import Conversation
+
+ARCHIVE_FORMAT = 2
+READABLE_FORMATS = (1, 2)
+ARCHIVE_SUFFIX = ".zip"
+PARTIAL_SUFFIX = ".partial"
+MANIFEST = "manifest.json"
+GROUP_ROWS = 10_000
+COLUMNS = ("id", "conversation_id", "role", "content", "truncated", "created_at")
+LEXEME_SHARDS = 32
+
+
+def lexeme_shard(lexeme: str) -> int:
+    return zlib.crc32(lexeme.encode()) % LEXEME_SHARDS
+
+
+@dataclass(frozen=True)
+class ArchiveGroup:
+    rows: int
+    first_conversation_id: str
+    last_conversation_id: str
+
+    def holds_any(self, conversation_ids: Sequence[str]) -> bool:
+        """Whether any of the sorted `conversation_ids` falls in this group's range."""
+        i = bisect_left(conversation_ids, self.first_conversation_id)
+        return i < len(conversation_ids) and conversation_ids[i] <= self.last_conversation_id
+
+
+@dataclass(frozen=True)
+class Archive:
+    path: str
+    partition: str
+    start: datetime
+    end: datetime
+    rows: int
+    groups: tuple[ArchiveGroup, ...]
+    indexed: bool  # groups have a lexeme index
+
+
+class ArchiveWriter:
+    """Writes one partition's rows, in (conversation_id, created_at) order, a group at a time."""
+
+    def __init__(self, path: str, partition: str, start: datetime, end: datetime):
+        self.path = path
+        self.partition = partition
+        self.start = start
+        self.end = end
+        self.rows = 0
+        self._groups: list[dict] = []
+        self._zip = zipfile.ZipFile(
+            path + PARTIAL_SUFFIX, "w", zipfile.ZIP_DEFLATED, compresslevel=9
+        )
+
+    def add(self, rows: Sequence[Sequence]) -> None:
+        """
+        Append rows as one or more groups. Each row holds the values in
+        `COLUMNS` order followed by the message's lexemes (tsvector_to_array
+        of its search_vector).
+        """
+        for offset in range(0, len(rows), GROUP_ROWS):
+            group = rows[offset:offset + GROUP_ROWS]
+            index = len(self._groups)
+            # strict=False: the lexemes, after the columns, are written below
+            for name, values in zip(COLUMNS, zip(*group, strict=True), strict=False):
+                self._zip.writestr(f"{index}/{name}.json", dumps_bytes(list(values)))
+            shards: list[dict[str, list[int]]] = [{} for _ in range(LEXEME_SHARDS)]
+            for position, row in enumerate(group):
+                for lexeme in row[len(COLUMNS)] or ():
+                    shards[lexeme_shard(lexeme)].setdefault(lexeme, []).append(position)
+            for shard, postings in enumerate(shards):
+                self._zip.writestr(f"{index}/lexemes/{shard}.json", dumps_bytes(postings))
+            self._groups.append({"rows": len(group), "first": group[0][1], "last": group[-1][1]})
+            self.rows += len(group)
+
+    def close(self) -> None:
+        manifest = {
+            "format": ARCHIVE_FORMAT,
+            "partition": self.partition,
+            "start": self.start,
+            "end": self.end,
+            "rows": self.rows,
+            "columns": COLUMNS,
+            "groups": self._groups,
+        }
+        self._zip.writestr(MANIFEST, dumps_bytes(manifest))
+        self._zip.close()
+        with open(self.path + PARTIAL_SUFFIX, "rb") as f:
+            os.fsync(f.fileno())
+
+    def discard(self) -> None:
+        self._zip.close()
+        try:
+            os.remove(self.path + PARTIAL_SUFFIX)
+        except FileNotFoundError:
+            pass
+
+
+class MessageArchive:
+    """
+    The archive files in `directory`, oldest month first.
+
+    Archives are immutable once published, so their manifests are read once
+    per process and cached by file name and modification time.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._manifests: dict[str, tuple[float, Archive]] = {}
+
+    def path(self, partition: str) -> str:
+        return os.path.join(self.directory, partition + ARCHIVE_SUFFIX)
+
+    def writer(self, partition: str, start: datetime, end: datetime) -> ArchiveWriter:
+        os.makedirs(self.directory, exist_ok=True)
+        return ArchiveWriter(self.path(partition), partition, start, end)
+
+    def publish(self, writer: ArchiveWriter) -> Archive:
+        """Make a closed writer's file visible to readers."""
+        os.replace(writer.path + PARTIAL_SUFFIX, writer.path)
+        return self._load(writer.path, os.stat(writer.path).st_mtime)
+
+    def archives(self) -> list[Archive]:
+        try:
+            entries = [e for e in os.scandir(self.directory) if e.name.endswith(ARCHIVE_SUFFIX)]
+        except FileNotFoundError:
+            return []
+        found = []
+        for entry in entries:
+            mtime = entry.stat().st_mtime
+            cached = self._manifests.get(entry.name)
+            if cached and cached[0] == mtime:
+                found.append(cached[1])
+            else:
+                found.append(self._load(entry.path, mtime))
+        return sorted(found, key=lambda archive: archive.start)
+
+    def archived_until(self) -> datetime | None:
+        """
+        End of the newest archived month.
+
+        Only conversations started before it can have archived messages.
+        """
+        archives = self.archives()
+        return max(archive.end for archive in archives) if archives else None
+
+    def _load(self, path: str, mtime: float) -> Archive:
+        with zipfile.ZipFile(path) as zf:
+            manifest = loads(zf.read(MANIFEST))
+        if manifest["format"] not in READABLE_FORMATS:
+            raise ValueError(f"{path}: unsupported archive format {manifest['format']}")
+        archive = Archive(
+            path=path,
+            partition=manifest["partition"],
+            start=datetime.fromisoformat(manifest["start"]),
+            end=datetime.fromisoformat(manifest["end"]),
+            rows=manifest["rows"],
+            groups=tuple(
+                ArchiveGroup(g["rows"], g["first"], g["last"]) for g in manifest["groups"]
+            ),
+            indexed=manifest["format"] >= 2,
+        )
+        self._manifests[os.path.basename(path)] = (mtime, archive)
+        return archive
+
+    @staticmethod
+    def _read_group(
+        archive: Archive,
+        index: int,
+        conversation_ids: Collection[str] | None,
+        since: datetime | None,
+        lexemes: Collection[str] | None,
+    ) -> list[dict]:
+        with zipfile.ZipFile(archive.path) as zf:
+
+            def column(name: str) -> list:
+                return loads(zf.read(f"{index}/{name}.json"))
+
+            keep = range(archive.groups[index].rows)
+            if lexemes is not None and archive.indexed:
+                shards = {lexeme_shard(lexeme) for lexeme in lexemes}
+                postings = {shard: column(f"lexemes/{shard}") for shard in shards}
+                found = set()
+                for lexeme in lexemes:
+                    found.update(postings[lexeme_shard(lexeme)].get(lexeme, ()))
+                keep = sorted(found)
+            if conversation_ids is not None:
+                ids = column("conversation_id")
+                keep = [i for i in keep if ids[i] in conversation_ids]
+            created_at = column("created_at")
+            if since is not None:
+                keep = [i for i in keep if datetime.fromisoformat(created_at[i]) > since]
+            if not keep:
+                return []
+            values = {name: column(name) for name in COLUMNS if name != "created_at"}
+        rows = []
+        for i in keep:
+            row = {name: values[name][i] for name in values}
+            row["created_at"] = datetime.fromisoformat(created_at[i])
+            rows.append(row)
+        return rows
+
+    async def read(
+        self,
+        archive: Archive,
+        conversation_ids: Collection[str] | None = None,
+        since: datetime | None = None,
+        lexemes: Collection[str] | None = None,
+    ) -> AsyncIterator[list[dict]]:
+        """
+        Yield an archive's messages a group at a time, in (conversation_id, created_at) order.
+
+        Args:
+            archive: One of `archives()`
+            conversation_ids: Only messages of these conversations; None reads all
+            since: Only messages created after this time
+            lexemes: Only messages with at least one of these text search lexemes;
+                ignored for archives without a lexeme index
+
+        Yields:
+            Lists of row dicts with the keys in `COLUMNS`; files are read in a thread
+        """
+        if since is not None and archive.end <= since:
+            return
+        wanted = sorted(conversation_ids) if conversation_ids is not None else None
+        lookup = frozenset(conversation_ids) if conversation_ids is not None else None
+        for index, group in enumerate(archive.groups):
+            if wanted is not None and not group.holds_any(wanted):
+                continue
+            rows = await asyncio.to_thread(self._read_group, archive, index, lookup, since, lexemes)
+            if rows:
+                yield rows
+
+    async def read_user_messages(
+        self,
+        db: AsyncSession,
+        user_id: str,
+        since: datetime | None = None,
+        lexemes: Collection[str] | None = None,
+    ) -> AsyncIterator[list[dict]]:
+        """
+        A user's archived messages, a group at a time, oldest month first.
+
+        Only conversations that still exist and started before the newest
+        archived month are looked up, so for most users nothing is read.
+        """
+        archived_until = self.archived_until()
+        if archived_until is None:
+            return
+        result = await db.execute(
+            select(Conversation.id).where(
+                Conversation.user_id == user_id, Conversation.created_at < archived_until
+            )
+        )
+        conversation_ids = set(result.scalars())
+        if not conversation_ids:
+            return
+        for archive in self.archives():
+            async for rows in self.read(archive, conversation_ids, since, lexemes):
+                yield rows
+
+
+message_archive = MessageArchive(settings.messages_archive_dir)
@@ -1,6 +1,10 @@
-import httpx
+import time
+from collections.abc import AsyncIterator
 
 from app.core.config import settings
+from app.core.http import get_http_client
+from app.core.metrics import record_stage, timed
+from app.core.serialization import loads
 
 
 class OpenRouterService:
@@ -16,15 +20,14 @@ class OpenRouterService:
         if self._models_cache and not refresh:
             return self._models_cache
 
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{self.base_url}/models",
-                headers={"Authorization": f"Bearer {self.api_key}"},
-            )
-            response.raise_for_status()
-            data = response.json()
-            self._models_cache = data.get("data", [])
-            return self._models_cache
+        response = await get_http_client().get(
+            f"{self.base_url}/models",
+            headers={"Authorization": f"Bearer {self.api_key}"},
+        )
+        response.raise_for_status()
+        data = response.json()
+        self._models_cache = data.get("data", [])
+        return self._models_cache
 
     async def get_best_model(
         self,
@@ -73,13 +76,32 @@ class OpenRouterService:
         eligible.sort(key=sort_key)
         return eligible[0]["id"]
 
-    async def chat(
+    def cost(self, model: str | None, usage: dict | None) -> float | None:
+        """
+        USD cost of a completion: as reported by OpenRouter, else estimated from
+        the cached model catalog's per-token prices; None if neither is known.
+        """
+        if not usage:
+            return None
+        if usage.get("cost") is not None:
+            return float(usage["cost"])
+        pricing = next(
+            (m.get("pricing") for m in self._models_cache or () if m.get("id") == model), None
+        )
+        if not pricing:
+            return None
+        return (
+            usage.get("prompt_tokens", 0) * float(pricing.get("prompt", 0))
+            + usage.get("completion_tokens", 0) * float(pricing.get("completion", 0))
+        )
+
+    async def complete(
         self,
         messages: list[dict],
         model: str | None = None,
         temperature: float = 0.7,
         max_tokens: int = 2048,
-    ) -> str:
+    ) -> "ChatCompletion":
         """
         Send a chat completion request to OpenRouter.
 
@@ -90,13 +112,14 @@ class OpenRouterService:
             max_tokens: Maximum tokens in response
 
         Returns:
-            Assistant's response text
+            The assistant's response text with the model that served it,
+            the finish reason and token usage
         """
         if model is None:
             model = await self.get_best_model()
 
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
+        with timed("llm_completion"):
+            response = await get_http_client().post(
                 f"{self.base_url}/chat/completions",
                 headers={
                     "Authorization": f"Bearer {self.api_key}",
@@ -108,58 +131,137 @@ class OpenRouterService:
                     "messages": messages,
                     "temperature": temperature,
                     "max_tokens": max_tokens,
+                    "usage": {"include": True},
                 },
                 timeout=60.0,
             )
-            response.raise_for_status()
-            data = response.json()
-            return data["choices"][0]["message"]["content"]
+        response.raise_for_status()
+        data = response.json()
+        choice = data["choices"][0]
+        return ChatCompletion(
+            content=choice["message"]["content"],
+            model=data.get("model") or model,
+            finish_reason=choice.get("finish_reason"),
+            usage=data.get("usage"),
+        )
 
-    async def chat_stream(
+    async def chat(
         self,
         messages: list[dict],
         model: str | None = None,
         temperature: float = 0.7,
         max_tokens: int = 2048,
-    ):
+    ) -> str:
+        """Send a chat completion request to OpenRouter and return only the response text."""
+        completion = await self.complete(messages, model, temperature, max_tokens)
+        return completion.content
+
+    def chat_stream(
+        self,
+        messages: list[dict],
+        model: str | None = None,
+        temperature: float = 0.7,
+        max_tokens: int = 2048,
+    ) -> "ChatCompletionStream":
         """
         Stream a chat completion response from OpenRouter.
 
-        Yields:
-            Chunks of the assistant's response text
+        Returns:
+            A ChatCompletionStream; iterate it for chunks of the assistant's
+            response text, then read its `finish_reason` and `usage`
         """
-        if model is None:
-            model = await self.get_best_model()
+        return ChatCompletionStream(self, messages, model, temperature, max_tokens)
 
-        async with httpx.AsyncClient() as client:
-            async with client.stream(
-                "POST",
-                f"{self.base_url}/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {self.api_key}",
-                    "HTTP-Referer": settings.backend_url,
-                    "X-Title": "JetAide",
-                },
-                json={
-                    "model": model,
-                    "messages": messages,
-                    "temperature": temperature,
-                    "max_tokens": max_tokens,
-                    "stream": True,
-                },
-                timeout=60.0,
-            ) as response:
-                response.raise_for_status()
-                async for line in response.aiter_lines():
-                    if line.startswith("data: "):
-                        data = line[6:]
-                        if data == "[DONE]":
-                            break
-                        import json
-                        chunk = json.loads(data)
-                        delta = chunk.get("choices", [{}])[0].get("delta", {})
-                        if content := delta.get("content"):
-                            yield content
+
+class ChatCompletion:
+    """A finished completion; `usage` holds the token counts (and cost) the upstream reported."""
+
+    def __init__(
+        self, content: str, model: str | None, finish_reason: str | None, usage: dict | None
+    ):
+        self.content = content
+        self.model = model
+        self.finish_reason = finish_reason
+        self.usage = usage
+
+
+class ChatCompletionStream:
+    """
+    One streamed completion: yields text deltas, then holds the final metadata.
+
+    `model` (the one that actually served the request), `finish_reason` and
+    `usage` (token counts and cost, as reported in the upstream's last chunk)
+    are filled in as the stream is consumed; the latter two are None if it
+    ended before they arrived.
+    """
+
+    def __init__(
+        self,
+        service: OpenRouterService,
+        messages: list[dict],
+        model: str | None,
+        temperature: float,
+        max_tokens: int,
+    ):
+        self.service = service
+        self.messages = messages
+        self.model = model
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        self.finish_reason: str | None = None
+        self.usage: dict | None = None
+
+    async def __aiter__(self) -> AsyncIterator[str]:
+        service = self.service
+        if self.model is None:
+            self.model = await service.get_best_model()
+
+        started = time.perf_counter()
+        first_token_at: float | None = None
+
+        async with get_http_client().stream(
+            "POST",
+            f"{service.base_url}/chat/completions",
+            headers={
+                "Authorization": f"Bearer {service.api_key}",
+                "HTTP-Referer": settings.backend_url,
+                "X-Title": "JetAide",
+            },
+            json={
+                "model": self.model,
+                "messages": self.messages,
+                "temperature": self.temperature,
+                "max_tokens": self.max_tokens,
+                "stream": True,
+                "usage": {"include": True},
+            },
+            timeout=60.0,
+        ) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.startswith("data: "):
+                    continue  # blank separators and ": OPENROUTER PROCESSING" keep-alives
+                data = line[6:]
+                if data == "[DONE]":
+                    break
+                chunk = loads(data)
+                if model := chunk.get("model"):
+                    self.model = model
+                if usage := chunk.get("usage"):
+                    self.usage = usage
+                if not (choices := chunk.get("choices")):
+                    continue
+                choice = choices[0]
+                if finish_reason := choice.get("finish_reason"):
+                    self.finish_reason = finish_reason
+                if content := choice.get("delta", {}).get("content"):
+                    if first_token_at is None:
+                        first_token_at = time.perf_counter()
+                        record_stage("llm_ttft", first_token_at - started)
+                    yield content
+
+        if first_token_at is not None:
+            record_stage("llm_generation", time.perf_counter() - first_token_at)
 
 
 openrouter_service = OpenRouterService()
@@ -0,0 +1,198 @@
+"""
+Monthly range partitions of `messages`.
+
+`create_partitions` keeps partitions ready for the coming months. A message
+whose month has no partition lands in `messages_default` and is moved into
+its partition once that is created. `archive_partition` writes an old month to
+an archive file (see app.services.message_archive), then detaches and drops
+the partition, so hot tables and indexes only hold recent months.
+"""
+import logging
+import re
+from dataclasses import dataclass
+from datetime import UTC, date, datetime, time
+
+from sqlalchemy import column, func, select, table, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.models import Message
+from app.services.message_archive import COLUMNS, GROUP_ROWS, MessageArchive, message_archive
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PARTITION = "messages_default"
+PARTITION_NAME = re.compile(r"messages_p(\d{4})_(\d{2})$")
+# DDL on a partition briefly locks the whole table; give up rather than queue requests behind it
+LOCK_TIMEOUT = "5s"
+
+
+@dataclass
+class Partition:
+    name: str
+    month: date
+    attached: bool
+
+    @property
+    def start(self) -> datetime:
+        return month_start(self.month)
+
+    @property
+    def end(self) -> datetime:
+        return month_start(add_months(self.month, 1))
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_start(month: date) -> datetime:
+    return datetime.combine(month.replace(day=1), time(), tzinfo=UTC)
+
+
+def partition_name(month: date) -> str:
+    return f"messages_p{month:%Y_%m}"
+
+
+def _partition_table(name: str):
+    """The columns of one partition (or detached former partition), typed like Message's."""
+    return table(name, *(column(name_, Message.__table__.c[name_].type) for name_ in COLUMNS))
+
+
+async def list_partitions(db: AsyncSession) -> list[Partition]:
+    """Monthly partitions, oldest first, including ones detached but not yet dropped."""
+    result = await db.execute(
+        text(
+            """
+            SELECT c.relname, i.inhparent IS NOT NULL
+            FROM pg_class c
+            LEFT JOIN pg_inherits i ON i.inhrelid = c.oid
+            WHERE c.relkind = 'r' AND c.relnamespace = current_schema()::regnamespace
+              AND c.relname LIKE 'messages\\_p%'
+            """
+        )
+    )
+    partitions = []
+    for name, attached in result.all():
+        if match := PARTITION_NAME.match(name):
+            month = date(int(match[1]), int(match[2]), 1)
+            partitions.append(Partition(name, month, attached))
+    return sorted(partitions, key=lambda p: p.month)
+
+
+async def create_partitions(
+    db: AsyncSession, months_ahead: int, today: date | None = None
+) -> list[str]:
+    """
+    Create the partitions of the current month and the next `months_ahead`,
+    plus those of any month that has rows in the default partition.
+
+    Each partition is created in its own transaction. Returns the new partitions' names.
+    """
+    today = today or datetime.now(UTC).date()
+    existing = {p.month for p in await list_partitions(db)}
+    wanted = {add_months(today.replace(day=1), n) for n in range(months_ahead + 1)}
+    stray_month = func.date_trunc("month", func.timezone("UTC", column("created_at")))
+    stray = await db.execute(select(stray_month.distinct()).select_from(table(DEFAULT_PARTITION)))
+    wanted.update(month.date() for month in stray.scalars())
+    await db.commit()
+
+    created = []
+    for month in sorted(wanted - existing):
+        await _create_partition(db, month)
+        created.append(partition_name(month))
+    return created
+
+
+async def _create_partition(db: AsyncSession, month: date) -> None:
+    name = partition_name(month)
+    start, end = month_start(month), month_start(add_months(month, 1))
+    bounds = f"FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    in_month = f"created_at >= '{start.isoformat()}' AND created_at < '{end.isoformat()}'"
+    columns = ", ".join(COLUMNS)
+
+    await db.execute(text(f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT}'"))
+    stray = await db.scalar(text(f"SELECT count(*) FROM {DEFAULT_PARTITION} WHERE {in_month}"))
+    if stray:
+        # Postgres refuses a partition whose rows sit in the default partition, so move them over
+        await db.execute(text(f"ALTER TABLE messages DETACH PARTITION {DEFAULT_PARTITION}"))
+        await db.execute(text(f"CREATE TABLE {name} PARTITION OF messages FOR VALUES {bounds}"))
+        await db.execute(
+            text(
+                f"INSERT INTO messages ({columns}) "
+                f"SELECT {columns} FROM {DEFAULT_PARTITION} WHERE {in_month}"
+            )
+        )
+        await db.execute(text(f"DELETE FROM {DEFAULT_PARTITION} WHERE {in_month}"))
+        await db.execute(text(f"ALTER TABLE messages ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT"))
+        logger.info("Moved %d messages from %s to %s", stray, DEFAULT_PARTITION, name)
+    else:
+        await db.execute(text(f"CREATE TABLE {name} PARTITION OF messages FOR VALUES {bounds}"))
+    await db.commit()
+
+
+async def _write_archive(db: AsyncSession, partition: Partition, archive: MessageArchive):
+    partition_table = _partition_table(partition.name)
+    writer = archive.writer(partition.name, partition.start, partition.end)
+    try:
+        await db.connection(
+            execution_options={"isolation_level": "REPEATABLE READ", "postgresql_readonly": True}
+        )
+        result = await db.stream(
+            select(partition_table, func.tsvector_to_array(column("search_vector")))
+            .order_by(partition_table.c.conversation_id, partition_table.c.created_at)
+            .execution_options(yield_per=GROUP_ROWS)
+        )
+        async for rows in result.partitions():
+            writer.add(rows)
+        writer.close()
+    except BaseException:
+        writer.discard()
+        raise
+    return writer
+
+
+async def archive_partition(
+    session_maker: async_sessionmaker,
+    partition: Partition,
+    archive: MessageArchive = message_archive,
+) -> int:
+    """
+    Move a monthly partition into an archive file and drop it. Returns the rows archived.
+
+    The file is written while the partition is still attached, so its
+    messages stay readable throughout. After the detach, the row count is
+    checked again and the file rewritten if messages were deleted meanwhile;
+    the file is published before the table is dropped.
+    """
+    writer = None
+    try:
+        if partition.attached:
+            async with session_maker() as db:
+                writer = await _write_archive(db, partition, archive)
+            async with session_maker() as db:
+                await db.execute(text(f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT}'"))
+                await db.execute(text(f"ALTER TABLE messages DETACH PARTITION {partition.name}"))
+                await db.commit()
+            partition.attached = False
+
+        async with session_maker() as db:
+            remaining = await db.scalar(
+                select(func.count()).select_from(_partition_table(partition.name))
+            )
+        if writer is None or writer.rows != remaining:
+            # Left over from an interrupted run, or changed while the file was written
+            if writer is not None:
+                writer.discard()
+            async with session_maker() as db:
+                writer = await _write_archive(db, partition, archive)
+        archive.publish(writer)
+    except BaseException:
+        if writer is not None:
+            writer.discard()
+        raise
+
+    async with session_maker() as db:
+        await db.execute(text(f"DROP TABLE {partition.name}"))
+        await db.commit()
+    return writer.rows
@@ -1,8 +1,8 @@
-from qdrant_client import QdrantClient
-from qdrant_client.http.models import Distance, PointStruct, VectorParams
-import httpx
+from uuid import NAMESPACE_URL, uuid5
 
 from app.core.config import settings
+from app.core.http import get_http_client
+from app.core.metrics import timed
 
 
 class QdrantService:
@@ -12,14 +12,33 @@ class QdrantService:
     VECTOR_SIZE = 1536  # OpenAI ada-002 embedding size
 
     def __init__(self):
-        self.client = QdrantClient(
-            host=settings.qdrant_host,
-            port=settings.qdrant_port,
-            api_key=settings.qdrant_api_key or None,
-        )
+        self._client = None
+        self._collection_ready = False
+
+    @property
+    def client(self):
+        """Qdrant client, created (and qdrant_client imported) on first use."""
+        if self._client is None:
+            from qdrant_client import QdrantClient
+
+            if settings.qdrant_location:
+                # In-process local mode, e.g. ":memory:" for benchmarks and development
+                self._client = QdrantClient(location=settings.qdrant_location)
+            else:
+                self._client = QdrantClient(
+                    host=settings.qdrant_host,
+                    port=settings.qdrant_port,
+                    api_key=settings.qdrant_api_key or None,
+                )
+        return self._client
 
     async def ensure_collection(self):
-        """Create the collection if it doesn't exist."""
+        """Create the collection if it doesn't exist (checked once per process)."""
+        if self._collection_ready:
+            return
+
+        from qdrant_client.http.models import Distance, VectorParams
+
         collections = self.client.get_collections().collections
         exists = any(c.name == self.COLLECTION_NAME for c in collections)
 
@@ -28,19 +47,26 @@ class QdrantService:
                 collection_name=self.COLLECTION_NAME,
                 vectors_config=VectorParams(size=self.VECTOR_SIZE, distance=Distance.COSINE),
             )
+        self._collection_ready = True
+
+    def close(self) -> None:
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+            self._collection_ready = False
 
     async def get_embedding(self, text: str) -> list[float]:
         """Get embedding from OpenRouter (using OpenAI compatible endpoint)."""
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
+        with timed("embedding"):
+            response = await get_http_client().post(
                 f"{settings.openrouter_base_url}/embeddings",
                 headers={"Authorization": f"Bearer {settings.openrouter_api_key}"},
                 json={"model": "openai/text-embedding-ada-002", "input": text},
                 timeout=30.0,
             )
-            response.raise_for_status()
-            data = response.json()
-            return data["data"][0]["embedding"]
+        response.raise_for_status()
+        data = response.json()
+        return data["data"][0]["embedding"]
 
     async def store_memory(
         self,
@@ -62,7 +88,10 @@ class QdrantService:
         await self.ensure_collection()
 
         embedding = await self.get_embedding(content)
-        point_id = f"{user_id}_{hash(content)}"
+        # Qdrant only accepts integer or UUID point IDs; uuid5 keeps identical memories deduplicated
+        point_id = str(uuid5(NAMESPACE_URL, f"{user_id}/{content}"))
+
+        from qdrant_client.http.models import PointStruct
 
         payload = {
             "user_id": user_id,
@@ -70,10 +99,11 @@ class QdrantService:
             **(metadata or {}),
         }
 
-        self.client.upsert(
-            collection_name=self.COLLECTION_NAME,
-            points=[PointStruct(id=point_id, vector=embedding, payload=payload)],
-        )
+        with timed("qdrant_upsert"):
+            self.client.upsert(
+                collection_name=self.COLLECTION_NAME,
+                points=[PointStruct(id=point_id, vector=embedding, payload=payload)],
+            )
 
         return point_id
 
@@ -98,14 +128,13 @@ class QdrantService:
 
         query_embedding = await self.get_embedding(query)
 
-        results = self.client.search(
-            collection_name=self.COLLECTION_NAME,
-            query_vector=query_embedding,
-            query_filter={
-                "must": [{"key": "user_id", "match": {"value": user_id}}]
-            },
-            limit=limit,
-        )
+        with timed("qdrant_search"):
+            results = self.client.query_points(
+                collection_name=self.COLLECTION_NAME,
+                query=query_embedding,
+                query_filter=self._user_filter(user_id),
+                limit=limit,
+            ).points
 
         return [
             {
@@ -118,12 +147,18 @@ class QdrantService:
 
     async def delete_user_memories(self, user_id: str):
         """Delete all memories for a user."""
+        from qdrant_client.http.models import FilterSelector
+
         self.client.delete(
             collection_name=self.COLLECTION_NAME,
-            points_selector={
-                "filter": {"must": [{"key": "user_id", "match": {"value": user_id}}]}
-            },
+            points_selector=FilterSelector(filter=self._user_filter(user_id)),
         )
 
+    @staticmethod
+    def _user_filter(user_id: str):
+        from qdrant_client.http.models import FieldCondition, Filter, MatchValue
+
+        return Filter(must=[FieldCondition(key="user_id", match=MatchValue(value=user_id))])
+
 
 qdrant_service = QdrantService()
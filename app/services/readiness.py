@@ -0,0 +1,57 @@
+import asyncio
+import logging
+import time
+
+from app.core.config import settings
+from app.db import warm_pool
+from app.services.openrouter import openrouter_service
+from app.services.qdrant import qdrant_service
+
+logger = logging.getLogger(__name__)
+
+
+class Readiness:
+    """
+    Startup priming of the worker's dependencies, doubling as its readiness state.
+
+    Each check warms one dependency (DB pool, model catalog plus the OpenRouter
+    connection, Qdrant collection) so the first requests don't pay for it.
+    Failed checks are retried on the next `prime()`, e.g. from a readiness probe.
+    """
+
+    def __init__(self):
+        self.checks = {
+            "database": warm_pool,
+            "model_catalog": lambda: openrouter_service.get_models(refresh=True),
+            "qdrant": qdrant_service.ensure_collection,
+        }
+        # check name -> None when passed, else "not run" or "failed"
+        self.results: dict[str, str | None] = dict.fromkeys(self.checks, "not run")
+        self._lock = asyncio.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return all(error is None for error in self.results.values())
+
+    async def _run(self, name: str) -> None:
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(self.checks[name](), settings.startup_timeout_seconds)
+        except Exception:
+            # Details (DSNs, hostnames, driver messages) go to the log, not to the public /ready
+            self.results[name] = "failed"
+            logger.warning("Startup check %s failed", name, exc_info=True)
+        else:
+            self.results[name] = None
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            logger.info("Startup check %s ready in %.0f ms", name, elapsed_ms)
+
+    async def prime(self) -> bool:
+        """Run every check that hasn't passed yet, concurrently; returns overall readiness."""
+        async with self._lock:
+            pending = [name for name, error in self.results.items() if error is not None]
+            await asyncio.gather(*(self._run(name) for name in pending))
+        return self.ready
+
+
+readiness = Readiness()
@@ -0,0 +1,175 @@
+from datetime import UTC, date, datetime, timedelta
+
+from sqlalchemy import case, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Goal
+
+STREAK_MILESTONES = (3, 7, 14, 30, 60, 90, 180, 365)
+
+
+def local_date(moment: datetime, tz_offset: int | None) -> date:
+    """Calendar date of a UTC moment at the user's whole-hour UTC offset."""
+    return (moment.astimezone(UTC) + timedelta(hours=tz_offset or 0)).date()
+
+
+def effective_streak(goal: Goal, today: date) -> int:
+    """
+    The goal's current streak as of `today`, the user's local date.
+
+    The stored streak only changes when an entry is added, so it reads as 0
+    once a whole day has passed without one.
+    """
+    last = (goal.metrics or {}).get("last_entry_date")
+    if last and date.fromisoformat(last) >= today - timedelta(days=1):
+        return goal.current_streak
+    return 0
+
+
+def effective_streak_column(today: date):
+    """`effective_streak` as a SQL expression, for selecting goal rows as columns."""
+    yesterday = (today - timedelta(days=1)).isoformat()
+    return case(
+        (Goal.metrics["last_entry_date"].astext >= yesterday, Goal.current_streak), else_=0
+    )
+
+
+def apply_progress_entry(
+    goal: Goal,
+    mood: str | None,
+    tz_offset: int | None,
+    now: datetime | None = None,
+) -> None:
+    """
+    Fold one new progress entry into the goal's streaks, metrics and milestones.
+
+    O(1): only the goal row is touched. The caller must hold the goal row lock
+    (SELECT ... FOR UPDATE) and commit in the same transaction as the entry.
+
+    Args:
+        goal: The goal the entry belongs to
+        mood: The entry's mood, if any
+        tz_offset: The user's UTC offset in hours, used to decide the entry's day
+        now: Timestamp of the entry (defaults to the current time)
+    """
+    now = now or datetime.now(UTC)
+    today = local_date(now, tz_offset)
+    metrics = dict(goal.metrics or {})
+
+    last = metrics.get("last_entry_date")
+    last_day = date.fromisoformat(last) if last else None
+    if last_day == today:
+        current = goal.current_streak or 1
+    elif last_day == today - timedelta(days=1):
+        current = (goal.current_streak or 0) + 1
+    else:
+        current = 1
+
+    metrics["total_entries"] = metrics.get("total_entries", 0) + 1
+    metrics["last_entry_date"] = max(today, last_day or today).isoformat()
+    if mood:
+        mood_counts = dict(metrics.get("mood_counts") or {})
+        mood_counts[mood] = mood_counts.get(mood, 0) + 1
+        metrics["mood_counts"] = mood_counts
+
+    # Reassign JSONB values so the ORM sees the change
+    goal.metrics = metrics
+    goal.current_streak = current
+    goal.best_streak = max(goal.best_streak or 0, current)
+
+    achieved = list(goal.milestones_achieved or [])
+    reached = {m.get("value") for m in achieved if m.get("type") == "streak"}
+    if current in STREAK_MILESTONES and current not in reached:
+        achieved.append({"type": "streak", "value": current, "achieved_at": now.isoformat()})
+        goal.milestones_achieved = achieved
+
+
+# Gaps-and-islands over distinct local entry days: consecutive days share
+# (day - row_number), so each island is one streak run.
+REPAIR_SQL = """
+WITH entry_days AS (
+    SELECT DISTINCT
+        p.goal_id,
+        (
+            p.created_at AT TIME ZONE 'UTC' + make_interval(hours => coalesce(u.timezone, 0))
+        )::date AS day,
+        (now() AT TIME ZONE 'UTC' + make_interval(hours => coalesce(u.timezone, 0)))::date AS today
+    FROM progress_entries p
+    JOIN goals g ON g.id = p.goal_id
+    JOIN users u ON u.id = g.user_id
+    WHERE (CAST(:goal_ids AS uuid[]) IS NULL OR p.goal_id = ANY(CAST(:goal_ids AS uuid[])))
+),
+islands AS (
+    SELECT goal_id, day, today,
+           day - CAST(row_number() OVER (PARTITION BY goal_id ORDER BY day) AS integer) AS grp
+    FROM entry_days
+),
+runs AS (
+    SELECT goal_id, count(*) AS length, max(day) AS last_day, max(today) AS today
+    FROM islands
+    GROUP BY goal_id, grp
+),
+streaks AS (
+    SELECT goal_id,
+           max(length) AS best,
+           coalesce(max(length) FILTER (WHERE last_day >= today - 1), 0) AS current,
+           max(last_day) AS last_day
+    FROM runs
+    GROUP BY goal_id
+),
+totals AS (
+    SELECT goal_id,
+           sum(n) AS total,
+           jsonb_object_agg(mood, n) FILTER (WHERE mood IS NOT NULL) AS mood_counts
+    FROM (
+        SELECT goal_id, mood, count(*) AS n
+        FROM progress_entries
+        WHERE (CAST(:goal_ids AS uuid[]) IS NULL OR goal_id = ANY(CAST(:goal_ids AS uuid[])))
+        GROUP BY goal_id, mood
+    ) per_mood
+    GROUP BY goal_id
+),
+recomputed AS (
+    SELECT g.id,
+           coalesce(s.current, 0) AS current_streak,
+           coalesce(s.best, 0) AS best_streak,
+           coalesce(g.metrics, '{}'::jsonb) - 'last_entry_date' - 'total_entries' - 'mood_counts'
+               || jsonb_strip_nulls(jsonb_build_object(
+                   'total_entries', coalesce(t.total, 0),
+                   'last_entry_date', to_char(s.last_day, 'YYYY-MM-DD'),
+                   'mood_counts', coalesce(t.mood_counts, '{}'::jsonb)
+               )) AS metrics
+    FROM goals g
+    LEFT JOIN streaks s ON s.goal_id = g.id
+    LEFT JOIN totals t ON t.goal_id = g.id
+    WHERE (CAST(:goal_ids AS uuid[]) IS NULL OR g.id = ANY(CAST(:goal_ids AS uuid[])))
+)
+UPDATE goals g
+SET current_streak = r.current_streak,
+    best_streak = r.best_streak,
+    metrics = r.metrics,
+    updated_at = now()
+FROM recomputed r
+WHERE g.id = r.id
+  AND (g.current_streak, g.best_streak, g.metrics)
+      IS DISTINCT FROM (r.current_streak, r.best_streak, r.metrics)
+"""
+
+
+async def repair_goal_aggregates(db: AsyncSession, goal_ids: list[str] | None = None) -> int:
+    """
+    Recompute streaks and metrics from progress_entries with one set-based UPDATE.
+
+    Also zeroes current streaks that lapsed since the last entry. Goals that
+    change get a new updated_at, so listing ETags change with them. Recorded
+    milestones are history and are left untouched.
+
+    Args:
+        db: Database session (the caller commits)
+        goal_ids: Restrict the repair to these goals; None repairs every goal
+
+    Returns:
+        Number of goals whose aggregates changed
+    """
+    result = await db.execute(text(REPAIR_SQL), {"goal_ids": goal_ids})
+    return result.rowcount
@@ -0,0 +1,213 @@
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict, deque
+from collections.abc import AsyncIterator, Awaitable, Callable
+
+from app.core.config import settings
+from app.core.metrics import Counter
+from app.core.serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+STREAMS_ABANDONED = Counter(
+    "jetaide_chat_streams_abandoned_total",
+    "Chat generations cancelled because no client was connected.",
+)
+
+
+class ChatStream:
+    """
+    One generation's SSE frames, decoupled from the connection that started it.
+
+    The generation task appends frames; any number of connections replay them
+    from a sequence number and then follow the live tail. Only the last
+    `max_frames` frames are kept, so a client that fell too far behind can't
+    resume; the full reply is persisted once the generation finishes anyway.
+
+    When the last follower disconnects and nobody resumes within
+    `abandon_grace` seconds, the generation task is cancelled so the upstream
+    completion stops too.
+    """
+
+    def __init__(self, user_id: str, max_frames: int, abandon_grace: float):
+        self.id = uuid.uuid4().hex
+        self.user_id = user_id
+        self.frames: deque[tuple[int, str]] = deque(maxlen=max_frames)
+        self.next_seq = 0
+        self.done = False
+        self.finished_at: float | None = None
+        self.task: asyncio.Task | None = None
+        self.abandon_grace = abandon_grace
+        self.followers = 0
+        self._abandon_timer: asyncio.TimerHandle | None = None
+        self._changed = asyncio.Condition()
+
+    @classmethod
+    def replay(cls, stream_id: str, user_id: str, frames: list[str]) -> "ChatStream":
+        """A finished stream rebuilt from stored frames, once the original's buffer is gone."""
+        stream = cls(user_id, max_frames=len(frames), abandon_grace=0)
+        stream.id = stream_id
+        stream.frames.extend(enumerate(frames))
+        stream.next_seq = len(frames)
+        stream.done = True
+        return stream
+
+    def event_id(self, seq: int) -> str:
+        return f"{self.id}:{seq}"
+
+    async def append(self, data: str) -> None:
+        async with self._changed:
+            self.frames.append((self.next_seq, data))
+            self.next_seq += 1
+            self._changed.notify_all()
+
+    async def finish(self) -> None:
+        """Mark the stream complete; followers end once they have sent every frame."""
+        if self.done:
+            return
+        if self._abandon_timer is not None:
+            self._abandon_timer.cancel()
+        async with self._changed:
+            self.done = True
+            self.finished_at = time.monotonic()
+            self._changed.notify_all()
+
+    def can_resume(self, after: int) -> bool:
+        """Whether every frame after `after` is still buffered."""
+        return after < self.next_seq and (not self.frames or self.frames[0][0] <= after + 1)
+
+    async def follow(self, after: int = -1) -> AsyncIterator[str]:
+        """
+        Yield SSE frames with sequence numbers above `after`, then the live tail.
+
+        Ends early if the follower fell so far behind that frames were dropped;
+        the client's reconnect is then refused by `can_resume`.
+        """
+        seq = after + 1
+        self.followers += 1
+        if self._abandon_timer is not None:
+            self._abandon_timer.cancel()
+            self._abandon_timer = None
+        try:
+            while True:
+                async with self._changed:
+                    await self._changed.wait_for(lambda seq=seq: self.next_seq > seq or self.done)
+                    if self.frames and self.frames[0][0] > seq:
+                        return
+                    pending = [(s, data) for s, data in self.frames if s >= seq]
+                    done = self.done
+                for s, data in pending:
+                    yield f"id: {self.event_id(s)}\ndata: {data}\n\n"
+                    seq = s + 1
+                if done and seq >= self.next_seq:
+                    return
+        finally:
+            self.followers -= 1
+            if not self.followers and not self.done:
+                self.arm_abandon_timer()
+
+    def arm_abandon_timer(self) -> None:
+        """Cancel the generation unless a follower (re)connects within `abandon_grace` seconds."""
+        loop = asyncio.get_running_loop()
+        self._abandon_timer = loop.call_later(self.abandon_grace, self._abandon)
+
+    def _abandon(self) -> None:
+        self._abandon_timer = None
+        if not self.followers and not self.done and self.task is not None:
+            STREAMS_ABANDONED.inc()
+            self.task.cancel()
+
+
+class StreamRegistry:
+    """
+    Active and recently finished chat streams of this process, by stream ID.
+
+    Finished streams stay resumable for `resume_ttl` seconds; at most
+    `max_streams` are kept, evicting the oldest finished ones first.
+    """
+
+    def __init__(
+        self,
+        max_frames: int = 2000,
+        resume_ttl: float = 120.0,
+        abandon_grace: float = 10.0,
+        max_streams: int = 10_000,
+    ):
+        self.max_frames = max_frames
+        self.resume_ttl = resume_ttl
+        self.abandon_grace = abandon_grace
+        self.max_streams = max_streams
+        # Set (as a time.monotonic() value) once the server starts draining; see shutdown()
+        self.drain_deadline: float | None = None
+        self._streams: OrderedDict[str, ChatStream] = OrderedDict()
+
+    def start(
+        self, user_id: str, generation: Callable[[ChatStream], Awaitable[None]]
+    ) -> ChatStream:
+        """Register a stream and run `generation(stream)` as a task that outlives the request."""
+        self._prune()
+        stream = ChatStream(user_id, self.max_frames, self.abandon_grace)
+        self._streams[stream.id] = stream
+        stream.task = asyncio.create_task(self._run(stream, generation))
+        # Covers a client that disconnects before its response starts following
+        stream.arm_abandon_timer()
+        return stream
+
+    async def _run(self, stream: ChatStream, generation) -> None:
+        try:
+            await generation(stream)
+        except asyncio.CancelledError:
+            logger.info("Chat stream %s abandoned by its client", stream.id)
+        except Exception:
+            logger.exception("Chat stream %s failed", stream.id)
+            # Lets clients tell a failed generation from a dropped connection
+            await stream.append(dumps({"error": "upstream_failed"}))
+        finally:
+            await stream.finish()
+
+    def get(self, stream_id: str, user_id: str) -> ChatStream | None:
+        stream = self._streams.get(stream_id)
+        if stream is None or stream.user_id != user_id:
+            return None
+        return stream
+
+    def _prune(self) -> None:
+        now = time.monotonic()
+        for stream_id, stream in list(self._streams.items()):
+            expired = stream.done and now - stream.finished_at > self.resume_ttl
+            if expired or (stream.done and len(self._streams) >= self.max_streams):
+                del self._streams[stream_id]
+
+    async def shutdown(self) -> None:
+        """
+        Wait for running generations so their replies are persisted.
+
+        Generations still running at `drain_deadline` are cancelled, which
+        stores what they generated so far as truncated replies.
+        """
+        tasks = [s.task for s in self._streams.values() if s.task is not None and not s.task.done()]
+        if not tasks:
+            return
+        if self.drain_deadline is not None:
+            remaining = max(0.0, self.drain_deadline - time.monotonic())
+            _, pending = await asyncio.wait(tasks, timeout=remaining)
+            for task in pending:
+                task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def parse_event_id(event_id: str) -> tuple[str, int] | None:
+    """Split a `Last-Event-ID` of the form "<stream id>:<seq>"."""
+    stream_id, _, seq = event_id.rpartition(":")
+    if not stream_id or not seq.isdigit():
+        return None
+    return stream_id, int(seq)
+
+
+stream_registry = StreamRegistry(
+    max_frames=settings.stream_replay_max_frames,
+    resume_ttl=settings.stream_resume_ttl_seconds,
+    abandon_grace=settings.stream_abandon_grace_seconds,
+)
@@ -0,0 +1,182 @@
+import asyncio
+import logging
+from collections import deque
+from datetime import UTC, datetime
+
+from sqlalchemy import insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.core.config import settings
+from app.core.metrics import Counter
+from app.db.database import async_session_maker
+from app.models import TokenUsage, TokenUsageDaily
+from app.services.openrouter import openrouter_service
+
+logger = logging.getLogger(__name__)
+
+LLM_TOKENS = Counter(
+    "jetaide_llm_tokens_total",
+    "Tokens reported by the LLM upstream, by kind (prompt or completion).",
+    ("kind",),
+)
+USAGE_UNREPORTED = Counter(
+    "jetaide_llm_usage_unreported_total",
+    "LLM calls that ended without a usage report (e.g. cancelled streams), by source.",
+    ("source",),
+)
+USAGE_DROPPED = Counter(
+    "jetaide_usage_records_dropped_total",
+    "Usage records dropped because the buffer was full while the database was unavailable.",
+)
+
+
+class UsageLedger:
+    """
+    Buffers the token usage of LLM calls and writes it in batches.
+
+    `record()` only appends to an in-memory buffer, so it costs a request
+    nothing. A task started with `start()` flushes the buffer every
+    `flush_interval` seconds, or as soon as `flush_batch` records are waiting:
+    one multi-row insert into token_usage plus one upsert of the affected
+    token_usage_daily rows. A failed flush keeps its records for the next one;
+    beyond `max_buffered`, the oldest are dropped.
+    """
+
+    def __init__(self, flush_interval: float, flush_batch: int, max_buffered: int):
+        self.flush_interval = flush_interval
+        self.flush_batch = flush_batch
+        self.max_buffered = max_buffered
+        self._buffer: deque[dict] = deque()
+        self._wakeup: asyncio.Event | None = None
+        self._flusher: asyncio.Task | None = None
+
+    def record(
+        self, user_id: str, source: str, completion, conversation_id: str | None = None
+    ) -> None:
+        """
+        Buffer the usage of a finished `completion` (a ChatCompletion or ChatCompletionStream).
+
+        Args:
+            user_id: Who the call was made for
+            source: What made it: "chat", "stream", "ws" or "checkin"
+            completion: Its `model`, `finish_reason` and `usage` are recorded
+            conversation_id: The conversation the reply belongs to, if any
+        """
+        usage = completion.usage
+        if not usage:
+            USAGE_UNREPORTED.inc(source)
+            return
+        prompt_tokens = int(usage.get("prompt_tokens") or 0)
+        completion_tokens = int(usage.get("completion_tokens") or 0)
+        LLM_TOKENS.inc("prompt", amount=prompt_tokens)
+        LLM_TOKENS.inc("completion", amount=completion_tokens)
+        self._buffer.append(
+            {
+                "user_id": user_id,
+                "conversation_id": conversation_id,
+                "source": source,
+                "model": completion.model or "unknown",
+                "finish_reason": completion.finish_reason,
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "cost": openrouter_service.cost(completion.model, usage),
+                "created_at": datetime.now(UTC),
+            }
+        )
+        while len(self._buffer) > self.max_buffered:
+            self._buffer.popleft()
+            USAGE_DROPPED.inc()
+        if len(self._buffer) >= self.flush_batch and self._wakeup is not None:
+            self._wakeup.set()
+
+    @staticmethod
+    def daily_rollups(records: list[dict]) -> list[dict]:
+        """Sum records per (user, UTC day, model), in key order so concurrent upserts lock alike."""
+        totals: dict[tuple, dict] = {}
+        for record in records:
+            key = (record["user_id"], record["created_at"].date(), record["model"])
+            row = totals.get(key)
+            if row is None:
+                row = totals[key] = {
+                    "user_id": key[0],
+                    "day": key[1],
+                    "model": key[2],
+                    "requests": 0,
+                    "prompt_tokens": 0,
+                    "completion_tokens": 0,
+                    "cost": 0.0,
+                }
+            row["requests"] += 1
+            row["prompt_tokens"] += record["prompt_tokens"]
+            row["completion_tokens"] += record["completion_tokens"]
+            row["cost"] += record["cost"] or 0.0
+        return [totals[key] for key in sorted(totals)]
+
+    async def flush(self) -> int:
+        """Write everything buffered so far; returns the number of records written."""
+        records = list(self._buffer)
+        if not records:
+            return 0
+        self._buffer.clear()
+        try:
+            rollup = pg_insert(TokenUsageDaily)
+            async with async_session_maker() as db:
+                await db.execute(insert(TokenUsage), records)
+                await db.execute(
+                    rollup.on_conflict_do_update(
+                        index_elements=["user_id", "day", "model"],
+                        set_={
+                            name: getattr(TokenUsageDaily, name) + rollup.excluded[name]
+                            for name in ("requests", "prompt_tokens", "completion_tokens", "cost")
+                        },
+                    ),
+                    self.daily_rollups(records),
+                )
+                await db.commit()
+        except BaseException:
+            # Put them back in front of anything recorded meanwhile, for the next flush
+            self._buffer.extendleft(reversed(records))
+            while len(self._buffer) > self.max_buffered:
+                self._buffer.popleft()
+                USAGE_DROPPED.inc()
+            raise
+        return len(records)
+
+    def start(self) -> None:
+        if self._flusher is None:
+            self._wakeup = asyncio.Event()
+            self._flusher = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the flusher and write what is left."""
+        if self._flusher is not None:
+            self._flusher.cancel()
+            await asyncio.gather(self._flusher, return_exceptions=True)
+            self._flusher = None
+        try:
+            await self.flush()
+        except Exception:
+            logger.exception(
+                "Dropping %d usage records that could not be written", len(self._buffer)
+            )
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as exc:
+                logger.warning(
+                    "Usage flush failed, %d records kept for retry: %s", len(self._buffer), exc
+                )
+
+
+usage_ledger = UsageLedger(
+    flush_interval=settings.usage_flush_seconds,
+    flush_batch=settings.usage_flush_batch,
+    max_buffered=settings.usage_max_buffered,
+)
@@ -0,0 +1,169 @@
+"""
+OpenRouter-compatible stand-in for benchmarks.
+
+Serves /chat/completions (plain and streamed), /embeddings and /models with
+configurable time-to-first-token, token rate and error injection, so hot paths
+can be measured without spending on the live API.
+
+    python -m benchmarks.fake_openrouter --port 8787 --ttft-ms 300 --tokens-per-sec 60
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import time
+from dataclasses import dataclass
+
+import numpy as np
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+MODEL_ID = "bench/fake-model"
+EMBEDDING_SIZE = 1536
+PROMPT_PRICE = 0.0000001  # USD per token
+COMPLETION_PRICE = 0.0000002
+
+
+@dataclass
+class FakeConfig:
+    ttft_ms: float = 300.0
+    tokens_per_sec: float = 60.0
+    completion_tokens: int = 80
+    embedding_ms: float = 40.0
+    error_rate: float = 0.0
+    error_status: int = 500
+
+
+def _tokens(n: int) -> list[str]:
+    words = [
+        "Keep", " going", ",", " you're", " doing", " great", ".",
+        " One", " step", " at", " a", " time", "!\n",
+    ]
+    return [words[i % len(words)] for i in range(n)]
+
+
+def create_app(config: FakeConfig) -> FastAPI:
+    app = FastAPI(title="Fake OpenRouter")
+    token_delay = 1.0 / config.tokens_per_sec if config.tokens_per_sec > 0 else 0.0
+
+    def injected_error() -> JSONResponse | None:
+        if config.error_rate and random.random() < config.error_rate:
+            return JSONResponse(
+                {"error": {"message": "injected failure", "code": config.error_status}},
+                status_code=config.error_status,
+                headers={"Retry-After": "1"} if config.error_status == 429 else None,
+            )
+        return None
+
+    @app.get("/models")
+    async def models():
+        return {
+            "data": [
+                {
+                    "id": MODEL_ID,
+                    "context_length": 128000,
+                    "pricing": {"prompt": "0.0000001", "completion": "0.0000002"},
+                }
+            ]
+        }
+
+    @app.post("/embeddings")
+    async def embeddings(request: Request):
+        if error := injected_error():
+            return error
+        body = await request.json()
+        await asyncio.sleep(config.embedding_ms / 1000)
+        inputs = body["input"] if isinstance(body["input"], list) else [body["input"]]
+        data = []
+        for i, text in enumerate(inputs):
+            seed = int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest(), "big")
+            vector = np.random.default_rng(seed).standard_normal(EMBEDDING_SIZE)
+            embedding = (vector / np.linalg.norm(vector)).tolist()
+            data.append({"object": "embedding", "index": i, "embedding": embedding})
+        usage = {"prompt_tokens": 8, "total_tokens": 8}
+        return {"data": data, "model": body.get("model"), "usage": usage}
+
+    @app.post("/chat/completions")
+    async def chat_completions(request: Request):
+        if error := injected_error():
+            return error
+        body = await request.json()
+        n_tokens = min(config.completion_tokens, body.get("max_tokens") or config.completion_tokens)
+        tokens = _tokens(n_tokens)
+        prompt_tokens = sum(len(str(m.get("content", ""))) for m in body.get("messages", [])) // 4
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": n_tokens,
+            "total_tokens": prompt_tokens + n_tokens,
+        }
+        if body.get("usage", {}).get("include"):
+            usage["cost"] = prompt_tokens * PROMPT_PRICE + n_tokens * COMPLETION_PRICE
+        completion_id = f"gen-{time.time_ns()}"
+
+        if not body.get("stream"):
+            await asyncio.sleep(config.ttft_ms / 1000 + token_delay * n_tokens)
+            return {
+                "id": completion_id,
+                "model": MODEL_ID,
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": "".join(tokens)},
+                        "finish_reason": "stop",
+                    }
+                ],
+                "usage": usage,
+            }
+
+        async def stream():
+            await asyncio.sleep(config.ttft_ms / 1000)
+            for i, token in enumerate(tokens):
+                if i:
+                    await asyncio.sleep(token_delay)
+                chunk = {
+                    "id": completion_id,
+                    "model": MODEL_ID,
+                    "choices": [{"index": 0, "delta": {"content": token}}],
+                }
+                yield f"data: {json.dumps(chunk)}\n\n"
+            final = {
+                "id": completion_id,
+                "model": MODEL_ID,
+                "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+                "usage": usage,
+            }
+            yield f"data: {json.dumps(final)}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(stream(), media_type="text/event-stream")
+
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Fake OpenRouter server for benchmarks.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8787)
+    parser.add_argument("--ttft-ms", type=float, default=FakeConfig.ttft_ms)
+    parser.add_argument("--tokens-per-sec", type=float, default=FakeConfig.tokens_per_sec)
+    parser.add_argument("--completion-tokens", type=int, default=FakeConfig.completion_tokens)
+    parser.add_argument("--embedding-ms", type=float, default=FakeConfig.embedding_ms)
+    parser.add_argument("--error-rate", type=float, default=FakeConfig.error_rate)
+    parser.add_argument("--error-status", type=int, default=FakeConfig.error_status)
+    args = parser.parse_args()
+
+    config = FakeConfig(
+        ttft_ms=args.ttft_ms,
+        tokens_per_sec=args.tokens_per_sec,
+        completion_tokens=args.completion_tokens,
+        embedding_ms=args.embedding_ms,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+    )
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
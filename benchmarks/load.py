@@ -0,0 +1,478 @@
+"""
+End-to-end load and latency benchmark.
+
+Starts the fake OpenRouter server in a subprocess, points the app at it with an
+in-process Qdrant, seeds benchmark users into the configured database and drives
+concurrent authenticated clients against the app over real HTTP. Reports
+p50/p95/p99 latency, TTFT for streams, throughput and DB pool usage, and writes
+a JSON result that can be compared with a run from another commit.
+
+    python -m benchmarks.load --users 50 --duration 30 --output bench/head.json
+    python -m benchmarks.load --users 50 --duration 30 --compare bench/base.json
+
+By default the app runs in the benchmark's own process and event loop. With
+`--serve "ARGS"` it runs as `jetaide serve ARGS` in a subprocess instead, to
+compare worker, event loop and parser settings (DB pool usage is then not sampled).
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import shlex
+import signal
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from pathlib import Path
+
+import httpx
+import numpy as np
+
+BENCH_EMAIL_DOMAIN = "bench.jetaide.local"
+
+# Relative frequency of each operation per scenario
+SCENARIOS: dict[str, dict[str, int]] = {
+    "mixed": {"chat": 2, "stream": 3, "goals": 2, "conversations": 2, "progress": 1},
+    "chat": {"chat": 1},
+    "stream": {"stream": 1},
+    "read": {"goals": 1, "conversations": 1},
+}
+
+
+@dataclass
+class Sample:
+    op: str
+    started: float
+    latency: float
+    ok: bool
+    ttft: float | None = None
+
+
+@dataclass
+class BenchUser:
+    index: int
+    user_id: str
+    goal_id: str
+    headers: dict[str, str]
+    conversation_id: str | None = None
+
+
+@dataclass
+class PoolStats:
+    samples: list[int] = field(default_factory=list)
+    size: int = 0
+    max_overflow: int = 0
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+async def wait_until_up(url: str, timeout: float = 20.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while True:
+            try:
+                await client.get(url)
+                return
+            except httpx.TransportError:
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f"{url} did not come up") from None
+                await asyncio.sleep(0.1)
+
+
+async def cleanup_bench_data() -> None:
+    """Delete every row owned by benchmark users."""
+    from sqlalchemy import text
+
+    from app.db import async_session_maker
+
+    bench_users = f"SELECT id FROM users WHERE email LIKE '%@{BENCH_EMAIL_DOMAIN}'"
+    statements = [
+        f"DELETE FROM messages WHERE conversation_id IN"
+        f" (SELECT id FROM conversations WHERE user_id IN ({bench_users}))",
+        f"DELETE FROM conversations WHERE user_id IN ({bench_users})",
+        f"DELETE FROM progress_entries WHERE goal_id IN"
+        f" (SELECT id FROM goals WHERE user_id IN ({bench_users}))",
+        f"DELETE FROM daily_logs WHERE user_id IN ({bench_users})",
+        f"DELETE FROM check_ins WHERE user_id IN ({bench_users})",
+        f"DELETE FROM goals WHERE user_id IN ({bench_users})",
+        f"DELETE FROM user_engagement WHERE user_id IN ({bench_users})",
+        f"DELETE FROM token_usage WHERE user_id IN ({bench_users})",
+        f"DELETE FROM token_usage_daily WHERE user_id IN ({bench_users})",
+        f"DELETE FROM users WHERE email LIKE '%@{BENCH_EMAIL_DOMAIN}'",
+    ]
+    async with async_session_maker() as db:
+        for statement in statements:
+            await db.execute(text(statement))
+        await db.commit()
+
+
+async def seed_users(count: int) -> list[BenchUser]:
+    from app.core.security import create_access_token
+    from app.db import async_session_maker
+    from app.models import Goal, User, UserEngagement
+
+    users = [
+        User(
+            email=f"user{i}@{BENCH_EMAIL_DOMAIN}",
+            name=f"Bench User {i}",
+            oauth_provider="bench",
+            oauth_id=f"bench-{i}",
+            engagement=UserEngagement(),
+        )
+        for i in range(count)
+    ]
+    goals = [Goal(user=user, title="Quit smoking", category="smoking") for user in users]
+
+    async with async_session_maker() as db:
+        db.add_all(users + goals)
+        await db.commit()
+
+    return [
+        BenchUser(
+            index=i,
+            user_id=user.id,
+            goal_id=goal.id,
+            headers={"Authorization": f"Bearer {create_access_token({'sub': user.id})}"},
+        )
+        for i, (user, goal) in enumerate(zip(users, goals, strict=True))
+    ]
+
+
+async def op_chat(client: httpx.AsyncClient, user: BenchUser) -> Sample:
+    started = time.perf_counter()
+    response = await client.post(
+        "/chat",
+        json={"message": "I had a craving after lunch", "conversation_id": user.conversation_id},
+        headers=user.headers,
+    )
+    latency = time.perf_counter() - started
+    if response.status_code == 200:
+        user.conversation_id = response.json()["conversation_id"]
+    return Sample("chat", started, latency, response.status_code == 200)
+
+
+async def op_stream(client: httpx.AsyncClient, user: BenchUser) -> Sample:
+    started = time.perf_counter()
+    ttft = None
+    async with client.stream(
+        "POST",
+        "/chat/stream",
+        json={
+            "message": "How do I handle evening cravings?",
+            "conversation_id": user.conversation_id,
+        },
+        headers=user.headers,
+    ) as response:
+        async for _ in response.aiter_bytes():
+            if ttft is None:
+                ttft = time.perf_counter() - started
+        ok = response.status_code == 200
+    return Sample("stream", started, time.perf_counter() - started, ok, ttft)
+
+
+async def op_goals(client: httpx.AsyncClient, user: BenchUser) -> Sample:
+    started = time.perf_counter()
+    response = await client.get("/goals", headers=user.headers)
+    return Sample("goals", started, time.perf_counter() - started, response.status_code == 200)
+
+
+async def op_conversations(client: httpx.AsyncClient, user: BenchUser) -> Sample:
+    started = time.perf_counter()
+    response = await client.get("/chat/conversations", headers=user.headers)
+    ok = response.status_code == 200
+    return Sample("conversations", started, time.perf_counter() - started, ok)
+
+
+async def op_progress(client: httpx.AsyncClient, user: BenchUser) -> Sample:
+    started = time.perf_counter()
+    response = await client.post(
+        f"/goals/{user.goal_id}/progress",
+        json={"note": "No cigarettes today", "mood": "good"},
+        headers=user.headers,
+    )
+    return Sample("progress", started, time.perf_counter() - started, response.status_code == 200)
+
+
+OPS = {
+    "chat": op_chat,
+    "stream": op_stream,
+    "goals": op_goals,
+    "conversations": op_conversations,
+    "progress": op_progress,
+}
+
+
+async def virtual_user(
+    client: httpx.AsyncClient,
+    user: BenchUser,
+    weights: dict[str, int],
+    deadline: float,
+    samples: list[Sample],
+) -> None:
+    rng = random.Random(user.index)
+    names, counts = list(weights), list(weights.values())
+    while time.perf_counter() < deadline:
+        op = rng.choices(names, counts)[0]
+        started = time.perf_counter()
+        try:
+            samples.append(await OPS[op](client, user))
+        except httpx.HTTPError:
+            samples.append(Sample(op, started, time.perf_counter() - started, False))
+
+
+async def sample_pool(stats: PoolStats, stop: asyncio.Event, interval: float = 0.01) -> None:
+    from app.db import engine
+
+    pool = engine.pool
+    stats.size = pool.size() if hasattr(pool, "size") else 0
+    stats.max_overflow = getattr(pool, "_max_overflow", 0)
+    while not stop.is_set():
+        stats.samples.append(pool.checkedout() if hasattr(pool, "checkedout") else 0)
+        await asyncio.sleep(interval)
+
+
+def _ms(values: np.ndarray, q: float) -> float | None:
+    return round(float(np.percentile(values, q)) * 1000, 2) if values.size else None
+
+
+def summarize(samples: list[Sample], measured_seconds: float) -> dict:
+    ops: dict[str, dict] = {}
+    for op in sorted({s.op for s in samples}):
+        op_samples = [s for s in samples if s.op == op]
+        latencies = np.array([s.latency for s in op_samples if s.ok])
+        ttfts = np.array([s.ttft for s in op_samples if s.ok and s.ttft is not None])
+        ops[op] = {
+            "count": len(op_samples),
+            "errors": sum(not s.ok for s in op_samples),
+            "throughput_rps": round(latencies.size / measured_seconds, 2),
+            "p50_ms": _ms(latencies, 50),
+            "p95_ms": _ms(latencies, 95),
+            "p99_ms": _ms(latencies, 99),
+        }
+        if ttfts.size:
+            ops[op].update(
+                {
+                    "ttft_p50_ms": _ms(ttfts, 50),
+                    "ttft_p95_ms": _ms(ttfts, 95),
+                    "ttft_p99_ms": _ms(ttfts, 99),
+                }
+            )
+
+    ok = sum(s.ok for s in samples)
+    return {
+        "ops": ops,
+        "total": {
+            "count": len(samples),
+            "errors": len(samples) - ok,
+            "throughput_rps": round(ok / measured_seconds, 2),
+        },
+    }
+
+
+def server_label(config: dict) -> str:
+    serve = config.get("serve")
+    return "in-process" if serve is None else f"jetaide serve {serve}"
+
+
+def print_report(result: dict, baseline: dict | None = None) -> None:
+    metrics = [
+        "count",
+        "errors",
+        "throughput_rps",
+        "p50_ms",
+        "p95_ms",
+        "p99_ms",
+        "ttft_p50_ms",
+        "ttft_p99_ms",
+    ]
+    config = result["config"]
+    print(
+        f"\ncommit {result['commit']}  users={config['users']}  duration={config['duration']}s  "
+        f"server: {server_label(config)}"
+    )
+    if baseline:
+        print(f"compared with {baseline['commit']} ({server_label(baseline['config'])})")
+    print(f"{'op':<14}" + "".join(f"{m:>16}" for m in metrics))
+    for op, stats in result["ops"].items():
+        base = (baseline or {}).get("ops", {}).get(op, {})
+        cells = []
+        for metric in metrics:
+            value = stats.get(metric)
+            if value is None:
+                cells.append(f"{'-':>16}")
+            elif base.get(metric):
+                change = (value - base[metric]) / base[metric] * 100
+                cells.append(f"{value:>9}{change:>+6.0f}%")
+            else:
+                cells.append(f"{value:>16}")
+        print(f"{op:<14}" + "".join(cells))
+    pool = result["db_pool"]
+    total = f"\ntotal {result['total']['throughput_rps']} req/s, {result['total']['errors']} errors"
+    if pool is None:
+        print(total)
+    else:
+        print(
+            f"{total}; db pool checked out max {pool['max_checked_out']} "
+            f"mean {pool['mean_checked_out']} "
+            f"(size {pool['pool_size']} + overflow {pool['max_overflow']})"
+        )
+
+
+async def run(args: argparse.Namespace) -> dict:
+    fake = subprocess.Popen(
+        [
+            sys.executable, "-m", "benchmarks.fake_openrouter",
+            "--port", str(args.fake_port),
+            "--ttft-ms", str(args.ttft_ms),
+            "--tokens-per-sec", str(args.tokens_per_sec),
+            "--completion-tokens", str(args.completion_tokens),
+            "--error-rate", str(args.error_rate),
+        ]
+    )
+    served = None
+    try:
+        await wait_until_up(f"http://127.0.0.1:{args.fake_port}/models")
+
+        # Settings are read at import time, so configure the app before importing it
+        os.environ["OPENROUTER_BASE_URL"] = f"http://127.0.0.1:{args.fake_port}"
+        os.environ["OPENROUTER_API_KEY"] = "bench"
+        os.environ.setdefault("QDRANT_LOCATION", ":memory:")
+        # Bench users chat far faster than the per-user limit allows
+        os.environ.setdefault("CHAT_RATE_LIMIT_PER_MINUTE", "0")
+
+        import uvicorn
+
+        from app.main import app
+
+        await cleanup_bench_data()
+        users = await seed_users(args.users)
+
+        if args.serve is None:
+            server = uvicorn.Server(
+                uvicorn.Config(app, host="127.0.0.1", port=args.app_port, log_level="warning")
+            )
+            server_task = asyncio.create_task(server.serve())
+        else:
+            served = subprocess.Popen(
+                [
+                    sys.executable, "-m", "app.cli", "serve",
+                    "--host", "127.0.0.1",
+                    "--port", str(args.app_port),
+                    "--log-level", "warning",
+                    *shlex.split(args.serve),
+                ]
+            )
+        await wait_until_up(f"http://127.0.0.1:{args.app_port}/health")
+
+        pool_stats = PoolStats()
+        stop_sampling = asyncio.Event()
+        sampler = None
+        if args.serve is None:
+            sampler = asyncio.create_task(sample_pool(pool_stats, stop_sampling))
+
+        samples: list[Sample] = []
+        limits = httpx.Limits(max_connections=args.users, max_keepalive_connections=args.users)
+        async with httpx.AsyncClient(
+            base_url=f"http://127.0.0.1:{args.app_port}", limits=limits, timeout=120.0
+        ) as client:
+            start = time.perf_counter()
+            measure_from = start + args.warmup
+            deadline = measure_from + args.duration
+            scenario = SCENARIOS[args.scenario]
+            await asyncio.gather(
+                *(virtual_user(client, user, scenario, deadline, samples) for user in users)
+            )
+            measured_seconds = time.perf_counter() - measure_from
+
+        if args.serve is None:
+            stop_sampling.set()
+            await sampler
+            server.should_exit = True
+            await server_task
+        else:
+            served.send_signal(signal.SIGTERM)
+            await asyncio.to_thread(served.wait)
+        if not args.keep_data:
+            await cleanup_bench_data()
+    finally:
+        if served is not None and served.poll() is None:
+            served.terminate()
+            served.wait()
+        fake.terminate()
+        fake.wait()
+
+    measured = [s for s in samples if s.started >= measure_from]
+    pool_samples = np.array(pool_stats.samples or [0])
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.now(UTC).isoformat(),
+        "python": platform.python_version(),
+        "config": {
+            "users": args.users,
+            "duration": args.duration,
+            "warmup": args.warmup,
+            "scenario": args.scenario,
+            "ttft_ms": args.ttft_ms,
+            "tokens_per_sec": args.tokens_per_sec,
+            "completion_tokens": args.completion_tokens,
+            "error_rate": args.error_rate,
+            "serve": args.serve,
+        },
+        **summarize(measured, measured_seconds),
+        "db_pool": None
+        if args.serve is not None
+        else {
+            "max_checked_out": int(pool_samples.max()),
+            "mean_checked_out": round(float(pool_samples.mean()), 2),
+            "pool_size": pool_stats.size,
+            "max_overflow": pool_stats.max_overflow,
+        },
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="End-to-end load benchmark against local stand-ins."
+    )
+    parser.add_argument("--users", type=int, default=20, help="Concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=20.0, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=3.0, help="Seconds excluded from results")
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), default="mixed")
+    parser.add_argument("--app-port", type=int, default=8905)
+    parser.add_argument("--fake-port", type=int, default=8787)
+    parser.add_argument("--ttft-ms", type=float, default=300.0)
+    parser.add_argument("--tokens-per-sec", type=float, default=60.0)
+    parser.add_argument("--completion-tokens", type=int, default=80)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument(
+        "--serve",
+        metavar="ARGS",
+        help='Run the app with `jetaide serve ARGS`, e.g. "--workers 4 --preload"',
+    )
+    parser.add_argument("--keep-data", action="store_true", help="Keep seeded rows after the run")
+    parser.add_argument("--output", help="Write the JSON result to this file")
+    parser.add_argument("--compare", help="JSON result of a previous run to compare against")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+    baseline = json.loads(Path(args.compare).read_text()) if args.compare else None
+    print_report(result, baseline)
+
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.output).write_text(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
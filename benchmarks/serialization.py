@@ -0,0 +1,218 @@
+"""
+Micro-benchmark of the list endpoints' query and serialization paths.
+
+Seeds one benchmark user with --rows goals, progress entries and conversations
+in the configured database, then times each listing three ways:
+
+- orm: ORM entities validated into the response model and dumped by Pydantic
+  (FastAPI's path for a response model with the default response class)
+- orm_custom_default: the same, but through `mode="json"` and orjson, which is
+  what FastAPI does once a custom default response class is set
+- rows: column tuples rendered by `json_page` (the endpoints' current path)
+
+and reports the median cost per row, split into query and serialization.
+
+    python -m benchmarks.serialization --rows 200 --repeat 50
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import UTC, datetime, timedelta
+
+from benchmarks.load import BENCH_EMAIL_DOMAIN, cleanup_bench_data
+
+
+async def seed(rows: int) -> tuple[str, str]:
+    from sqlalchemy import insert
+
+    from app.db import async_session_maker
+    from app.models import Conversation, Goal, ProgressEntry, User, UserEngagement
+
+    now = datetime.now(UTC)
+    async with async_session_maker() as db:
+        user = User(
+            email=f"serialization@{BENCH_EMAIL_DOMAIN}",
+            name="Serialization Bench",
+            oauth_provider="bench",
+            oauth_id="bench-serialization",
+            engagement=UserEngagement(),
+        )
+        db.add(user)
+        await db.flush()
+        goal_ids = (
+            await db.execute(
+                insert(Goal.__table__).returning(Goal.id),
+                [
+                    {
+                        "user_id": user.id,
+                        "title": f"Goal {i}",
+                        "description": "Walk 10k steps every day and log how it went",
+                        "category": "exercise",
+                        "status": "active",
+                        "current_streak": i % 30,
+                        "best_streak": i % 45,
+                        "metrics": {
+                            "total_entries": i,
+                            "last_entry_date": "2026-01-01",
+                            "mood_counts": {"good": i},
+                        },
+                        "milestones_achieved": [7, 30] if i % 3 else None,
+                        "created_at": now - timedelta(minutes=i),
+                    }
+                    for i in range(rows)
+                ],
+            )
+        ).scalars().all()
+        await db.execute(
+            insert(ProgressEntry.__table__),
+            [
+                {
+                    "goal_id": goal_ids[0],
+                    "note": f"Entry {i}",
+                    "mood": "good",
+                    "created_at": now - timedelta(minutes=i),
+                }
+                for i in range(rows)
+            ],
+        )
+        await db.execute(
+            insert(Conversation.__table__),
+            [
+                {
+                    "user_id": user.id,
+                    "title": f"Conversation {i}",
+                    "message_count": i,
+                    "last_message_preview": "Thanks, that helps a lot with the evening cravings",
+                    "updated_at": now - timedelta(minutes=i),
+                }
+                for i in range(rows)
+            ],
+        )
+        await db.commit()
+        return user.id, goal_ids[0]
+
+
+def listings(user_id: str, goal_id: str) -> dict:
+    """Per endpoint: (ORM query, row query, response schema, sort attribute)."""
+    from sqlalchemy import select
+
+    from app.api.pagination import response_columns
+    from app.models import Conversation, Goal, ProgressEntry
+    from app.schemas import ConversationResponse, GoalResponse, ProgressResponse
+
+    goals_order = (Goal.created_at.desc(), Goal.id.desc())
+    progress_order = (ProgressEntry.created_at.desc(), ProgressEntry.id.desc())
+    conversations_order = (Conversation.updated_at.desc(), Conversation.id.desc())
+    return {
+        "goals": (
+            select(Goal).where(Goal.user_id == user_id).order_by(*goals_order),
+            select(*response_columns(Goal, GoalResponse, Goal.created_at))
+            .where(Goal.user_id == user_id)
+            .order_by(*goals_order),
+            GoalResponse,
+            "created_at",
+        ),
+        "progress": (
+            select(ProgressEntry).where(ProgressEntry.goal_id == goal_id).order_by(*progress_order),
+            select(*response_columns(ProgressEntry, ProgressResponse))
+            .where(ProgressEntry.goal_id == goal_id)
+            .order_by(*progress_order),
+            ProgressResponse,
+            "created_at",
+        ),
+        "conversations": (
+            select(Conversation)
+            .where(Conversation.user_id == user_id)
+            .order_by(*conversations_order),
+            select(*response_columns(Conversation, ConversationResponse))
+            .where(Conversation.user_id == user_id)
+            .order_by(*conversations_order),
+            ConversationResponse,
+            "updated_at",
+        ),
+    }
+
+
+async def measure(orm_query, row_query, schema, sort_attr: str, rows: int, repeat: int) -> dict:
+    import orjson
+    from fastapi import Response
+    from pydantic import TypeAdapter
+
+    from app.api.pagination import json_page
+    from app.db import async_session_maker
+
+    adapter = TypeAdapter(list[schema])
+    timings: dict[str, tuple[list[float], list[float]]] = {
+        "orm": ([], []),
+        "orm_custom_default": ([], []),
+        "rows": ([], []),
+    }
+    bodies = {}
+
+    for _ in range(repeat):
+        for variant, (query_times, serialize_times) in timings.items():
+            # A fresh session each time, so ORM hydration isn't served from the identity map
+            async with async_session_maker() as db:
+                start = time.perf_counter()
+                if variant == "rows":
+                    result = list((await db.execute(row_query)).all())
+                else:
+                    result = list((await db.execute(orm_query)).scalars().all())
+                queried = time.perf_counter()
+                if variant == "orm":
+                    body = adapter.dump_json(adapter.validate_python(result))
+                elif variant == "orm_custom_default":
+                    data = adapter.dump_python(adapter.validate_python(result), mode="json")
+                    body = orjson.dumps(data)
+                else:
+                    body = json_page(Response(), result, rows, "", schema, sort_attr).body
+                done = time.perf_counter()
+            query_times.append(queried - start)
+            serialize_times.append(done - queried)
+            bodies[variant] = body
+
+    assert orjson.loads(bodies["rows"]) == orjson.loads(bodies["orm"]), "row path output differs"
+    return {
+        variant: {
+            "query_us_per_row": statistics.median(query_times) / rows * 1e6,
+            "serialize_us_per_row": statistics.median(serialize_times) / rows * 1e6,
+        }
+        for variant, (query_times, serialize_times) in timings.items()
+    }
+
+
+async def run(args: argparse.Namespace) -> dict:
+    await cleanup_bench_data()
+    try:
+        user_id, goal_id = await seed(args.rows)
+        return {
+            name: await measure(*listing, rows=args.rows, repeat=args.repeat)
+            for name, listing in listings(user_id, goal_id).items()
+        }
+    finally:
+        await cleanup_bench_data()
+
+
+def print_report(results: dict, rows: int) -> None:
+    print(f"\nper-row cost over {rows} rows (median, microseconds)")
+    print(f"{'listing':<15}{'variant':<21}{'query':>10}{'serialize':>12}{'total':>10}")
+    for name, variants in results.items():
+        for variant, result in variants.items():
+            query, serialize = result["query_us_per_row"], result["serialize_us_per_row"]
+            total = query + serialize
+            print(f"{name:<15}{variant:<21}{query:>10.2f}{serialize:>12.2f}{total:>10.2f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="List endpoint serialization micro-benchmark.")
+    parser.add_argument(
+        "--rows", type=int, default=200, help="Rows per listing (MAX_PAGE_SIZE is 200)"
+    )
+    parser.add_argument("--repeat", type=int, default=50, help="Timed repetitions per variant")
+    args = parser.parse_args()
+    print_report(asyncio.run(run(args)), args.rows)
+
+
+if __name__ == "__main__":
+    main()
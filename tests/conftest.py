@@ -0,0 +1,54 @@
+"""
+Route tests run the app in-process against the database from DATABASE_URL
+(migrated to head); each test gets its own user, removed afterwards.
+"""
+import uuid
+
+import httpx
+import pytest
+from sqlalchemy import delete, select
+
+from app.core.security import create_access_token
+from app.db import async_session_maker, engine
+from app.main import app
+from app.models import CheckIn, DailyLog, Goal, ProgressEntry, User, UserEngagement
+
+pytest_plugins = ["app.db.pytest_plugin"]
+
+
+@pytest.fixture
+async def client():
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+    # Pooled connections belong to this test's event loop
+    await engine.dispose()
+
+
+@pytest.fixture
+async def user():
+    async with async_session_maker() as db:
+        user = User(
+            email=f"{uuid.uuid4()}@test.jetaide.local",
+            name="Test",
+            oauth_provider="google",
+            oauth_id=str(uuid.uuid4()),
+            engagement=UserEngagement(),
+        )
+        db.add(user)
+        await db.commit()
+    yield user
+    async with async_session_maker() as db:
+        await db.execute(delete(CheckIn).where(CheckIn.user_id == user.id))
+        await db.execute(delete(DailyLog).where(DailyLog.user_id == user.id))
+        goals = select(Goal.id).where(Goal.user_id == user.id)
+        await db.execute(delete(ProgressEntry).where(ProgressEntry.goal_id.in_(goals)))
+        await db.execute(delete(Goal).where(Goal.user_id == user.id))
+        await db.execute(delete(UserEngagement).where(UserEngagement.user_id == user.id))
+        await db.execute(delete(User).where(User.id == user.id))
+        await db.commit()
+
+
+@pytest.fixture
+def auth_headers(user):
+    return {"Authorization": f"Bearer {create_access_token({'sub': user.id})}"}
@@ -0,0 +1,8 @@
+import pytest
+
+
+@pytest.mark.parametrize("path", ["/chat", "/chat/stream"])
+async def test_oversized_idempotency_key_is_rejected(client, auth_headers, path):
+    headers = {**auth_headers, "Idempotency-Key": "k" * 256}
+    response = await client.post(path, json={"message": "Hi"}, headers=headers)
+    assert response.status_code == 422
@@ -0,0 +1,50 @@
+import json
+from datetime import UTC, datetime
+
+from sqlalchemy import delete
+
+from app.db import async_session_maker
+from app.models import Conversation
+from app.services.export import DELTA_OVERLAP
+from app.services.message_archive import message_archive
+
+
+async def test_cursor_overlaps_the_snapshot(client, auth_headers):
+    response = await client.get("/export", headers=auth_headers)
+    assert response.status_code == 200
+
+    cursor = json.loads(response.text.splitlines()[-1])
+    assert cursor["type"] == "cursor"
+    assert datetime.fromisoformat(cursor["since"]) <= datetime.now(UTC) - DELTA_OVERLAP
+
+
+async def test_naive_since_reads_archived_messages(
+    client, user, auth_headers, tmp_path, monkeypatch
+):
+    monkeypatch.setattr(message_archive, "directory", str(tmp_path))
+    async with async_session_maker() as db:
+        conversation = Conversation(user_id=user.id, created_at=datetime(2024, 1, 10, tzinfo=UTC))
+        db.add(conversation)
+        await db.commit()
+    writer = message_archive.writer(
+        "messages_2024_01", datetime(2024, 1, 1, tzinfo=UTC), datetime(2024, 2, 1, tzinfo=UTC)
+    )
+    writer.add([
+        ("m1", conversation.id, "user", "Before", False, datetime(2024, 1, 10, tzinfo=UTC), []),
+        ("m2", conversation.id, "user", "After", False, datetime(2024, 1, 15, tzinfo=UTC), []),
+    ])
+    writer.close()
+    message_archive.publish(writer)
+
+    try:
+        response = await client.get(
+            "/export", params={"since": "2024-01-12T00:00:00"}, headers=auth_headers
+        )
+    finally:
+        async with async_session_maker() as db:
+            await db.execute(delete(Conversation).where(Conversation.id == conversation.id))
+            await db.commit()
+
+    assert response.status_code == 200
+    records = [json.loads(line) for line in response.text.splitlines()]
+    assert [r["content"] for r in records if r["type"] == "message"] == ["After"]
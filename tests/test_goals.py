@@ -0,0 +1,88 @@
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy import select, update
+
+from app.db import async_session_maker
+from app.models import CheckIn, Goal, User
+from app.services.streaks import repair_goal_aggregates
+
+
+async def test_deleting_a_goal_keeps_its_check_ins(client, user, auth_headers):
+    goal = (
+        await client.post(
+            "/goals", json={"title": "Run", "category": "fitness"}, headers=auth_headers
+        )
+    ).json()
+    async with async_session_maker() as db:
+        check_in = CheckIn(
+            user_id=user.id, goal_id=goal["id"], message_sent="How was the run?",
+            check_in_type="morning",
+        )
+        db.add(check_in)
+        await db.commit()
+
+    response = await client.delete(f"/goals/{goal['id']}", headers=auth_headers)
+    assert response.status_code == 200
+
+    async with async_session_maker() as db:
+        goal_id = await db.scalar(select(CheckIn.goal_id).where(CheckIn.id == check_in.id))
+    assert goal_id is None
+
+
+async def test_daily_log_defaults_to_the_users_local_date(client, user, auth_headers):
+    async with async_session_maker() as db:
+        await db.execute(update(User).where(User.id == user.id).values(timezone=14))
+        await db.commit()
+    goal = (
+        await client.post(
+            "/goals", json={"title": "Eat well", "category": "diet"}, headers=auth_headers
+        )
+    ).json()
+
+    response = await client.post(f"/goals/{goal['id']}/logs", json={}, headers=auth_headers)
+    assert response.status_code == 200
+    today = (datetime.now(UTC) + timedelta(hours=14)).date()
+    assert response.json()["log_date"] == today.isoformat()
+
+
+async def test_streak_lapses_after_a_day_without_entries(client, auth_headers):
+    goal = (
+        await client.post(
+            "/goals", json={"title": "Run", "category": "fitness"}, headers=auth_headers
+        )
+    ).json()
+    today = datetime.now(UTC).date()
+    for last_entry, streak in ((today - timedelta(days=1), 5), (today - timedelta(days=2), 0)):
+        async with async_session_maker() as db:
+            await db.execute(
+                update(Goal)
+                .where(Goal.id == goal["id"])
+                .values(current_streak=5, metrics={"last_entry_date": last_entry.isoformat()})
+            )
+            await db.commit()
+
+        response = await client.get(f"/goals/{goal['id']}", headers=auth_headers)
+        assert response.json()["current_streak"] == streak
+        response = await client.get("/goals", headers=auth_headers)
+        assert response.json()[0]["current_streak"] == streak
+
+
+async def test_repaired_goals_change_the_listing_etag(client, auth_headers):
+    goal = (
+        await client.post(
+            "/goals", json={"title": "Run", "category": "fitness"}, headers=auth_headers
+        )
+    ).json()
+    async with async_session_maker() as db:
+        await db.execute(update(Goal).where(Goal.id == goal["id"]).values(best_streak=9))
+        await db.commit()
+    first = await client.get("/goals", headers=auth_headers)
+
+    async with async_session_maker() as db:
+        assert await repair_goal_aggregates(db, [goal["id"]]) == 1
+        await db.commit()
+
+    headers = {**auth_headers, "If-None-Match": first.headers["ETag"]}
+    response = await client.get("/goals", headers=headers)
+    assert response.status_code == 200
+    assert response.json()[0]["best_streak"] == 0
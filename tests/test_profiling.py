@@ -0,0 +1,21 @@
+from types import SimpleNamespace
+
+from app.db.profiling import QueryProfiler
+
+
+def _execute(profiler: QueryProfiler, conn, statement: str) -> None:
+    profiler._before_cursor_execute(conn, None, statement, (), None, False)
+    profiler._after_cursor_execute(conn, None, statement, (), None, False)
+
+
+def test_counting_continues_past_the_statement_cap():
+    profiler = QueryProfiler()
+    profiler.MAX_STATEMENTS = 1
+    conn = SimpleNamespace(info={})
+
+    with profiler.count_queries() as queries:
+        _execute(profiler, conn, "SELECT 1")
+        _execute(profiler, conn, "SELECT 2")
+
+    assert queries.total == 2
+    assert [s["statement"] for s in profiler.snapshot()["statements"]] == ["SELECT 1"]
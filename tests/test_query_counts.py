@@ -0,0 +1,48 @@
+"""Statements per request for the list endpoints, so N+1 regressions fail loudly."""
+
+
+async def test_list_goals_is_three_queries(client, auth_headers, query_counter):
+    await client.post("/goals", json={"title": "Run", "category": "fitness"}, headers=auth_headers)
+
+    with query_counter() as queries:
+        response = await client.get("/goals", headers=auth_headers)
+    assert response.status_code == 200
+    assert queries.total == 3, queries.statements  # auth lookup, ETag validator, page
+
+
+async def test_unchanged_goals_page_skips_the_page_query(client, auth_headers, query_counter):
+    first = await client.get("/goals", headers=auth_headers)
+
+    with query_counter() as queries:
+        response = await client.get(
+            "/goals", headers={**auth_headers, "If-None-Match": first.headers["ETag"]}
+        )
+    assert response.status_code == 304
+    assert queries.total == 2, queries.statements  # auth lookup, ETag validator
+
+
+async def test_list_conversations_is_three_queries(client, auth_headers, query_counter):
+    with query_counter() as queries:
+        response = await client.get("/chat/conversations", headers=auth_headers)
+    assert response.status_code == 200
+    assert queries.total == 3, queries.statements
+
+
+async def test_goal_progress_is_constant_in_entries(client, auth_headers, query_counter):
+    goal = (
+        await client.post(
+            "/goals", json={"title": "Run", "category": "fitness"}, headers=auth_headers
+        )
+    ).json()
+    for _ in range(5):
+        await client.post(
+            f"/goals/{goal['id']}/progress",
+            json={"note": "ran", "mood": "good"},
+            headers=auth_headers,
+        )
+
+    with query_counter() as queries:
+        response = await client.get(f"/goals/{goal['id']}/progress", headers=auth_headers)
+    assert response.status_code == 200
+    assert len(response.json()) == 5
+    assert max(queries.statements.values()) == 1, queries.statements